@@ -0,0 +1,125 @@
+"""
+Concurrent requests for a popular movie when its cached representation goes cold.
+
+Worker threads request the same movie detail at once through the Django test
+client, on a throwaway test database, after its cache entry was invalidated
+(missing) or has expired. With single flight one request rebuilds the entry
+while the others wait for it or are served the expired one; without it every
+request rebuilds it.
+
+    python benchmarks/cache_stampede.py --threads 32 --rounds 20
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from movies.cache import ResponseCache, response_cache  # noqa: E402
+from movies.models import Author, Movie  # noqa: E402
+
+
+def seed(authors):
+    movie = Movie.objects.create(title="Blockbuster", status="released")
+    movie.authors.set(
+        Author.objects.create_user(username=f"author{index}", password="x")
+        for index in range(authors)
+    )
+    return movie
+
+
+def worker(url, barrier, rounds, latencies):
+    client = APIClient()
+    for _ in range(rounds):
+        barrier.wait()
+        start = time.perf_counter()
+        client.get(url)
+        latencies.append(time.perf_counter() - start)
+        connection.close()
+        barrier.wait()
+
+
+def run(label, movie, threads, rounds, expire):
+    builds = []
+    set_many = ResponseCache.set_many
+
+    def counted(self, label, representations, variant, generations=None):
+        builds.append(len(representations))
+        return set_many(self, label, representations, variant, generations)
+
+    ResponseCache.set_many = counted
+    settings.RESPONSE_CACHE_TIMEOUT = 0 if expire else 300
+    url = f"/api/movies/{movie.pk}/"
+    APIClient().get(url)
+    builds.clear()
+
+    latencies = []
+
+    def cool_down():
+        if not expire:
+            response_cache.invalidate(Movie._meta.label_lower, [movie.pk])
+
+    barrier = threading.Barrier(threads, action=cool_down)
+    workers = [
+        threading.Thread(target=worker, args=(url, barrier, rounds, latencies))
+        for _ in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    ResponseCache.set_many = set_many
+
+    latencies.sort()
+    print(
+        f"{label:<28} builds/round {len(builds) / rounds:5.1f}"
+        f"  p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms"
+        f"  p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--authors", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ["testserver"]
+    settings.RESPONSE_CACHE_ALIAS = "default"
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        movie = seed(args.authors)
+        claim = ResponseCache._claim
+        for single_flight in (False, True):
+            # without single flight, every request rebuilds the entry
+            ResponseCache._claim = claim if single_flight else lambda *args: True
+            for expire in (False, True):
+                label = (
+                    f"{'single flight' if single_flight else 'every request'}, "
+                    f"{'expired' if expire else 'missing'}"
+                )
+                run(label, movie, args.threads, args.rounds, expire)
+        ResponseCache._claim = claim
+    finally:
+        connection.close()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
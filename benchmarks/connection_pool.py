@@ -0,0 +1,131 @@
+"""
+Connection reuse under concurrent load, with and without the psycopg pool.
+
+Worker threads hit the movie list and rate endpoints through the Django test
+client, on a throwaway test database. Each request releases its connection when
+it finishes, as in production: without the pool it is closed, with the pool it
+goes back to the pool.
+
+    python benchmarks/connection_pool.py --threads 16 --requests 50
+"""
+
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from core.db.backends.postgresql.base import connections_opened  # noqa: E402
+from movies.models import Movie, Spectator  # noqa: E402
+
+
+def seed(spectators):
+    movies = Movie.objects.bulk_create(
+        Movie(title=f"Movie {index}", status="released") for index in range(200)
+    )
+    users = [
+        Spectator.objects.create_user(username=f"bench{index}", password="x")
+        for index in range(spectators)
+    ]
+    return [movie.pk for movie in movies], users
+
+
+def worker(user, movie_ids, requests, latencies, failures):
+    client = APIClient()
+    client.force_authenticate(user)
+    for index in range(requests):
+        start = time.perf_counter()
+        if index % 2:
+            movie_id = movie_ids[(user.pk + index) % len(movie_ids)]
+            response = client.post(
+                f"/api/movies/{movie_id}/rate/", {"score": index % 10 + 1}
+            )
+        else:
+            response = client.get("/api/movies/")
+        connection.close()
+        latencies.append(time.perf_counter() - start)
+        if not 200 <= response.status_code < 300:
+            failures[response.status_code] += 1
+
+
+def run(label, users, movie_ids, requests):
+    pool = connection.pool
+    before = connections_opened.value(alias="default")
+    server_before = pool.get_stats().get("connections_num", 0) if pool else 0
+    latencies = []
+    failures = collections.Counter()
+    threads = [
+        threading.Thread(
+            target=worker, args=(user, movie_ids, requests, latencies, failures)
+        )
+        for user in users
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    handed = connections_opened.value(alias="default") - before
+    # without the pool every connection handed to Django is a new one
+    opened = (
+        pool.get_stats().get("connections_num", 0) - server_before if pool else handed
+    )
+    latencies.sort()
+    print(
+        f"{label:<10} {len(latencies) / elapsed:8.0f} req/s"
+        f"  p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms"
+        f"  p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms"
+        f"  server connections {int(opened)}"
+    )
+    if failures:
+        sys.exit(f"{label}: non-2xx responses {dict(failures)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ["testserver"]
+    # every thread shares the test client IP, the rates would reject most POSTs
+    settings.THROTTLE_IP_RATES = {}
+    settings.THROTTLE_USER_RATES = {}
+    # pool options, as configured, but independent from DATABASE_POOL
+    pool_options = dict(settings.DATABASE_POOL_OPTIONS)
+    connections.settings["default"]["OPTIONS"].pop("pool", None)
+    connections.settings["default"]["CONN_MAX_AGE"] = 0
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        movie_ids, users = seed(args.threads)
+        run("no pool", users, movie_ids, args.requests)
+
+        connection.close()
+        connections.settings["default"]["OPTIONS"]["pool"] = pool_options
+        run("pool", users, movie_ids, args.requests)
+        connection.close()
+        connection.close_pool()
+    finally:
+        connections.settings["default"]["OPTIONS"].pop("pool", None)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
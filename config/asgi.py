@@ -2,6 +2,7 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Live streams are served directly, every other request by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -13,4 +14,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# models are loaded once the Django application is
+from movies.live import stream  # noqa: E402
+
+LIVE_ROUTES = {"/api/live/movies/": stream}
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] in LIVE_ROUTES:
+        return await LIVE_ROUTES[scope["path"]](scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -40,11 +40,13 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party apps
     "rest_framework",
     "rest_framework_simplejwt.token_blacklist",
     "drf_spectacular",
     # Local apps
+    "core",
     "users",
     "movies",
 ]
@@ -58,6 +60,9 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ThrottleMiddleware",
+    "core.middleware.PrimaryStickinessMiddleware",
+    "core.middleware.QueryTimeoutMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -85,14 +90,124 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    "default": dj_database_url.config(
-        default=config("DATABASE_URL"),
-        conn_max_age=0 if DEBUG else 600,
+# psycopg connection pool per database and process, replacing persistent
+# connections (CONN_MAX_AGE) when enabled
+DATABASE_POOL = config("DATABASE_POOL", default=True, cast=bool)
+DATABASE_POOL_OPTIONS = {
+    "min_size": config("DATABASE_POOL_MIN_SIZE", default=2, cast=int),
+    "max_size": config("DATABASE_POOL_MAX_SIZE", default=10, cast=int),
+    # seconds a request waits for a connection before failing
+    "timeout": config("DATABASE_POOL_TIMEOUT", default=10, cast=float),
+    # seconds before idle connections above min_size are closed
+    "max_idle": config("DATABASE_POOL_MAX_IDLE", default=300, cast=float),
+    "max_lifetime": config("DATABASE_POOL_MAX_LIFETIME", default=3600, cast=float),
+}
+
+
+def database(url):
+    database_settings = dj_database_url.parse(
+        url,
+        engine="core.db.backends.postgresql",
+        conn_max_age=0 if DEBUG or DATABASE_POOL else 600,
         conn_health_checks=True,
     )
+    if DATABASE_POOL:
+        database_settings.setdefault("OPTIONS", {})["pool"] = dict(
+            DATABASE_POOL_OPTIONS
+        )
+    return database_settings
+
+
+DATABASES = {"default": database(config("DATABASE_URL"))}
+
+# Read replicas of the catalogue (GET on movies and authors), comma separated URLs
+DATABASE_REPLICAS = []
+for index, url in enumerate(config("DATABASE_REPLICA_URLS", default="", cast=Csv())):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = database(url)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+# Rows updated per transaction by BackfillField migration operations, and
+# seconds between two batches
+MIGRATION_BACKFILL_BATCH_SIZE = config(
+    "MIGRATION_BACKFILL_BATCH_SIZE", default=1000, cast=int
+)
+MIGRATION_BACKFILL_SLEEP = config("MIGRATION_BACKFILL_SLEEP", default=0.1, cast=float)
+
+# Seconds users read from the primary after a write (read your writes)
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+# Cache alias of these primary pins: the next request of a user may reach
+# another process, so with a cache local to each process (locmem) it may not stick
+REPLICA_PIN_CACHE_ALIAS = config("REPLICA_PIN_CACHE_ALIAS", default="default")
+# Replicas lagging more than this many seconds leave the rotation
+REPLICA_MAX_LAG = config("REPLICA_MAX_LAG", default=10, cast=float)
+# Seconds between two health checks of a replica, per process
+REPLICA_CHECK_INTERVAL = config("REPLICA_CHECK_INTERVAL", default=5, cast=float)
+
+
+def route_timeout(item):
+    name, milliseconds = item.split("=")
+    return name.strip(), int(milliseconds)
+
+
+# Statement timeout of the queries of a request in milliseconds (0 for none),
+# and per URL name as comma separated name=milliseconds, e.g. author-list=2000
+STATEMENT_TIMEOUT = config("STATEMENT_TIMEOUT", default=5000, cast=int)
+STATEMENT_TIMEOUTS = config(
+    "STATEMENT_TIMEOUTS", default="", cast=Csv(cast=route_timeout, post_process=dict)
+)
+
+# Queries slower than SLOW_QUERY_THRESHOLD milliseconds, or cancelled, are
+# appended to SLOW_QUERY_LOG (disabled when empty, one file per process with the
+# process ID before the suffix), rotated past SLOW_QUERY_LOG_MAX_BYTES with
+# SLOW_QUERY_LOG_BACKUPS old files; this fraction of the slow plain reads is
+# also run under EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERY_THRESHOLD = config("SLOW_QUERY_THRESHOLD", default=500, cast=float)
+SLOW_QUERY_LOG = config(
+    "SLOW_QUERY_LOG", default=str(BASE_DIR / "logs" / "slow_queries.log")
+)
+SLOW_QUERY_LOG_MAX_BYTES = config(
+    "SLOW_QUERY_LOG_MAX_BYTES", default=10 * 1024 * 1024, cast=int
+)
+SLOW_QUERY_LOG_BACKUPS = config("SLOW_QUERY_LOG_BACKUPS", default=5, cast=int)
+SLOW_QUERY_EXPLAIN_RATE = config("SLOW_QUERY_EXPLAIN_RATE", default=0.0, cast=float)
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
 }
 
+# Cache alias of serialized movies and authors, disabled when empty
+RESPONSE_CACHE_ALIAS = config("RESPONSE_CACHE_ALIAS", default="")
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+# Seconds expired entries are still served while one request rebuilds them,
+# seconds a rebuild holds its lock, and seconds other requests wait for it
+RESPONSE_CACHE_STALE_TIMEOUT = config(
+    "RESPONSE_CACHE_STALE_TIMEOUT", default=60, cast=int
+)
+RESPONSE_CACHE_LOCK_TIMEOUT = config("RESPONSE_CACHE_LOCK_TIMEOUT", default=5, cast=int)
+RESPONSE_CACHE_LOCK_WAIT = config("RESPONSE_CACHE_LOCK_WAIT", default=2, cast=float)
+
+# Cache invalidations sent to the other processes over Postgres NOTIFY
+# (core.invalidation), for per-process response caches (e.g. LocMemCache):
+# seconds they are coalesced for, and changed objects per model above which the
+# whole model is invalidated (NOTIFY payloads are limited to 8000 bytes)
+INVALIDATION_BUS = config("INVALIDATION_BUS", default=False, cast=bool)
+INVALIDATION_INTERVAL = config("INVALIDATION_INTERVAL", default=0.2, cast=float)
+INVALIDATION_MAX_KEYS = config("INVALIDATION_MAX_KEYS", default=500, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,23 +242,193 @@ USE_TZ = True
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Accept: application/json; version=2 returns relation counts on authors
+    "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.AcceptHeaderVersioning",
+    "DEFAULT_VERSION": "1",
+    "ALLOWED_VERSIONS": ["1", "2"],
+}
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "users.serializers.TokenBlacklistSerializer",
 }
 
+# Periods of the throttle rates, by their first letter
+THROTTLE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def route_rate(item):
+    name, rate = item.split("=")
+    count, period = rate.split("/")
+    period = period.strip()[:1]
+    if int(count) < 1 or period not in THROTTLE_PERIODS:
+        raise ValueError(f"Invalid rate {item!r}, expected name=count/period")
+    return name.strip(), (int(count), THROTTLE_PERIODS[period])
+
+
+# Requests allowed per sliding window by URL name, as comma separated
+# name=count/period (count >= 1, period: s, m, h or d), per client IP and per
+# JWT user, for the unsafe methods. Counters are kept per process and summed
+# through the THROTTLE_CACHE_ALIAS cache every THROTTLE_SYNC_INTERVAL seconds:
+# with a cache local to each process (locmem), N processes allow N times the rate
+THROTTLE_IP_RATES = config(
+    "THROTTLE_IP_RATES",
+    default=(
+        "spectator-register=10/h,token-obtain=20/m,token-refresh=60/m,"
+        "movie-rate=120/m,movie-favorite=120/m,movie-my-favorites=60/m,"
+        "author-rate=120/m,rating-batch=30/m"
+    ),
+    cast=Csv(cast=route_rate, post_process=dict),
+)
+THROTTLE_USER_RATES = config(
+    "THROTTLE_USER_RATES",
+    default=(
+        "movie-rate=30/m,movie-favorite=30/m,movie-my-favorites=10/m,"
+        "author-rate=30/m,rating-batch=5/m"
+    ),
+    cast=Csv(cast=route_rate, post_process=dict),
+)
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default")
+THROTTLE_SYNC_INTERVAL = config("THROTTLE_SYNC_INTERVAL", default=1, cast=float)
+
+# Cache of users resolved from JWTs, disabled when the timeout is 0
+JWT_USER_CACHE_ALIAS = config("JWT_USER_CACHE_ALIAS", default="default")
+JWT_USER_CACHE_TIMEOUT = config("JWT_USER_CACHE_TIMEOUT", default=60, cast=int)
+
+# Bloom filter of blacklisted refresh tokens, shared through this cache
+JWT_BLACKLIST_FILTER_CACHE_ALIAS = config(
+    "JWT_BLACKLIST_FILTER_CACHE_ALIAS", default="default"
+)
+JWT_BLACKLIST_FILTER_ERROR_RATE = 0.001
+
+# Maximum number of ratings accepted by POST /api/ratings/batch/
+RATING_BATCH_MAX_SIZE = config("RATING_BATCH_MAX_SIZE", default=500, cast=int)
+
+# Maximum number of IDs accepted by GET /api/movies/?ids= and /api/authors/?ids=
+MULTI_GET_MAX_IDS = config("MULTI_GET_MAX_IDS", default=100, cast=int)
+
+# Values returned per facet by /api/movies/facets/, and seconds they are cached
+MOVIE_FACET_LIMIT = config("MOVIE_FACET_LIMIT", default=20, cast=int)
+MOVIE_FACETS_CACHE_TIMEOUT = config("MOVIE_FACETS_CACHE_TIMEOUT", default=60, cast=int)
+
+# Authors with most movies listed by /api/stats/
+STATS_TOP_AUTHORS = config("STATS_TOP_AUTHORS", default=10, cast=int)
+
+# Readiness (GET /ready/): when set, the instance reports ready once this file
+# is written by manage.py warm_caches, and days of ratings ranking its hot set
+WARMUP_READY_FILE = config("WARMUP_READY_FILE", default="")
+WARMUP_TRENDING_DAYS = config("WARMUP_TRENDING_DAYS", default=7, cast=int)
+
+# Changes per page of /api/changes/ by default and at most, and days changes
+# are kept by manage.py compact_changes
+CHANGE_FEED_LIMIT = config("CHANGE_FEED_LIMIT", default=100, cast=int)
+CHANGE_FEED_MAX_LIMIT = config("CHANGE_FEED_MAX_LIMIT", default=1000, cast=int)
+CHANGE_FEED_RETENTION_DAYS = config("CHANGE_FEED_RETENTION_DAYS", default=30, cast=int)
+
+# Monthly partitions of movie ratings created ahead of the current month, and
+# months after which manage.py archive_ratings archives them (gzipped CSV) here
+RATING_PARTITIONS_AHEAD = config("RATING_PARTITIONS_AHEAD", default=3, cast=int)
+RATING_ARCHIVE_MONTHS = config("RATING_ARCHIVE_MONTHS", default=24, cast=int)
+RATING_ARCHIVE_DIR = config("RATING_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Minimum average score of each movie evaluation (below: terrible), applied by
+# manage.py recompute_scores to movies rated at least MIN_RATINGS times
+MOVIE_EVALUATION_THRESHOLDS = {
+    "masterpiece": config("MOVIE_EVALUATION_MASTERPIECE", default=8.5, cast=float),
+    "good": config("MOVIE_EVALUATION_GOOD", default=7.0, cast=float),
+    "average": config("MOVIE_EVALUATION_AVERAGE", default=5.0, cast=float),
+}
+MOVIE_EVALUATION_MIN_RATINGS = config(
+    "MOVIE_EVALUATION_MIN_RATINGS", default=5, cast=int
+)
+
+# Objects whose histograms are rebuilt per UPDATE by recompute_scores
+SCORES_RECOMPUTE_BATCH_SIZE = config(
+    "SCORES_RECOMPUTE_BATCH_SIZE", default=1000, cast=int
+)
+
+# Background jobs (core.jobs): runs before a job fails, seconds before the first
+# retry (doubled after each failure), seconds between polls of an idle worker,
+# seconds without heartbeat after which a running job is retried, and seconds
+# between two heartbeats of a running job (well below the timeout)
+JOB_MAX_ATTEMPTS = config("JOB_MAX_ATTEMPTS", default=3, cast=int)
+JOB_RETRY_DELAY = config("JOB_RETRY_DELAY", default=30, cast=int)
+JOB_POLL_INTERVAL = config("JOB_POLL_INTERVAL", default=1, cast=float)
+JOB_TIMEOUT = config("JOB_TIMEOUT", default=3600, cast=int)
+JOB_HEARTBEAT_INTERVAL = config("JOB_HEARTBEAT_INTERVAL", default=60, cast=float)
+
+
+def task_interval(item):
+    name, seconds = item.split("=")
+    return name.strip(), int(seconds)
+
+
+# Tasks queued periodically by the workers, as comma separated task=seconds
+# between the end of a run and the start of the next
+JOB_SCHEDULE = config(
+    "JOB_SCHEDULE",
+    default=(
+        "movies.refresh_stats=600,movies.recompute_scores=86400,"
+        "movies.create_rating_partitions=86400,core.compact_changes=86400,"
+        "users.compact_tokens=86400"
+    ),
+    cast=Csv(cast=task_interval, post_process=dict),
+)
+
+# Live movie streams (movies.live): broker fanning changes out to the streams
+# (core.broker.PostgresBroker across processes), movies followed per stream,
+# seconds between heartbeats, and seconds a slow client gets to accept an event
+LIVE_BROKER = config("LIVE_BROKER", default="core.broker.LocalBroker")
+LIVE_MAX_MOVIES = config("LIVE_MAX_MOVIES", default=50, cast=int)
+LIVE_HEARTBEAT = config("LIVE_HEARTBEAT", default=15, cast=float)
+LIVE_SEND_TIMEOUT = config("LIVE_SEND_TIMEOUT", default=10, cast=float)
+
+# Spectator avatars (users.avatars): upload size and pixel limits, square
+# thumbnail sizes, and Cache-Control max-age of the content addressed files
+AVATAR_MAX_UPLOAD_SIZE = config(
+    "AVATAR_MAX_UPLOAD_SIZE", default=10 * 1024 * 1024, cast=int
+)
+AVATAR_MAX_PIXELS = config("AVATAR_MAX_PIXELS", default=40_000_000, cast=int)
+AVATAR_SIZES = config("AVATAR_SIZES", default="64,128,256", cast=Csv(int))
+AVATAR_CACHE_MAX_AGE = config("AVATAR_CACHE_MAX_AGE", default=31536000, cast=int)
+
+# Maximum number of movie IDs accepted by PUT /api/movies/favorites/
+FAVORITES_SYNC_MAX_SIZE = config("FAVORITES_SYNC_MAX_SIZE", default=1000, cast=int)
+
+# Bearer token of GET /metrics/, staff users only when empty
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Unfiltered admin changelists above this many rows use the planner row estimate
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config(
+    "ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100_000, cast=int
+)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Cinema API",
     "DESCRIPTION": "API for managing movies, authors, and ratings",
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
+    "ENUM_NAME_OVERRIDES": {
+        "MovieStatusEnum": "movies.models.Movie.Status",
+        "RatingBatchStatusEnum": "movies.serializers.RATING_BATCH_STATUSES",
+    },
 }
 
+# Schemas served by /api/schema/, written by manage.py openapi_schema
+OPENAPI_SCHEMA_DIR = BASE_DIR / "openapi"
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = "static/"
 
+MEDIA_URL = "/media/"
+MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR / "media"))
+
 # Development tools
 if DEBUG:
     INSTALLED_APPS += [
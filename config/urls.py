@@ -18,18 +18,22 @@ Including another URLconf
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from core.schema import schema
+from core.views import metrics, ready
+from users.views import avatar_file
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("movies.urls")),
     path("api/auth/", include("users.urls")),
+    path("metrics/", metrics, name="metrics"),
+    path("ready/", ready, name="ready"),
+    path("media/avatars/<path:path>", avatar_file, name="avatar-file"),
     # API docs
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    # pre-generated by manage.py openapi_schema
+    path("api/schema/", schema, name="schema"),
     path(
         "api/docs/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -0,0 +1,86 @@
+from django import forms
+from django.contrib import admin, messages
+
+from .jobs import enqueue, tasks
+from .models import Job
+
+
+class JobForm(forms.ModelForm):
+    """Queues a job for a registered task"""
+
+    name = forms.ChoiceField()
+
+    class Meta:
+        model = Job
+        fields = ["name", "kwargs", "priority", "dedup_key", "run_at"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["name"].choices = [(name, name) for name in sorted(tasks)]
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "name",
+        "status",
+        "priority",
+        "progress_display",
+        "attempts",
+        "run_at",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "name"]
+    search_fields = ["name", "dedup_key"]
+    actions = ["retry"]
+
+    def get_form(self, request, obj=None, **kwargs):
+        if obj is None:
+            kwargs["form"] = JobForm
+        return super().get_form(request, obj, **kwargs)
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return []
+        return [field.name for field in Job._meta.fields]
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return JobForm.Meta.fields
+        return super().get_fields(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        data = form.cleaned_data
+        job = enqueue(
+            data["name"],
+            priority=data["priority"],
+            dedup_key=data["dedup_key"],
+            run_at=data["run_at"],
+            **(data["kwargs"] or {}),
+        )
+        # the change page of an already queued duplicate is shown
+        obj.pk = job.pk
+
+    @admin.display(description="Progress", ordering="progress")
+    def progress_display(self, obj):
+        if obj.progress_message:
+            return f"{obj.progress}% {obj.progress_message}"
+        return f"{obj.progress}%"
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry(self, request, queryset):
+        retried = 0
+        for job in queryset.filter(status=Job.Status.FAILED):
+            enqueue(
+                job.name,
+                priority=job.priority,
+                dedup_key=job.dedup_key,
+                max_attempts=job.max_attempts,
+                **job.kwargs,
+            )
+            retried += 1
+        self.message_user(request, f"Queued {retried} jobs again.", messages.SUCCESS)
@@ -0,0 +1,171 @@
+"""
+Publish/subscribe of live messages to the streams of this process.
+
+`LocalBroker` fans messages out within the process, which is enough for a
+single ASGI process. `PostgresBroker` publishes them with `NOTIFY`, and each
+process `LISTEN`s on one connection and fans them out to its own subscribers,
+so any process (web, worker, command) reaches the streams of every other one.
+LIVE_BROKER selects the broker.
+
+Messages are the latest state of their topic, so subscriptions only keep the
+last message of each topic until it is sent: a slow consumer skips the states
+it had no time to send instead of buffering them, and its memory is bounded
+by its number of topics.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+from collections import defaultdict
+
+import psycopg
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Topics followed by a stream, and their messages waiting to be sent"""
+
+    def __init__(self, broker, topics, loop):
+        self.broker = broker
+        self.topics = set(topics)
+        self.loop = loop
+        # topic -> latest message, in order of arrival
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, topic, message):
+        """Queue a message, replacing the unsent one of its topic (in the loop)."""
+        self.pending.pop(topic, None)
+        self.pending[topic] = message
+        self.ready.set()
+
+    async def get(self):
+        """Wait for messages, and return every pending one."""
+        await self.ready.wait()
+        self.ready.clear()
+        messages, self.pending = list(self.pending.values()), {}
+        return messages
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Fans messages out to the subscriptions of this process"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics):
+        """Follow topics from the running event loop."""
+        subscription = Subscription(self, topics, asyncio.get_running_loop())
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions[topic].discard(subscription)
+                if not self._subscriptions[topic]:
+                    del self._subscriptions[topic]
+
+    def listening(self, topic):
+        """Whether a message on `topic` may reach a subscriber."""
+        return topic in self._subscriptions
+
+    async def connected(self):
+        """Wait until messages published from now on are received."""
+
+    def publish(self, topic, message):
+        """Send a JSON serializable message to the subscribers of a topic."""
+        self.dispatch(topic, message)
+
+    def dispatch(self, topic, message):
+        """Hand a message over to local subscriptions, from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.offer, topic, message
+                )
+            except RuntimeError:
+                # the loop of the stream is closed
+                pass
+
+
+class PostgresBroker(LocalBroker):
+    """Fans messages out to the subscriptions of every process, over NOTIFY"""
+
+    channel = "live"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._connected = None
+
+    def subscribe(self, topics):
+        subscription = super().subscribe(topics)
+        listener = self._listener
+        if (
+            listener is None
+            or listener.done()
+            or listener.get_loop() is not subscription.loop
+        ):
+            self._connected = asyncio.Event()
+            self._listener = subscription.loop.create_task(
+                self._listen(self._connected)
+            )
+        return subscription
+
+    def listening(self, topic):
+        # subscribers of other processes are unknown
+        return True
+
+    async def connected(self):
+        await self._connected.wait()
+
+    def publish(self, topic, message):
+        payload = json.dumps({"topic": topic, "message": message})
+        with connections["default"].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    async def _listen(self, connected):
+        """Dispatch notifications to local subscriptions, reconnecting on errors."""
+        params = connections["default"].get_connection_params()
+        # sync cursor and adapters of Django
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    autocommit=True, **params
+                ) as connection:
+                    await connection.execute(f"LISTEN {self.channel}")
+                    connected.set()
+                    async for notify in connection.notifies():
+                        data = json.loads(notify.payload)
+                        self.dispatch(data["topic"], data["message"])
+            except (psycopg.Error, OSError):
+                connected.clear()
+                logger.exception("Live broker connection lost")
+                await asyncio.sleep(1)
+
+
+@functools.cache
+def _broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """The LIVE_BROKER of this process."""
+    return _broker(settings.LIVE_BROKER)
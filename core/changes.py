@@ -0,0 +1,92 @@
+"""
+Change feed of the tracked tables.
+
+Database triggers append a `Change` for every created, updated and deleted row
+of a tracked table (see movies migration 0014), in the transaction of the
+change, so bulk upserts and cascades are logged as well and a rolled back
+change is never seen.
+
+Sequence values are taken before commit, so ordering the log by `id` alone
+would let a consumer move past a change whose transaction commits later. The
+log is read in (`txid`, `id`) order instead, and only up to the oldest
+transaction still in progress (the snapshot `xmin`): every transaction below
+it is over, and every later one gets a higher `txid`. Cursors are the
+(`txid`, `id`) of the last change read, and only move forward.
+
+compact_changes deletes old changes and records the cursor of the last one it
+deleted as the `ChangeHorizon`: a consumer whose cursor is behind it missed
+changes and has to sync again from scratch.
+"""
+
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Change, ChangeHorizon
+
+# transactions below this one are over, committed or rolled back
+SNAPSHOT_XMIN = RawSQL("pg_snapshot_xmin(pg_current_snapshot())::text::bigint", ())
+
+START = (0, 0)
+
+
+def format_cursor(cursor):
+    return "{}-{}".format(*cursor)
+
+
+def parse_cursor(value):
+    """
+    Read a cursor returned by the feed
+
+    Returns:
+        tuple: (txid, id), START when `value` is empty
+
+    Raises:
+        ValueError: malformed cursor
+    """
+    if not value:
+        return START
+    txid, _, pk = value.partition("-")
+    if not (txid.isdigit() and pk.isdigit()):
+        raise ValueError(f"Invalid cursor {value!r}.")
+    return int(txid), int(pk)
+
+
+def changes_since(cursor, limit):
+    """
+    Read the changes after a cursor, served by the change cursor index
+
+    Args:
+        cursor (tuple): (txid, id) of the last change read
+        limit (int): maximum number of changes
+
+    Returns:
+        tuple: changes, cursor of the last one (or `cursor`), whether more
+        changes are ready
+    """
+    txid, pk = cursor
+    changes = list(
+        Change.objects.filter(txid__gte=txid, txid__lt=SNAPSHOT_XMIN)
+        .filter(Q(txid__gt=txid) | Q(id__gt=pk))
+        .order_by("txid", "id")[: limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        cursor = (changes[-1].txid, changes[-1].pk)
+    return changes, cursor, has_more
+
+
+def horizon():
+    """Cursor of the last compacted change, START when none was compacted."""
+    row = ChangeHorizon.objects.filter(pk=1).values_list("txid", "change_id").first()
+    return row or START
+
+
+def advance_horizon(cursor):
+    """Move the horizon up to the cursor of a compacted change, in a transaction."""
+    row, created = ChangeHorizon.objects.select_for_update().get_or_create(
+        pk=1, defaults={"txid": cursor[0], "change_id": cursor[1]}
+    )
+    if not created and (row.txid, row.change_id) < cursor:
+        row.txid, row.change_id = cursor
+        row.save()
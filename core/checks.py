@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register(deploy=True)
+def check_throttle_cache(app_configs, **kwargs):
+    """Rate limits only hold across processes through a shared cache."""
+    if not (settings.THROTTLE_IP_RATES or settings.THROTTLE_USER_RATES):
+        return []
+    if not isinstance(caches[settings.THROTTLE_CACHE_ALIAS], LocMemCache):
+        return []
+    return [
+        Warning(
+            "Rate limit counters are kept in a cache local to each process, "
+            "every process allows the full rates.",
+            hint="Set THROTTLE_CACHE_ALIAS to a shared cache (Redis, Memcached).",
+            id="core.W001",
+        )
+    ]
+
+
+@register(deploy=True)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Users only read their writes across processes through a shared cache."""
+    if not (settings.DATABASE_REPLICAS and settings.REPLICA_STICKY_SECONDS):
+        return []
+    if not isinstance(caches[settings.REPLICA_PIN_CACHE_ALIAS], LocMemCache):
+        return []
+    return [
+        Warning(
+            "Primary pins are kept in a cache local to each process, users "
+            "may not read their writes when another process serves them.",
+            hint="Set REPLICA_PIN_CACHE_ALIAS to a shared cache (Redis, Memcached).",
+            id="core.W002",
+        )
+    ]
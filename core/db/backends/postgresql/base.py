@@ -0,0 +1,98 @@
+"""
+PostgreSQL backend recording connection metrics.
+
+With `OPTIONS["pool"]` connections are borrowed from a psycopg pool per alias;
+the time spent waiting for one is recorded, and the pool statistics are exposed
+on the metrics endpoint. Queries go through `core.queries.observe`, applying
+per-route statement timeouts and capturing slow queries.
+"""
+
+import time
+
+from django.db import connections
+from django.db.backends.postgresql import base
+
+from core.metrics import Counter, Histogram, register_collector
+from core.queries import observe
+
+connections_opened = Counter(
+    "db_connections_opened_total",
+    "Connections handed to Django, opened or borrowed from the pool.",
+)
+pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# psycopg_pool statistic -> (metric suffix, kind, documentation)
+POOL_STATS = {
+    "pool_size": ("size", "gauge", "Connections managed by the pool."),
+    "pool_available": ("available", "gauge", "Idle connections in the pool."),
+    "requests_waiting": ("waiting", "gauge", "Requests waiting for a connection."),
+    "requests_num": ("requests", "counter", "Connection requests."),
+    "requests_queued": ("queued", "counter", "Requests that had to wait."),
+    "requests_errors": ("errors", "counter", "Requests failing with a timeout."),
+    "connections_num": ("connects", "counter", "Connections opened to the server."),
+    "connections_lost": ("lost", "counter", "Connections lost."),
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # statement_timeout set on the connection, None when unknown
+        self.statement_timeout = None
+        self.execute_wrappers.append(observe)
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        self.statement_timeout = None
+        if self.pool:
+            pool_wait_seconds.observe(time.perf_counter() - start, alias=self.alias)
+        connections_opened.inc(alias=self.alias)
+        return connection
+
+    # a rollback may undo the timeout set in the transaction
+    def _rollback(self):
+        self.statement_timeout = None
+        super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self.statement_timeout = None
+        super()._savepoint_rollback(sid)
+
+
+@register_collector
+def pool_metrics():
+    stats = {
+        alias: pool.get_stats()
+        for alias, pool in base.DatabaseWrapper._connection_pools.items()
+        if alias in connections.settings
+    }
+    if not stats:
+        return
+    yield (
+        "db_pool_in_use",
+        "gauge",
+        "Connections currently borrowed from the pool.",
+        [
+            (
+                {"alias": alias},
+                values.get("pool_size", 0) - values.get("pool_available", 0),
+            )
+            for alias, values in stats.items()
+        ],
+    )
+    for stat, (suffix, kind, documentation) in POOL_STATS.items():
+        name = f"db_pool_{suffix}" + ("_total" if kind == "counter" else "")
+        yield (
+            name,
+            kind,
+            documentation,
+            [
+                ({"alias": alias}, values.get(stat, 0))
+                for alias, values in stats.items()
+            ],
+        )
@@ -0,0 +1,153 @@
+"""
+Migration operations for large tables, in migrations with `atomic = False`.
+
+- `AddIndexConcurrently` builds an index without blocking writes, first
+  dropping the invalid leftover of an interrupted build so the migration can be
+  run again. With `extension`, the index is only built on databases where the
+  extension is installed.
+- `CreateExtensionIfAvailable` installs an extension the server ships, and
+  leaves the others out rather than failing.
+- `BackfillField` fills a column added as nullable, in batches committed one
+  at a time and MIGRATION_BACKFILL_SLEEP seconds apart, so row locks are short
+  and replicas keep up.
+
+Constraints are added NOT VALID, then validated by a separate operation taking
+a lock that does not block writes (`AddConstraintNotValid` and
+`ValidateConstraint` of django.contrib.postgres).
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.postgres import operations
+from django.db.migrations.operations.base import Operation, OperationCategory
+
+
+def _extension_installed(schema_editor, extension):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", [extension])
+        return cursor.fetchone() is not None
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """Create an index CONCURRENTLY, replacing the leftover of a failed build"""
+
+    def __init__(self, model_name, index, extension=None):
+        super().__init__(model_name, index)
+        self.extension = extension
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        if self.extension:
+            kwargs["extension"] = self.extension
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        if self.extension and not _extension_installed(schema_editor, self.extension):
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = indexrelid "
+                "WHERE relname = %s AND NOT indisvalid",
+                [self.index.name],
+            )
+            invalid = cursor.fetchone() is not None
+        if invalid:
+            name = schema_editor.quote_name(self.index.name)
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        if self.extension and not _extension_installed(schema_editor, self.extension):
+            return
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class CreateExtensionIfAvailable(operations.CreateExtension):
+    """Create an extension when the server provides it"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_available_extensions WHERE name = %s", [self.name]
+            )
+            available = cursor.fetchone() is not None
+        if available:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"Creates extension {self.name} if available"
+
+
+class BackfillField(operations.NotInTransactionMixin, Operation):
+    """Set the NULL values of a column from a SQL expression, in batches"""
+
+    reversible = True
+    atomic = False
+    category = OperationCategory.PYTHON
+
+    def __init__(self, model_name, name, expression, batch_size=None):
+        self.model_name = model_name
+        self.name = name
+        self.expression = expression
+        self.batch_size = batch_size
+
+    def deconstruct(self):
+        kwargs = {
+            "model_name": self.model_name,
+            "name": self.name,
+            "expression": self.expression,
+        }
+        if self.batch_size:
+            kwargs["batch_size"] = self.batch_size
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        pk = quote(model._meta.pk.column)
+        column = quote(model._meta.get_field(self.name).column)
+        batch_size = self.batch_size or settings.MIGRATION_BACKFILL_BATCH_SIZE
+        last = None
+        with schema_editor.connection.cursor() as cursor:
+            while True:
+                # walk the primary key rather than OFFSET, each batch is an
+                # index range scan
+                after = "" if last is None else f"WHERE {pk} > %s"
+                cursor.execute(
+                    f"SELECT {pk} FROM {table} {after} ORDER BY {pk} LIMIT %s",
+                    [batch_size] if last is None else [last, batch_size],
+                )
+                pks = [row[0] for row in cursor.fetchall()]
+                if not pks:
+                    break
+                # autocommit: each batch is a transaction of its own
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = {self.expression} "
+                    f"WHERE {pk} = ANY(%s) AND {column} IS NULL",
+                    [pks],
+                )
+                last = pks[-1]
+                if settings.MIGRATION_BACKFILL_SLEEP:
+                    time.sleep(settings.MIGRATION_BACKFILL_SLEEP)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # the column is dropped by reversing the AddField
+        pass
+
+    def describe(self):
+        return f"Backfill {self.model_name}.{self.name} in batches"
+
+    @property
+    def migration_name_fragment(self):
+        return f"backfill_{self.model_name.lower()}_{self.name.lower()}"
@@ -0,0 +1,159 @@
+"""
+Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+In-process caches register a handler per model label, and model changes call
+`invalidation_bus.invalidate(label, pks)`. Once the transaction commits, the
+handlers of this process run right away, and with INVALIDATION_BUS the keys
+are queued for the other processes: they are sent at most once per
+INVALIDATION_INTERVAL seconds, in one `NOTIFY` per label, and a label with
+more than INVALIDATION_MAX_KEYS changed keys is invalidated as a whole, so
+bulk imports send a few messages per second rather than one per row.
+
+Each process serving requests listens from a daemon thread (started by its
+first request) and runs its handlers for the messages of other processes.
+Messages sent while the listener was disconnected are lost, so every
+registered label is invalidated as a whole after a reconnection.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import psycopg
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """Runs the invalidation handlers of every process on commit"""
+
+    channel = "invalidation"
+
+    def __init__(self):
+        # label -> handlers called with changed keys, or None for every key
+        self._handlers = defaultdict(list)
+        # label -> keys waiting to be sent, None for every key
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self._listener = None
+        # tells the messages of this process apart
+        self.sender = uuid.uuid4().hex[:8]
+
+    def register(self, label, handler):
+        """Call `handler(pks)` when objects of `label` change in any process."""
+        self._handlers[label].append(handler)
+
+    def invalidate(self, label, pks):
+        """Invalidate objects of a model once the transaction commits."""
+        pks = list(pks)
+        if pks:
+            transaction.on_commit(lambda: self._committed(label, pks))
+
+    def apply(self, label, pks):
+        """Run the handlers of this process."""
+        for handler in self._handlers[label]:
+            handler(pks)
+
+    def _committed(self, label, pks):
+        self.apply(label, pks)
+        if not settings.INVALIDATION_BUS:
+            return
+        with self._lock:
+            if label not in self._pending:
+                self._pending[label] = set()
+            if self._pending[label] is not None:
+                self._pending[label].update(pks)
+                if len(self._pending[label]) > settings.INVALIDATION_MAX_KEYS:
+                    self._pending[label] = None
+            if settings.INVALIDATION_INTERVAL and self._timer is None:
+                self._timer = threading.Timer(
+                    settings.INVALIDATION_INTERVAL, self.flush, kwargs={"close": True}
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if not settings.INVALIDATION_INTERVAL:
+            self.flush()
+
+    def flush(self, close=False):
+        """
+        Send the pending invalidations
+
+        Args:
+            close (bool): close the database connection of the thread after
+        """
+        with self._lock:
+            pending, timer = self._pending, self._timer
+            self._pending, self._timer = {}, None
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+        if not pending:
+            return
+        try:
+            with connections["default"].cursor() as cursor:
+                for label, pks in pending.items():
+                    message = {"sender": self.sender, "label": label}
+                    if pks is not None:
+                        message["pks"] = sorted(pks)
+                    cursor.execute(
+                        "SELECT pg_notify(%s, %s)",
+                        [self.channel, json.dumps(message, separators=(",", ":"))],
+                    )
+        except Exception:
+            # stale entries expire, requests must not fail
+            logger.exception("Could not send cache invalidations")
+        finally:
+            if close:
+                connections["default"].close()
+
+    def receive(self, payload):
+        """Apply a message of another process."""
+        message = json.loads(payload)
+        if message["sender"] != self.sender:
+            self.apply(message["label"], message.get("pks"))
+
+    def listen(self):
+        """Start the listener of this process, once."""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name="invalidation-listener", daemon=True
+            )
+        self._listener.start()
+
+    def _listen(self):
+        params = connections["default"].get_connection_params()
+        # Django cursor and adapters
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        reconnecting = False
+        while True:
+            try:
+                with psycopg.connect(autocommit=True, **params) as connection:
+                    connection.execute(f"LISTEN {self.channel}")
+                    if reconnecting:
+                        for label in list(self._handlers):
+                            self.apply(label, None)
+                    for notify in connection.notifies():
+                        self.receive(notify.payload)
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected")
+            reconnecting = True
+            time.sleep(1)
+
+
+invalidation_bus = InvalidationBus()
+
+
+@receiver(request_started)
+def start_listener(sender, **kwargs):
+    if settings.INVALIDATION_BUS:
+        invalidation_bus.listen()
@@ -0,0 +1,307 @@
+"""
+Database backed job queue.
+
+Tasks are plain functions registered with `@task`, and `enqueue` stores a
+`Job` for them. Workers (`manage.py run_jobs`) claim the queued job with the
+highest priority with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent
+workers never wait on each other or run a job twice, then run it outside of
+the claiming transaction. Failed jobs are retried with an exponential backoff
+until `max_attempts`, and running jobs whose heartbeat is older than
+`JOB_TIMEOUT` (their worker died) are queued again.
+
+A thread of the worker refreshes the heartbeat every JOB_HEARTBEAT_INTERVAL
+seconds while the task runs. The outcome of a run is only saved while the job
+is still the one claimed: a run queued again in between is dropped instead of
+overwriting its retry. Tasks report their progress with `report_progress`,
+which is a no-op when the task is called directly.
+
+Idle workers also queue the tasks of JOB_SCHEDULE, each one its interval after
+the end of its previous run (`schedule_periodic`).
+"""
+
+import contextvars
+import logging
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# task name -> function
+tasks = {}
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+# seconds between checks of the periodic tasks by an idle worker
+SCHEDULE_INTERVAL = 60
+
+
+def task(func=None, *, name=None):
+    """
+    Register a function as a task, named `<app>.<function>` by default
+
+    Tasks receive the job kwargs, which must be JSON serializable, and their
+    return value is stored as the job result.
+    """
+
+    def register(func):
+        func.task_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        tasks[func.task_name] = func
+        return func
+
+    return register(func) if func else register
+
+
+def enqueue(
+    name, /, *, priority=0, dedup_key="", run_at=None, max_attempts=None, **kwargs
+):
+    """
+    Queue a job for a registered task
+
+    Args:
+        name (str): task name
+        priority (int): jobs with a higher priority run first
+        dedup_key (str): when a queued job has this key, it is returned instead
+            of queueing a new one
+        run_at (datetime): earliest start, now by default
+        max_attempts (int): runs before the job fails, JOB_MAX_ATTEMPTS by default
+        **kwargs: task arguments
+
+    Returns:
+        Job: the queued job
+    """
+    if name not in tasks:
+        raise ValueError(f"Unknown task {name!r}.")
+
+    job = Job(
+        name=name,
+        kwargs=kwargs,
+        priority=priority,
+        dedup_key=dedup_key,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    while True:
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            if not dedup_key:
+                raise
+            job.pk = None
+        try:
+            return Job.objects.get(dedup_key=dedup_key, status=Job.Status.QUEUED)
+        except Job.DoesNotExist:
+            # claimed by a worker in between, queue it again
+            continue
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{threading.get_native_id()}"
+
+
+def claim():
+    """Mark the next ready job as running, and return it (None when idle)."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = now
+        job.worker = worker_name()
+        job.progress = 0
+        job.progress_message = ""
+        job.save(
+            update_fields=[
+                "status",
+                "attempts",
+                "started_at",
+                "heartbeat_at",
+                "worker",
+                "progress",
+                "progress_message",
+            ]
+        )
+    return job
+
+
+def _claimed(job):
+    """The job row, while still running the attempt `job` claimed."""
+    return Job.objects.filter(
+        pk=job.pk,
+        status=Job.Status.RUNNING,
+        worker=job.worker,
+        attempts=job.attempts,
+    )
+
+
+def _save_outcome(job, fields):
+    """Save the outcome of a claimed job, unless it was queued again meanwhile."""
+    if not _claimed(job).update(**{field: getattr(job, field) for field in fields}):
+        logger.warning("Job %s was queued again during attempt %s", job, job.attempts)
+
+
+def report_progress(done, total, message=""):
+    """Record the progress of the running job, if any."""
+    job = current_job.get()
+    if job is None:
+        return
+    job.progress = min(100, round(100 * done / total)) if total else 0
+    job.progress_message = message[:255]
+    job.heartbeat_at = timezone.now()
+    _claimed(job).update(
+        progress=job.progress,
+        progress_message=job.progress_message,
+        heartbeat_at=job.heartbeat_at,
+    )
+
+
+def _heartbeat(job, stop):
+    """Refresh the heartbeat of a running job until `stop` is set."""
+    try:
+        while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                _claimed(job).update(heartbeat_at=timezone.now())
+            except DatabaseError:
+                logger.warning("Heartbeat of job %s failed", job, exc_info=True)
+    finally:
+        connection.close()
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt, doubling after each failure."""
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _requeue(job, error):
+    """Queue a failed job again, or fail it once out of attempts."""
+    job.last_error = error
+    job.finished_at = timezone.now()
+    job.status = Job.Status.FAILED
+    fields = ["status", "last_error", "finished_at", "run_at"]
+    if job.attempts < job.max_attempts:
+        job.status = Job.Status.QUEUED
+        job.run_at = job.finished_at + retry_delay(job.attempts)
+    try:
+        with transaction.atomic():
+            _save_outcome(job, fields)
+    except IntegrityError:
+        # an identical job was queued meanwhile, it replaces the retry
+        job.status = Job.Status.FAILED
+        _save_outcome(job, fields)
+
+
+def run(job):
+    """Run a claimed job and record its outcome."""
+    func = tasks.get(job.name)
+    token = current_job.set(job)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, stop), daemon=True)
+    heartbeat.start()
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {job.name!r}.")
+        result = func(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s failed (attempt %s)", job, job.attempts)
+        _requeue(job, traceback.format_exc())
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.result = result
+        job.progress = 100
+        job.finished_at = timezone.now()
+        _save_outcome(job, ["status", "result", "progress", "finished_at"])
+    finally:
+        stop.set()
+        heartbeat.join()
+        current_job.reset(token)
+    return job
+
+
+def requeue_stale():
+    """
+    Retry the running jobs whose heartbeat is older than JOB_TIMEOUT
+
+    Returns:
+        int: number of stale jobs
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    with transaction.atomic():
+        stale = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.Status.RUNNING, heartbeat_at__lt=deadline
+            )
+        )
+        for job in stale:
+            _requeue(job, f"No heartbeat from worker {job.worker} since {deadline}.")
+    return len(stale)
+
+
+def schedule_periodic():
+    """
+    Queue the next run of the JOB_SCHEDULE tasks without a queued or running job
+
+    A run starts its interval after the end of the previous one, or right away.
+
+    Returns:
+        list: the queued jobs
+    """
+    queued = []
+    for name, interval in settings.JOB_SCHEDULE.items():
+        jobs = Job.objects.filter(name=name, dedup_key=f"periodic:{name}")
+        if jobs.filter(status__in=[Job.Status.QUEUED, Job.Status.RUNNING]).exists():
+            continue
+        last = (
+            jobs.filter(finished_at__isnull=False)
+            .order_by("-finished_at")
+            .values_list("finished_at", flat=True)
+            .first()
+        )
+        run_at = last + timedelta(seconds=interval) if last else timezone.now()
+        queued.append(enqueue(name, dedup_key=f"periodic:{name}", run_at=run_at))
+    return queued
+
+
+def work(stop, burst=False):
+    """
+    Run jobs until `stop` is set, or the queue is empty in burst mode
+
+    Args:
+        stop (threading.Event): set to stop after the current job
+        burst (bool): return once no job is ready
+
+    Returns:
+        int: number of jobs run
+    """
+    count = 0
+    scheduled = None
+    while not stop.is_set():
+        job = claim()
+        if job is None:
+            requeue_stale()
+            if burst:
+                break
+            if scheduled is None or time.monotonic() - scheduled >= SCHEDULE_INTERVAL:
+                schedule_periodic()
+                scheduled = time.monotonic()
+            stop.wait(settings.JOB_POLL_INTERVAL)
+            continue
+        run(job)
+        count += 1
+    return count
@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.changes import advance_horizon
+from core.models import Change
+
+
+class Command(BaseCommand):
+    help = "Delete the change feed entries older than CHANGE_FEED_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHANGE_FEED_RETENTION_DAYS,
+            help="Days changes are kept (default: CHANGE_FEED_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of changes deleted per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches (default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = 0
+
+        while True:
+            with transaction.atomic():
+                # the log is append-only, the oldest changes come first in
+                # primary key order
+                rows = list(
+                    Change.objects.filter(created_at__lt=before)
+                    .order_by("pk")
+                    .values_list("txid", "pk")[: options["batch_size"]]
+                )
+                if not rows:
+                    break
+                advance_horizon(max(rows))
+                deleted += Change.objects.filter(
+                    pk__in=[pk for _, pk in rows]
+                ).delete()[0]
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} changes"))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from core.schema import generate, schema_path
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema of every API version to OPENAPI_SCHEMA_DIR"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error if a stored schema is missing or stale",
+        )
+
+    def handle(self, *args, **options):
+        stale = []
+        for version in api_settings.ALLOWED_VERSIONS:
+            path = schema_path(version)
+            schema = generate(version)
+            if path.exists() and path.read_bytes() == schema:
+                continue
+            stale.append(path)
+            if not options["check"]:
+                settings.OPENAPI_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(schema)
+                self.stdout.write(f"Wrote {path}")
+
+        if options["check"] and stale:
+            names = ", ".join(str(path) for path in stale)
+            raise CommandError(
+                f"Stale OpenAPI schema: {names}. Run manage.py openapi_schema."
+            )
+        if not stale:
+            self.stdout.write(self.style.SUCCESS("OpenAPI schema is up to date"))
@@ -0,0 +1,79 @@
+import signal
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import work
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes, each running --threads jobs (default: 1)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Jobs run concurrently per process (default: 1)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is ready instead of waiting for new ones",
+        )
+
+    def handle(self, *args, **options):
+        if options["processes"] > 1:
+            return self._spawn(options)
+
+        stop = threading.Event()
+        handlers = {
+            signum: signal.signal(signum, lambda *args: stop.set())
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                futures = [
+                    executor.submit(self._work, stop, options["burst"])
+                    for _ in range(options["threads"])
+                ]
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        count = sum(future.result() for future in futures)
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs"))
+
+    def _work(self, stop, burst):
+        try:
+            return work(stop, burst)
+        finally:
+            # each thread has its own connection
+            connections.close_all()
+
+    def _spawn(self, options):
+        """Run single process workers and wait for them."""
+        command = [sys.executable, sys.argv[0], "run_jobs"]
+        command += ["--threads", str(options["threads"])]
+        if options["burst"]:
+            command.append("--burst")
+        processes = [subprocess.Popen(command) for _ in range(options["processes"])]
+
+        def terminate(*args):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGTERM, terminate)
+        # Ctrl+C reaches the whole process group, the workers stop on their own
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in processes:
+            process.wait()
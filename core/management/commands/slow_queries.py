@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from core.queries import slow_queries, top_offenders
+
+
+class Command(BaseCommand):
+    help = "Report the slow queries captured in SLOW_QUERY_LOG, by total time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of queries reported (default: 10)",
+        )
+        parser.add_argument("--route", help="Only queries of this URL name")
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the latest EXPLAIN (ANALYZE, BUFFERS) sample of each query",
+        )
+
+    def handle(self, *args, **options):
+        entries = slow_queries()
+        if options["route"]:
+            entries = (entry for entry in entries if entry["route"] == options["route"])
+        offenders = top_offenders(entries, options["top"])
+        if not offenders:
+            self.stdout.write("No slow queries captured")
+            return
+
+        for offender in offenders:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{offender['fingerprint']}  {offender['count']} queries"
+                    f" ({offender['canceled']} cancelled)"
+                    f"  total {offender['total_ms']:.0f} ms"
+                    f"  mean {offender['mean_ms']:.0f} ms"
+                    f"  max {offender['max_ms']:.0f} ms"
+                    f"  routes {', '.join(offender['routes'])}"
+                )
+            )
+            self.stdout.write(offender["sql"])
+            if options["plans"] and offender["plan"]:
+                self.stdout.write(offender["plan"])
+            self.stdout.write("")
@@ -0,0 +1,112 @@
+"""
+Process metrics in the Prometheus text format, served by `core.views.metrics`.
+
+Metrics live in the process memory, so each worker exposes its own values.
+Collectors registered with `register_collector` produce samples at scrape time.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+
+_metrics = []
+_collectors = []
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in sorted(labels.items()))
+    return f"{{{pairs}}}"
+
+
+class Counter:
+    """Monotonic counter"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(key), value
+
+
+class Histogram:
+    """Cumulative histogram over fixed upper bounds"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = sorted(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # one slot per bound, plus the overflow slot, then the sum
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in series.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values, strict=False):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": bound}, cumulative
+            count = sum(values[:-1])
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, values[-1]
+            yield f"{self.name}_count", labels, count
+
+
+def register_collector(collector):
+    """
+    Register a scrape time collector
+
+    Args:
+        collector (callable): returns (name, kind, documentation, samples)
+            tuples, samples being (labels, value) pairs
+    """
+    _collectors.append(collector)
+    return collector
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
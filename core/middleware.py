@@ -0,0 +1,75 @@
+from django.db import OperationalError
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+
+from .queries import QUERY_CANCELED, route
+from .replicas import pin_to_primary, wrote
+from .throttling import throttle
+
+
+class PrimaryStickinessMiddleware:
+    """Pin users to the primary after a request writing to it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = wrote.set(False)
+        try:
+            response = self.get_response(request)
+            # DRF sets the user authenticated from the JWT on the request
+            if wrote.get() and hasattr(request, "user"):
+                pin_to_primary(request.user)
+            return response
+        finally:
+            wrote.reset(token)
+
+
+class QueryTimeoutMiddleware:
+    """Apply the statement timeout of the route to the queries of a request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = route.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            route.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route.set(request.resolver_match.view_name)
+
+    def process_exception(self, request, exception):
+        if (
+            isinstance(exception, OperationalError)
+            and getattr(exception.__cause__, "sqlstate", None) == QUERY_CANCELED
+        ):
+            return JsonResponse(
+                {"detail": "The request took too long and was cancelled."},
+                status=503,
+            )
+        return None
+
+
+class ThrottleMiddleware:
+    """Reject writes over the rate limits of their route before the view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        wait = throttle(request, request.resolver_match.view_name)
+        if not wait:
+            return None
+        return JsonResponse(
+            {"detail": f"Request was throttled. Expected available in {wait} seconds."},
+            status=429,
+            headers={"Retry-After": str(wait)},
+        )
@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-19 12:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Row trigger appending a change, in the transaction of the change.
+# Arguments: model label, primary key column, columns copied to the data.
+# Updates only touching `updated_at` are not changes.
+RECORD_CHANGE_SQL = """
+CREATE FUNCTION core_record_change() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    new_row jsonb := CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END;
+    old_row jsonb := CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END;
+    changed jsonb := coalesce(new_row, old_row);
+BEGIN
+    IF TG_OP = 'UPDATE' AND new_row - 'updated_at' = old_row - 'updated_at' THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO core_change (txid, model, object_id, action, data, created_at)
+    SELECT
+        pg_current_xact_id()::text::bigint,
+        TG_ARGV[0],
+        (changed ->> TG_ARGV[1])::bigint,
+        CASE TG_OP
+            WHEN 'INSERT' THEN 'create'
+            WHEN 'UPDATE' THEN 'update'
+            ELSE 'delete'
+        END,
+        coalesce(jsonb_object_agg(key, value), '{}'),
+        now()
+    FROM jsonb_each(changed)
+    WHERE key = ANY(TG_ARGV[2:TG_NARGS - 1]);
+    RETURN NULL;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('txid', models.BigIntegerField(help_text='ID of the writing transaction')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=6)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Change',
+                'verbose_name_plural': 'Changes',
+                'ordering': ['txid', 'id'],
+                'indexes': [models.Index(fields=['txid', 'id'], name='change_cursor_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            RECORD_CHANGE_SQL, 'DROP FUNCTION core_record_change()'
+        ),
+    ]
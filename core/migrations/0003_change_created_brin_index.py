@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-19 12:31
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+import core.db.operations
+
+
+class Migration(migrations.Migration):
+    # the change log is large, build the index without locking writes
+    atomic = False
+
+    dependencies = [
+        ('core', '0002_change'),
+    ]
+
+    operations = [
+        core.db.operations.AddIndexConcurrently(
+            model_name='change',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='change_created_brin_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_created_brin_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('txid', models.BigIntegerField()),
+                ('change_id', models.BigIntegerField()),
+                ('compacted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Change horizon',
+                'verbose_name_plural': 'Change horizon',
+            },
+        ),
+    ]
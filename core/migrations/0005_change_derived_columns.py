@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-19 16:02
+
+import importlib
+
+from django.db import migrations
+
+PREVIOUS_SQL = importlib.import_module(
+    'core.migrations.0002_change'
+).RECORD_CHANGE_SQL.replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION')
+
+# Arguments prefixed with '-' name derived columns (counters, histograms):
+# like `updated_at`, updates only touching them are not changes.
+RECORD_CHANGE_SQL = """
+CREATE OR REPLACE FUNCTION core_record_change() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    new_row jsonb := CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END;
+    old_row jsonb := CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END;
+    changed jsonb := coalesce(new_row, old_row);
+    derived text[] := ARRAY['updated_at'] || ARRAY(
+        SELECT substr(argument, 2) FROM unnest(TG_ARGV[2:TG_NARGS - 1]) AS argument
+        WHERE argument LIKE '-%'
+    );
+BEGIN
+    IF TG_OP = 'UPDATE' AND new_row - derived = old_row - derived THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO core_change (txid, model, object_id, action, data, created_at)
+    SELECT
+        pg_current_xact_id()::text::bigint,
+        TG_ARGV[0],
+        (changed ->> TG_ARGV[1])::bigint,
+        CASE TG_OP
+            WHEN 'INSERT' THEN 'create'
+            WHEN 'UPDATE' THEN 'update'
+            ELSE 'delete'
+        END,
+        coalesce(jsonb_object_agg(key, value), '{}'),
+        now()
+    FROM jsonb_each(changed)
+    WHERE key = ANY(TG_ARGV[2:TG_NARGS - 1]);
+    RETURN NULL;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_change_horizon'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECORD_CHANGE_SQL, PREVIOUS_SQL),
+    ]
@@ -0,0 +1,119 @@
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Background job run by `manage.py run_jobs` (see core.jobs)"""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100, help_text="Registered task name")
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    dedup_key = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text="At most one queued job has a given key",
+    )
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent done")
+    progress_message = models.CharField(max_length=255, blank=True, default="")
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=100, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            # serves the claim query, only over the queued jobs
+            models.Index(
+                fields=["-priority", "run_at"],
+                name="job_queued_idx",
+                condition=Q(status="queued"),
+            ),
+            models.Index(
+                fields=["heartbeat_at"],
+                name="job_running_idx",
+                condition=Q(status="running"),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                name="job_queued_dedup_key",
+                condition=Q(status="queued") & ~Q(dedup_key=""),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class Change(models.Model):
+    """
+    Append-only log entry of a tracked row change, written by database triggers
+    in the transaction of the change (see core.changes)
+    """
+
+    class Action(models.TextChoices):
+        CREATE = "create", "Create"
+        UPDATE = "update", "Update"
+        DELETE = "delete", "Delete"
+
+    txid = models.BigIntegerField(help_text="ID of the writing transaction")
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=Action.choices)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Change"
+        verbose_name_plural = "Changes"
+        ordering = ["txid", "id"]
+        indexes = [
+            # serves the feed, which pages in (txid, id) order
+            models.Index(fields=["txid", "id"], name="change_cursor_idx"),
+            # serves compact_changes; rows are appended in created_at order
+            BrinIndex(fields=["created_at"], name="change_created_brin_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} #{self.object_id}"
+
+
+class ChangeHorizon(models.Model):
+    """
+    Cursor of the last change deleted by compact_changes (a single row):
+    consumers behind it missed changes (see core.changes)
+    """
+
+    txid = models.BigIntegerField()
+    change_id = models.BigIntegerField()
+    compacted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Change horizon"
+        verbose_name_plural = "Change horizon"
+
+    def __str__(self):
+        return f"{self.txid}-{self.change_id}"
@@ -0,0 +1,213 @@
+"""
+Statement timeouts and slow query capture.
+
+Every query goes through `observe`, installed by the database backend. During
+a request, it first applies the statement timeout of the route (by URL name in
+STATEMENT_TIMEOUTS, else STATEMENT_TIMEOUT) to the connection when another one
+is in force, so a pathological request is cancelled by Postgres rather than
+holding a pooled connection for seconds.
+
+Queries slower than SLOW_QUERY_THRESHOLD milliseconds, and cancelled ones, are
+appended as JSON lines to a size-rotated file per process, SLOW_QUERY_LOG with
+the process ID before its suffix (rotating a file shared by processes would
+lose entries). Entries keep the SQL with its placeholders and a hash of the
+parameters, never their values; a SLOW_QUERY_EXPLAIN_RATE sample of the slow
+plain reads (no locking clause, no call of a system function that may act,
+like pg_notify or set_config) is run again under EXPLAIN (ANALYZE, BUFFERS).
+`manage.py slow_queries` reports the top offenders of every file.
+"""
+
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+import psycopg
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+# URL name of the current request, None outside requests
+route = contextvars.ContextVar("route", default=None)
+
+# SQLSTATE of statements cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+SET_TIMEOUT = "SELECT set_config('statement_timeout', %s, false)"
+
+# IN lists and VALUES rows of any length share a fingerprint
+_PLACEHOLDERS = re.compile(r"\(%s(?:, %s)*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:, \(\.\.\.\))+")
+
+# reads only: EXPLAIN ANALYZE runs the statement, and would take its row locks
+# or call its functions again
+_SELECT = re.compile(r"^\s*SELECT\b.*\bFROM\b", re.IGNORECASE | re.DOTALL)
+_NOT_PLAIN_READ = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+    r"|\b(?:pg_\w+|set_config|nextval|setval)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def statement_timeout(name):
+    """Statement timeout of a route in milliseconds, 0 for none."""
+    return settings.STATEMENT_TIMEOUTS.get(name, settings.STATEMENT_TIMEOUT)
+
+
+def plain_read(sql):
+    """Whether running `sql` again only reads."""
+    return bool(_SELECT.match(sql)) and not _NOT_PLAIN_READ.search(sql)
+
+
+def normalize(sql):
+    """SQL with placeholder lists collapsed, and its fingerprint."""
+    sql = _ROWS.sub("(...)", _PLACEHOLDERS.sub("(...)", sql))
+    return sql, hashlib.sha1(sql.encode()).hexdigest()[:12]
+
+
+def observe(execute, sql, params, many, context):
+    """Execute wrapper applying the route timeout and capturing slow queries"""
+    connection = context["connection"]
+    name = route.get()
+    if name is not None:
+        timeout = statement_timeout(name)
+        if connection.statement_timeout != timeout:
+            connection.connection.execute(SET_TIMEOUT, [str(timeout)])
+            connection.statement_timeout = timeout
+
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    except DatabaseError as error:
+        if getattr(error.__cause__, "sqlstate", None) == QUERY_CANCELED:
+            duration = (time.perf_counter() - start) * 1000
+            _capture(connection, sql, params, name, duration, canceled=True)
+        raise
+    duration = (time.perf_counter() - start) * 1000
+    if duration >= settings.SLOW_QUERY_THRESHOLD:
+        plan = None
+        if (
+            not many
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+            and plain_read(sql)
+        ):
+            plan = _explain(connection, sql, params)
+        _capture(connection, sql, params, name, duration, plan=plan)
+    return result
+
+
+def _explain(connection, sql, params):
+    """Plan of a read run again under EXPLAIN ANALYZE, rolled back after."""
+    try:
+        with connection.connection.transaction():
+            rows = connection.connection.execute(
+                f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params
+            ).fetchall()
+            raise psycopg.Rollback
+    except psycopg.Error:
+        return None
+    return "\n".join(row[0] for row in rows)
+
+
+def log_path(pid):
+    """Slow query log file of a process."""
+    path = Path(settings.SLOW_QUERY_LOG)
+    return path.with_name(f"{path.stem}.{pid}{path.suffix}")
+
+
+@functools.cache
+def _handler(path, max_bytes, backups):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def _capture(connection, sql, params, name, duration, canceled=False, plan=None):
+    if not settings.SLOW_QUERY_LOG:
+        return
+    sql, fingerprint = normalize(sql)
+    entry = {
+        "time": timezone.now().isoformat(),
+        "alias": connection.alias,
+        "route": name,
+        "duration_ms": round(duration, 1),
+        "canceled": canceled,
+        "fingerprint": fingerprint,
+        "params": hashlib.sha1(repr(params).encode()).hexdigest()[:12],
+        "sql": sql,
+        "plan": plan,
+    }
+    # keyed by process ID, forked processes open their own file
+    handler = _handler(
+        log_path(os.getpid()),
+        settings.SLOW_QUERY_LOG_MAX_BYTES,
+        settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+    handler.handle(logging.makeLogRecord({"msg": json.dumps(entry)}))
+
+
+def slow_queries():
+    """Captured slow queries of every process and rotated file, oldest first."""
+    path = Path(settings.SLOW_QUERY_LOG)
+    entries = []
+    for file in path.parent.glob(f"{path.stem}.*{path.suffix}*"):
+        with file.open(encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # line cut by a rotation or a crash
+                    continue
+    return sorted(entries, key=lambda entry: entry["time"])
+
+
+def top_offenders(entries, top):
+    """
+    Slow queries grouped by fingerprint, by total time
+
+    Args:
+        entries (iterable): captured slow queries
+        top (int): number of groups returned
+
+    Returns:
+        list: dicts with the fingerprint, SQL, count, cancelled count, total,
+            mean and max milliseconds, most frequent routes and latest plan
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(
+            entry["fingerprint"],
+            {
+                "fingerprint": entry["fingerprint"],
+                "sql": entry["sql"],
+                "count": 0,
+                "canceled": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "routes": Counter(),
+                "plan": None,
+            },
+        )
+        group["count"] += 1
+        group["canceled"] += entry["canceled"]
+        group["total_ms"] += entry["duration_ms"]
+        group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+        group["routes"][entry["route"] or "-"] += 1
+        group["plan"] = entry["plan"] or group["plan"]
+
+    offenders = sorted(groups.values(), key=lambda group: -group["total_ms"])[:top]
+    for group in offenders:
+        group["mean_ms"] = group["total_ms"] / group["count"]
+        group["routes"] = [name for name, _ in group["routes"].most_common(3)]
+    return offenders
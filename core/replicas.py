@@ -0,0 +1,120 @@
+"""
+Read replica selection.
+
+Catalogue reads opt in with `use_replica()`, the router sends the reads of the
+current context to the chosen replica and everything else to the primary.
+Replicas are checked at most every REPLICA_CHECK_INTERVAL seconds per process:
+an unreachable replica, or one replaying WAL more than REPLICA_MAX_LAG seconds
+behind the primary, is left out of the rotation until a later check passes.
+"""
+
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# alias serving the reads of the current request, None for the primary
+read_alias = contextvars.ContextVar("read_alias", default=None)
+# whether the current request wrote to the primary
+wrote = contextvars.ContextVar("wrote", default=False)
+
+# 0 when caught up (or not a standby), else seconds since the last replayed commit
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+"""
+
+
+class ReplicaPool:
+    """Healthy replicas among settings.DATABASE_REPLICAS"""
+
+    def __init__(self):
+        self._checked_at = {}
+        self._healthy = {}
+        self._lock = threading.Lock()
+
+    def lag(self, alias):
+        """Replication lag of a replica in seconds."""
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            return float(cursor.fetchone()[0])
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at.get(alias, -float("inf")) < (
+                settings.REPLICA_CHECK_INTERVAL
+            ):
+                return self._healthy[alias]
+            self._checked_at[alias] = now
+
+        try:
+            lag = self.lag(alias)
+        except DatabaseError:
+            logger.warning("Replica %s is unreachable", alias, exc_info=True)
+            healthy = False
+        else:
+            healthy = lag <= settings.REPLICA_MAX_LAG
+            if not healthy:
+                logger.warning("Replica %s lags %.1fs behind", alias, lag)
+        self._healthy[alias] = healthy
+        return healthy
+
+    def choose(self):
+        """Alias of a random healthy replica, None when none is available."""
+        healthy = [
+            alias for alias in settings.DATABASE_REPLICAS if self.is_healthy(alias)
+        ]
+        return random.choice(healthy) if healthy else None
+
+    def reset(self):
+        with self._lock:
+            self._checked_at.clear()
+            self._healthy.clear()
+
+
+replica_pool = ReplicaPool()
+
+
+def _pin_key(user_id):
+    return f"replicas:primary-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    """Serve the reads of a user who just wrote from the primary for a while."""
+    if user.is_authenticated and settings.REPLICA_STICKY_SECONDS:
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+            _pin_key(user.pk), True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and bool(
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].get(_pin_key(user.pk))
+    )
+
+
+@contextlib.contextmanager
+def use_replica(user=None):
+    """Route the reads of the block to a healthy replica, if any."""
+    alias = None
+    if settings.DATABASE_REPLICAS and not (user and is_pinned_to_primary(user)):
+        alias = replica_pool.choose()
+    token = read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        read_alias.reset(token)
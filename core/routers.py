@@ -0,0 +1,22 @@
+from .replicas import read_alias, wrote
+
+
+class ReplicaRouter:
+    """
+    Send reads inside `use_replica()` to the chosen replica
+
+    Every other query goes to the primary, and replicas never get migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
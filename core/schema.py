@@ -0,0 +1,137 @@
+"""
+OpenAPI schema generated ahead of time.
+
+`manage.py openapi_schema` writes the schema of every API version to
+OPENAPI_SCHEMA_DIR. The schema view serves these files from memory: each
+representation (version, YAML or JSON, gzip or not) is rendered once per
+process, with an ETag so clients revalidate without downloading it again.
+"""
+
+import gzip
+import hashlib
+import logging
+import re
+import threading
+
+import yaml
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_GET
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "yaml": "application/vnd.oai.openapi; charset=utf-8",
+    "json": "application/vnd.oai.openapi+json",
+}
+
+VERSION_PATTERN = re.compile(r"version\s*=\s*([\w.]+)")
+
+
+def schema_path(version):
+    return settings.OPENAPI_SCHEMA_DIR / f"v{version}.yaml"
+
+
+def generate(version):
+    """YAML schema of an API version, as `manage.py spectacular` renders it."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(api_version=version)
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+class StoredSchema:
+    """In-memory representations of the stored schema files"""
+
+    def __init__(self):
+        self._representations = {}
+        self._lock = threading.Lock()
+
+    def get(self, version, format, compressed):
+        """
+        Representation of the schema
+
+        Args:
+            version (str): API version
+            format (str): "yaml" or "json"
+            compressed (bool): gzip the body
+
+        Returns:
+            tuple: body (bytes) and ETag
+        """
+        key = (version, format, compressed)
+        if key not in self._representations:
+            with self._lock:
+                if key not in self._representations:
+                    self._representations[key] = self._render(*key)
+        return self._representations[key]
+
+    def _render(self, version, format, compressed):
+        path = schema_path(version)
+        if path.exists():
+            body = path.read_bytes()
+        else:
+            logger.warning("%s is missing, run manage.py openapi_schema", path)
+            body = generate(version)
+        if format == "json":
+            body = OpenApiJsonRenderer().render(yaml.safe_load(body))
+        if compressed:
+            # fixed mtime, so the compressed body and its ETag are stable
+            body = gzip.compress(body, mtime=0)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        return body, etag
+
+    def clear(self):
+        with self._lock:
+            self._representations.clear()
+
+
+stored_schema = StoredSchema()
+
+
+def negotiate(request):
+    """API version and format requested, the version being None if unknown."""
+    accept = request.headers.get("Accept", "")
+    version = request.GET.get("version")
+    if version is None:
+        match = VERSION_PATTERN.search(accept)
+        version = match.group(1) if match else api_settings.DEFAULT_VERSION
+    if version not in api_settings.ALLOWED_VERSIONS:
+        version = None
+
+    format = request.GET.get("format")
+    if format not in CONTENT_TYPES:
+        format = "json" if "json" in accept else "yaml"
+    return version, format
+
+
+@require_GET
+def schema(request):
+    """
+    OpenAPI3 schema of the API. Format can be selected via content negotiation.
+
+    - YAML: application/vnd.oai.openapi
+    - JSON: application/vnd.oai.openapi+json
+    """
+    version, format = negotiate(request)
+    if version is None:
+        return HttpResponse("Invalid version in Accept header.", status=406)
+
+    compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+    body, etag = stored_schema.get(version, format, compressed)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type=CONTENT_TYPES[format])
+        if compressed:
+            response["Content-Encoding"] = "gzip"
+        response["Content-Disposition"] = (
+            f'inline; filename="{spectacular_settings.TITLE} ({version}).{format}"'
+        )
+    response["ETag"] = etag
+    # cacheable, but revalidated on every use
+    response["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+    return response
@@ -0,0 +1,8 @@
+from django.core.management import call_command
+
+from .jobs import task
+
+
+@task
+def compact_changes(batch_size=1000):
+    call_command("compact_changes", batch_size=batch_size)
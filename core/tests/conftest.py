@@ -0,0 +1,47 @@
+import pytest
+from django.db import connections
+from rest_framework.test import APIClient
+
+from core.replicas import replica_pool
+from movies.models import Movie, Spectator
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+REPLICA = "replica_test"
+
+
+def pytest_configure(config):
+    # second connection to the test database, standing for a replica
+    default = connections.settings["default"]
+    connections.settings[REPLICA] = {
+        **default,
+        # unpooled, so no connection outlives the test session
+        "OPTIONS": {k: v for k, v in default["OPTIONS"].items() if k != "pool"},
+        "TEST": {**default["TEST"], "MIRROR": "default"},
+    }
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+    replica_pool.reset()
+    yield REPLICA
+    replica_pool.reset()
+
+
+@pytest.fixture
+def movie(db):
+    return Movie.objects.create(title="Replicated Movie", status="released")
+
+
+@pytest.fixture
+def spectator(db):
+    return Spectator.objects.create_user(
+        username="spectator",
+        email="spectator@test.com",
+        password="TestPass123!",
+    )
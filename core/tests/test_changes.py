@@ -0,0 +1,183 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from core.models import Change
+from movies.models import Author, Movie, MovieRating
+
+from .conftest import REPLICA
+
+
+@pytest.fixture
+def admin_api_client(api_client, admin_user):
+    api_client.force_authenticate(admin_user)
+    return api_client
+
+
+def read_feed(client, since="", limit=None):
+    params = {"since": since}
+    if limit:
+        params["limit"] = limit
+    response = client.get(reverse("changes"), params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def events(changes):
+    return [(change["model"], change["action"]) for change in changes]
+
+
+# the feed only shows committed transactions
+@pytest.mark.django_db(transaction=True, databases=["default", REPLICA])
+class TestChangeFeed:
+    """Tests for the change feed"""
+
+    def test_feed_lists_changes_in_commit_order(self, admin_api_client, spectator):
+        movie = Movie.objects.create(title="Logged")
+        author = Author.objects.create_user(username="logged", password="x")
+        movie.authors.add(author)
+        movie.title = "Renamed"
+        movie.save()
+        # only touches updated_at
+        movie.save()
+        author.first_name = "Ann"
+        author.save()
+        MovieRating.objects.create(spectator=spectator, movie=movie, score=7)
+        movie_id = movie.pk
+        movie.delete()
+
+        data = read_feed(admin_api_client)
+
+        assert events(data["changes"]) == [
+            ("movies.movie", "create"),
+            ("movies.author", "create"),
+            ("movies.movie_authors", "create"),
+            ("movies.movie", "update"),
+            ("movies.author", "update"),
+            ("movies.movierating", "create"),
+            ("movies.movie_authors", "delete"),
+            ("movies.movierating", "delete"),
+            ("movies.movie", "delete"),
+        ]
+        assert data["changes"][2]["data"] == {
+            "movie_id": movie_id,
+            "author_id": author.pk,
+        }
+        assert data["changes"][-1]["object_id"] == movie_id
+        assert data["has_more"] is False
+
+    def test_cursor_pages_through_the_feed(self, admin_api_client):
+        for title in "ABCDE":
+            Movie.objects.create(title=title)
+
+        seen, since = [], ""
+        while True:
+            data = read_feed(admin_api_client, since, limit=2)
+            seen += [change["object_id"] for change in data["changes"]]
+            since = data["next"]
+            if not data["has_more"]:
+                break
+
+        assert seen == list(Movie.objects.order_by("pk").values_list("pk", flat=True))
+        assert read_feed(admin_api_client, since) == {
+            "changes": [],
+            "next": since,
+            "has_more": False,
+        }
+
+    def test_feed_waits_for_transactions_in_progress(self, admin_api_client):
+        with transaction.atomic(using=REPLICA):
+            # an older transaction, still writing
+            Movie.objects.using(REPLICA).create(title="Slow")
+            Movie.objects.create(title="Fast")
+
+            data = read_feed(admin_api_client)
+            assert data["changes"] == []
+
+        data = read_feed(admin_api_client, data["next"])
+        titles = Movie.objects.in_bulk(
+            [change["object_id"] for change in data["changes"]]
+        )
+        assert [titles[change["object_id"]].title for change in data["changes"]] == [
+            "Slow",
+            "Fast",
+        ]
+
+    def test_rating_batch_is_logged(self, api_client, spectator, movie):
+        api_client.force_authenticate(spectator)
+
+        api_client.post(
+            reverse("rating-batch"),
+            {"ratings": [{"movie": movie.pk, "score": 6}]},
+            format="json",
+        )
+
+        rating = Change.objects.get(model="movies.movierating")
+        assert rating.action == Change.Action.CREATE
+        assert rating.data == {
+            "movie_id": movie.pk,
+            "spectator_id": spectator.pk,
+            "score": 6,
+        }
+
+    def test_derived_columns_are_not_changes(self, api_client, spectator, movie):
+        author = Author.objects.create_user(username="rated", password="x")
+        Change.objects.all().delete()
+        api_client.force_authenticate(spectator)
+
+        api_client.post(reverse("movie-rate", args=[movie.pk]), {"score": 7})
+        api_client.post(reverse("author-rate", args=[author.pk]), {"score": 5})
+        api_client.post(reverse("movie-favorite", args=[movie.pk]))
+        api_client.delete(reverse("movie-favorite", args=[movie.pk]))
+
+        # the score histograms and favorite counts changed, not the movie nor
+        # the author
+        assert events(Change.objects.values("model", "action")) == [
+            ("movies.movierating", "create"),
+            ("movies.authorrating", "create"),
+        ]
+
+    def test_feed_requires_staff(self, api_client, spectator):
+        api_client.force_authenticate(spectator)
+
+        response = api_client.get(reverse("changes"))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_feed_validation(self, admin_api_client):
+        response = admin_api_client.get(reverse("changes"), {"since": "nope"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = admin_api_client.get(reverse("changes"), {"limit": 100000})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_compact_changes(self, movie):
+        Change.objects.update(created_at=timezone.now() - timedelta(days=31))
+        Movie.objects.create(title="Recent")
+
+        call_command("compact_changes", days=30, batch_size=1)
+
+        assert list(Change.objects.values_list("object_id", flat=True)) == [
+            Movie.objects.get(title="Recent").pk
+        ]
+
+    def test_feed_gone_behind_compacted_changes(self, admin_api_client):
+        Movie.objects.create(title="Old")
+        since = read_feed(admin_api_client)["next"]
+        Movie.objects.create(title="Missed")
+        Change.objects.update(created_at=timezone.now() - timedelta(days=31))
+        Movie.objects.create(title="Recent")
+
+        call_command("compact_changes", days=30)
+
+        response = admin_api_client.get(reverse("changes"), {"since": since})
+        assert response.status_code == status.HTTP_410_GONE
+        # starting again from scratch
+        data = read_feed(admin_api_client)
+        assert [change["object_id"] for change in data["changes"]] == [
+            Movie.objects.get(title="Recent").pk
+        ]
+        assert read_feed(admin_api_client, data["next"])["changes"] == []
@@ -0,0 +1,74 @@
+import json
+
+import psycopg
+import pytest
+from django.db import connection
+
+from core.invalidation import InvalidationBus
+
+
+@pytest.fixture
+def bus(settings):
+    settings.INVALIDATION_BUS = True
+    settings.INVALIDATION_INTERVAL = 60
+    return InvalidationBus()
+
+
+@pytest.fixture
+def notifications(bus):
+    """Messages of the bus, read from another connection."""
+    params = connection.get_connection_params()
+    params.pop("cursor_factory")
+    params.pop("context")
+    with psycopg.connect(autocommit=True, **params) as listener:
+        listener.execute(f"LISTEN {bus.channel}")
+
+        def read():
+            return [
+                json.loads(notify.payload)
+                for notify in listener.notifies(timeout=1, stop_after=None)
+            ]
+
+        yield read
+
+
+# NOTIFY is sent on commit
+@pytest.mark.django_db(transaction=True)
+class TestInvalidationBus:
+    """Tests for the cross-process invalidation bus"""
+
+    def test_invalidations_are_applied_locally_and_coalesced(self, bus, notifications):
+        applied = []
+        bus.register("movies.movie", applied.append)
+
+        for pk in (1, 2, 2):
+            bus.invalidate("movies.movie", [pk])
+        bus.invalidate("movies.author", [3])
+        assert applied == [[1], [2], [2]]
+        assert notifications() == []
+
+        bus.flush()
+        messages = notifications()
+        assert {"sender": bus.sender, "label": "movies.movie", "pks": [1, 2]} in (
+            messages
+        )
+        assert len(messages) == 2
+
+    def test_too_many_keys_invalidate_the_model(self, bus, notifications, settings):
+        settings.INVALIDATION_MAX_KEYS = 2
+
+        bus.invalidate("movies.movie", [1, 2, 3])
+        bus.flush()
+
+        assert notifications() == [{"sender": bus.sender, "label": "movies.movie"}]
+
+    def test_messages_of_other_processes_are_applied(self, bus):
+        applied = []
+        bus.register("movies.movie", applied.append)
+
+        bus.receive(json.dumps({"sender": bus.sender, "label": "movies.movie"}))
+        bus.receive(
+            json.dumps({"sender": "other", "label": "movies.movie", "pks": [4]})
+        )
+
+        assert applied == [[4]]
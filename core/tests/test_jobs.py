@@ -0,0 +1,193 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import (
+    claim,
+    enqueue,
+    report_progress,
+    requeue_stale,
+    run,
+    schedule_periodic,
+    task,
+)
+from core.models import Job
+
+from .conftest import REPLICA
+
+calls = []
+
+
+@task
+def record(value, fail_times=0):
+    calls.append(value)
+    report_progress(1, 2, "halfway")
+    if calls.count(value) <= fail_times:
+        raise RuntimeError("boom")
+    return value
+
+
+@task
+def tick():
+    calls.append("tick")
+
+
+@task
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    """Tests for queueing and running jobs"""
+
+    def test_enqueue_deduplicates_queued_jobs(self):
+        first = enqueue("core.record", dedup_key="record", value=1)
+        second = enqueue("core.record", dedup_key="record", value=2)
+
+        assert second.pk == first.pk
+        assert Job.objects.count() == 1
+
+    def test_enqueue_rejects_unknown_tasks(self):
+        with pytest.raises(ValueError):
+            enqueue("core.missing")
+
+    def test_claim_by_priority_then_run_at(self):
+        later = enqueue("core.record", value="later", run_at=timezone.now())
+        urgent = enqueue("core.record", value="urgent", priority=5)
+        enqueue("core.record", value="future", run_at=timezone.now() + timedelta(1))
+
+        assert claim() == urgent
+        assert claim() == later
+        assert claim() is None
+
+    def test_run_records_result(self):
+        job = enqueue("core.record", value="done")
+
+        run(claim())
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.result == "done"
+        assert job.progress == 100
+        assert job.progress_message == "halfway"
+
+    def test_failed_job_retried_with_backoff(self, settings):
+        settings.JOB_RETRY_DELAY = 10
+        job = enqueue("core.record", max_attempts=2, value="flaky", fail_times=5)
+
+        run(claim())
+        job.refresh_from_db()
+        assert job.status == Job.Status.QUEUED
+        assert "boom" in job.last_error
+        assert job.run_at >= job.finished_at + timedelta(seconds=10)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run(claim())
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert calls == ["flaky", "flaky"]
+
+    def test_stale_running_job_requeued(self, settings):
+        job = enqueue("core.record", value="stale")
+        claim()
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT + 1)
+        )
+
+        assert requeue_stale() == 1
+        job.refresh_from_db()
+        assert job.status == Job.Status.QUEUED
+
+    def test_requeued_run_does_not_overwrite_retry(self, settings):
+        settings.JOB_RETRY_DELAY = 0
+        enqueue("core.record", value="slow")
+        first = claim()
+        # the first run looked dead and was queued again, then claimed
+        Job.objects.filter(pk=first.pk).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT + 1)
+        )
+        requeue_stale()
+        retry = claim()
+
+        run(first)
+
+        retry.refresh_from_db()
+        assert retry.status == Job.Status.RUNNING
+        assert retry.attempts == 2
+        run(retry)
+        retry.refresh_from_db()
+        assert retry.status == Job.Status.SUCCEEDED
+
+    def test_periodic_tasks_queued_after_previous_run(self, settings):
+        settings.JOB_SCHEDULE = {"core.tick": 600}
+        (job,) = schedule_periodic()
+        assert job.dedup_key == "periodic:core.tick"
+        # already queued
+        assert schedule_periodic() == []
+
+        run(claim())
+        job.refresh_from_db()
+        (following,) = schedule_periodic()
+        assert following.run_at == job.finished_at + timedelta(seconds=600)
+
+    def test_admin_enqueues_job(self, admin_client):
+        response = admin_client.post(
+            reverse("admin:core_job_add"),
+            {
+                "name": "core.record",
+                "kwargs": '{"value": "admin"}',
+                "priority": 1,
+                "dedup_key": "",
+                "run_at_0": timezone.now().strftime("%Y-%m-%d"),
+                "run_at_1": timezone.now().strftime("%H:%M:%S"),
+            },
+        )
+
+        assert response.status_code == 302
+        job = Job.objects.get()
+        assert job.kwargs == {"value": "admin"}
+        assert job.status == Job.Status.QUEUED
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", REPLICA])
+class TestJobWorker:
+    """Tests for the run_jobs worker"""
+
+    def test_claim_skips_locked_jobs(self):
+        locked = enqueue("core.record", value="locked", priority=1)
+        free = enqueue("core.record", value="free")
+
+        # another worker holds the first job
+        with transaction.atomic(using=REPLICA):
+            Job.objects.using(REPLICA).select_for_update().get(pk=locked.pk)
+            assert claim() == free
+
+    def test_heartbeat_while_task_runs(self, settings):
+        settings.JOB_HEARTBEAT_INTERVAL = 0.05
+        job = enqueue("core.sleep", seconds=0.3)
+
+        run(claim())
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.heartbeat_at > job.started_at
+
+    def test_run_jobs_burst(self):
+        for value in range(3):
+            enqueue("core.record", value=value)
+
+        call_command("run_jobs", burst=True, threads=2)
+
+        assert sorted(calls) == [0, 1, 2]
+        assert set(Job.objects.values_list("status", flat=True)) == {"succeeded"}
@@ -0,0 +1,43 @@
+from django.urls import reverse
+from rest_framework import status
+
+from core.metrics import Histogram, render
+
+
+class TestMetrics:
+    """Tests for the metrics endpoint"""
+
+    def test_histogram_rendering(self):
+        histogram = Histogram("test_wait_seconds", "Test wait.", buckets=(0.1, 1))
+        histogram.observe(0.05, alias="default")
+        histogram.observe(0.5, alias="default")
+        histogram.observe(5, alias="default")
+
+        output = render()
+        assert 'test_wait_seconds_bucket{alias="default",le="0.1"} 1' in output
+        assert 'test_wait_seconds_bucket{alias="default",le="1"} 2' in output
+        assert 'test_wait_seconds_bucket{alias="default",le="+Inf"} 3' in output
+        assert 'test_wait_seconds_count{alias="default"} 3' in output
+
+    def test_requires_token(self, api_client, settings):
+        settings.METRICS_TOKEN = "secret"
+
+        response = api_client.get(reverse("metrics"))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = api_client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_exposes_pool_statistics(self, api_client, settings, movie):
+        settings.METRICS_TOKEN = "secret"
+        api_client.get(reverse("movie-list"))
+
+        response = api_client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        output = response.content.decode()
+        assert 'db_pool_in_use{alias="default"}' in output
+        assert 'db_pool_size{alias="default"}' in output
+        assert "db_pool_wait_seconds_bucket" in output
@@ -0,0 +1,81 @@
+import pytest
+from django.apps import apps
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+
+from core.db.operations import AddIndexConcurrently, BackfillField
+from movies.models import Movie
+
+
+def run(operation, backwards=False):
+    from_state = ProjectState.from_apps(apps)
+    to_state = from_state.clone()
+    operation.state_forwards("movies", to_state)
+    with connection.schema_editor(atomic=False) as editor:
+        if backwards:
+            operation.database_backwards("movies", editor, to_state, from_state)
+        else:
+            operation.database_forwards("movies", editor, from_state, to_state)
+
+
+def index_state(name):
+    """True when the index is valid, False when invalid, None when missing."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indisvalid FROM pg_index "
+            "JOIN pg_class ON pg_class.oid = indexrelid WHERE relname = %s",
+            [name],
+        )
+        row = cursor.fetchone()
+    return row and row[0]
+
+
+# CONCURRENTLY and batches cannot run in the test transaction
+@pytest.mark.django_db(transaction=True)
+class TestMigrationOperations:
+    """Tests for the migration operations of large tables"""
+
+    def test_index_build_replaces_invalid_leftover(self):
+        operation = AddIndexConcurrently(
+            "movie", models.Index(fields=["tagline"], name="movie_tagline_test_idx")
+        )
+        run(operation)
+        # as left by an interrupted CREATE INDEX CONCURRENTLY
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE pg_index SET indisvalid = false FROM pg_class "
+                "WHERE pg_class.oid = indexrelid AND relname = %s",
+                ["movie_tagline_test_idx"],
+            )
+        assert index_state("movie_tagline_test_idx") is False
+
+        run(operation)
+        assert index_state("movie_tagline_test_idx") is True
+
+        run(operation, backwards=True)
+        assert index_state("movie_tagline_test_idx") is None
+
+    def test_index_skipped_without_extension(self):
+        run(
+            AddIndexConcurrently(
+                "movie",
+                models.Index(fields=["tagline"], name="movie_tagline_test_idx"),
+                extension="missing_extension",
+            )
+        )
+
+        assert index_state("movie_tagline_test_idx") is None
+
+    def test_backfill_fills_null_values_in_batches(self, settings):
+        settings.MIGRATION_BACKFILL_SLEEP = 0
+        movies = [
+            Movie.objects.create(title=str(count), vote_count=count)
+            for count in range(5)
+        ]
+        Movie.objects.filter(pk=movies[0].pk).update(popularity=100)
+
+        run(BackfillField("movie", "popularity", "vote_count * 2", batch_size=2))
+
+        assert list(
+            Movie.objects.order_by("pk").values_list("popularity", flat=True)
+        ) == [100, 2, 4, 6, 8]
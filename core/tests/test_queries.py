@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from core.queries import log_path, normalize, plain_read
+from movies.models import Movie
+from movies.views import MovieViewSet
+
+
+@pytest.fixture
+def slow_query_log(settings, tmp_path):
+    settings.SLOW_QUERY_LOG = str(tmp_path / "slow_queries.log")
+
+    def read():
+        with log_path(os.getpid()).open() as lines:
+            return [json.loads(line) for line in lines]
+
+    return read
+
+
+@pytest.mark.django_db
+class TestQueryTimeouts:
+    """Tests for per-route statement timeouts and slow query capture"""
+
+    def test_route_timeout_is_applied(self, api_client, settings):
+        settings.STATEMENT_TIMEOUTS = {"movie-list": 1234}
+
+        response = api_client.get(reverse("movie-list"))
+        assert response.status_code == status.HTTP_200_OK
+
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            assert cursor.fetchone()[0] == "1234ms"
+
+    def test_cancelled_query_is_captured(
+        self, api_client, monkeypatch, settings, slow_query_log
+    ):
+        settings.STATEMENT_TIMEOUT = 50
+
+        def slow_list(self, request):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(%s)", [1])
+
+        monkeypatch.setattr(MovieViewSet, "list", slow_list)
+
+        response = api_client.get(reverse("movie-list"))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        [entry] = slow_query_log()
+        assert entry["route"] == "movie-list"
+        assert entry["canceled"] is True
+        assert entry["sql"] == "SELECT pg_sleep(...)"
+
+    def test_slow_queries_are_reported_with_plans(
+        self, settings, slow_query_log, capsys
+    ):
+        settings.SLOW_QUERY_THRESHOLD = 0
+        settings.SLOW_QUERY_EXPLAIN_RATE = 1
+
+        for titles in (["A"], ["A", "B", "C"]):
+            Movie.objects.filter(title__in=titles).count()
+
+        entries = slow_query_log()
+        assert len(entries) == 2
+        assert entries[0]["fingerprint"] == entries[1]["fingerprint"]
+        assert entries[0]["params"] != entries[1]["params"]
+        assert "IN (...)" in entries[0]["sql"]
+        assert "Execution Time" in entries[0]["plan"]
+
+        call_command("slow_queries", "--plans")
+        output = capsys.readouterr().out
+        assert f"{entries[0]['fingerprint']}  2 queries (0 cancelled)" in output
+        assert entries[1]["plan"] in output
+
+    def test_only_plain_reads_are_explained(self):
+        assert plain_read('SELECT "a" FROM "t" WHERE "b" IN (%s, %s)')
+        assert not plain_read('SELECT "a" FROM "t" FOR UPDATE SKIP LOCKED')
+        assert not plain_read("SELECT pg_notify(%s, %s)")
+        assert not plain_read("SELECT set_config('statement_timeout', %s, false)")
+        assert not plain_read("SELECT movies_create_rating_partitions(now(), now())")
+        assert not plain_read('WITH "d" AS (DELETE FROM "t" RETURNING *) SELECT 1')
+
+    def test_placeholder_lists_share_a_fingerprint(self):
+        one = normalize('INSERT INTO "t" ("a", "b") VALUES (%s, %s)')
+        many = normalize('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)')
+
+        assert one == many
+        assert one[0] == 'INSERT INTO "t" ("a", "b") VALUES (...)'
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from core.checks import check_replica_pin_cache
+from core.replicas import replica_pool
+
+from .conftest import REPLICA
+
+# the replica connection only sees committed rows
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", REPLICA])
+
+
+def get_capturing(api_client, url, replica):
+    """Response to a GET and the queries it ran on (primary, replica)."""
+    with (
+        CaptureQueriesContext(connections["default"]) as primary_queries,
+        CaptureQueriesContext(connections[replica]) as replica_queries,
+    ):
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return response, primary_queries, replica_queries
+
+
+class TestReplicaRouting:
+    """Tests for the read replica routing of the catalogue"""
+
+    def test_catalogue_reads_use_replica(self, api_client, replica, movie):
+        response, primary, replica_queries = get_capturing(
+            api_client, reverse("movie-list"), replica
+        )
+
+        assert response.data[0]["title"] == movie.title
+        assert len(primary) == 0
+        assert len(replica_queries) > 0
+
+    def test_writer_sticks_to_primary(self, api_client, replica, movie, spectator):
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].clear()
+        api_client.force_authenticate(spectator)
+        response = api_client.post(
+            reverse("movie-rate", kwargs={"pk": movie.pk}), {"score": 8}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        _, primary, replica_queries = get_capturing(
+            api_client, reverse("movie-detail", kwargs={"pk": movie.pk}), replica
+        )
+        assert len(primary) > 0
+        assert len(replica_queries) == 0
+
+    def test_lagging_replica_leaves_rotation(self, api_client, replica, movie):
+        with mock.patch.object(replica_pool, "lag", return_value=60.0):
+            _, primary, replica_queries = get_capturing(
+                api_client, reverse("movie-list"), replica
+            )
+
+        assert len(primary) > 0
+        assert len(replica_queries) == 0
+
+    def test_unreachable_replica_leaves_rotation(self, api_client, replica, movie):
+        with mock.patch.object(replica_pool, "lag", side_effect=OperationalError):
+            _, primary, replica_queries = get_capturing(
+                api_client, reverse("movie-list"), replica
+            )
+
+        assert len(primary) > 0
+        assert len(replica_queries) == 0
+
+    def test_replica_lag_on_primary_is_zero(self, replica):
+        assert replica_pool.lag(replica) == 0
+
+    def test_deploy_check_warns_about_local_pin_cache(self, replica, settings):
+        assert [warning.id for warning in check_replica_pin_cache(None)] == [
+            "core.W002"
+        ]
+
+        settings.DATABASE_REPLICAS = []
+        assert check_replica_pin_cache(None) == []
@@ -0,0 +1,67 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+
+from core.schema import schema_path, stored_schema
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_DIR = tmp_path
+    stored_schema.clear()
+    yield tmp_path
+    stored_schema.clear()
+
+
+class TestSchemaView:
+    """Tests for the pre-generated schema endpoint"""
+
+    def test_serves_stored_schema(self, api_client):
+        response = api_client.get(reverse("schema"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("application/vnd.oai.openapi")
+        assert response.content == schema_path("1").read_bytes()
+
+    def test_not_modified(self, api_client):
+        etag = api_client.get(reverse("schema"))["ETag"]
+
+        response = api_client.get(reverse("schema"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+    def test_gzip_and_json(self, api_client):
+        response = api_client.get(
+            reverse("schema"),
+            HTTP_ACCEPT="application/vnd.oai.openapi+json; version=2",
+            HTTP_ACCEPT_ENCODING="gzip, br",
+        )
+
+        assert response["Content-Encoding"] == "gzip"
+        schema = json.loads(gzip.decompress(response.content))
+        assert schema["info"]["version"] == "1.0.0 (2)"
+
+    def test_invalid_version(self, api_client):
+        response = api_client.get(
+            reverse("schema"), HTTP_ACCEPT="application/json; version=9"
+        )
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+
+class TestOpenApiSchemaCommand:
+    """Tests for the openapi_schema command"""
+
+    def test_stored_schema_is_current(self):
+        call_command("openapi_schema", check=True)
+
+    def test_check_fails_on_stale_schema(self, schema_dir):
+        call_command("openapi_schema")
+        schema_path("1").write_text("openapi: 3.0.3\n")
+
+        with pytest.raises(CommandError, match="Stale OpenAPI schema"):
+            call_command("openapi_schema", check=True)
@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+
+from config.settings import route_rate
+from core import throttling
+from core.throttling import SlidingWindowLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch, settings):
+    """Fresh counters on a clean default cache, synchronized on every request."""
+    settings.THROTTLE_CACHE_ALIAS = "default"
+    settings.THROTTLE_SYNC_INTERVAL = 0
+    caches["default"].clear()
+    limiter = SlidingWindowLimiter()
+    monkeypatch.setattr(throttling, "limiter", limiter)
+    return limiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable time of the limiter, starting at a window boundary."""
+    now = [1_000_020.0]
+    monkeypatch.setattr(throttling.time, "time", lambda: now[0])
+    return now
+
+
+class TestSlidingWindowLimiter:
+    """Tests for the sliding window counters"""
+
+    def test_previous_window_weighs_in_as_it_slides(self, limiter, clock):
+        assert [limiter.hit("client", 3, 60) for _ in range(3)] == [0, 0, 0]
+        assert limiter.hit("client", 3, 60) == 60
+
+        # the 3 previous requests weighted 3/4 leave room for one
+        clock[0] += 75
+        assert [limiter.hit("client", 3, 60) for _ in range(2)] == [0, 5]
+        # weighted 1/4, for two more
+        clock[0] += 30
+        assert [limiter.hit("client", 3, 60) for _ in range(3)] == [0, 0, 15]
+
+    def test_counts_shared_through_cache(self, limiter, clock):
+        other = SlidingWindowLimiter()
+        assert [limiter.hit("client", 3, 60) for _ in range(2)] == [0, 0]
+        assert [other.hit("client", 3, 60) for _ in range(2)] == [0, 60]
+        assert limiter.hit("client", 3, 60) > 0
+
+
+class TestRouteRates:
+    """Tests for the parsing of the rate settings"""
+
+    def test_rate_parsed_by_period(self):
+        assert route_rate(" movie-rate = 30/min") == ("movie-rate", (30, 60))
+
+    @pytest.mark.parametrize("item", ["movie-rate=0/m", "movie-rate=3/w"])
+    def test_invalid_rate_rejected(self, item):
+        with pytest.raises(ValueError, match="Invalid rate"):
+            route_rate(item)
+
+
+@pytest.mark.django_db
+class TestThrottleMiddleware:
+    """Tests for the rate limits of routes"""
+
+    def test_ip_limit_rejects_before_any_query(
+        self, api_client, limiter, settings, django_assert_num_queries
+    ):
+        settings.THROTTLE_IP_RATES = {"token-obtain": (2, 60)}
+        url = reverse("token-obtain")
+        credentials = {"username": "nobody", "password": "wrong"}
+        for _ in range(2):
+            response = api_client.post(url, credentials, format="json")
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        with django_assert_num_queries(0):
+            response = api_client.post(url, credentials, format="json")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) > 0
+        response = api_client.post(
+            url, credentials, format="json", REMOTE_ADDR="10.0.0.2"
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_user_limit_keyed_by_token(
+        self, api_client, movie, spectator, limiter, settings
+    ):
+        settings.THROTTLE_IP_RATES = {}
+        settings.THROTTLE_USER_RATES = {"movie-rate": (1, 60)}
+        response = api_client.post(
+            reverse("token-obtain"),
+            {"username": spectator.username, "password": "TestPass123!"},
+            format="json",
+        )
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        url = reverse("movie-rate", args=[movie.pk])
+
+        response = api_client.post(url, {"score": 7}, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        response = api_client.post(url, {"score": 8}, format="json")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        # safe methods are not limited
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+        # requests without a valid token are left to authentication
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = api_client.post(url, {"score": 8}, format="json")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,214 @@
+"""
+Sliding window rate limits of write and authentication routes.
+
+`ThrottleMiddleware` checks the limits of the route (by URL name) before the
+view runs, hence before authentication or any query: THROTTLE_IP_RATES per
+client IP, and THROTTLE_USER_RATES per user of a valid JWT, read from the
+token without resolving the user.
+
+Each limit is a sliding window counter: the requests of the current fixed
+window, plus those of the previous one weighted by how much of it the sliding
+window still covers, so a key costs a few numbers whatever its rate. Counters
+live in the process; every THROTTLE_SYNC_INTERVAL seconds a key adds its new
+requests to the THROTTLE_CACHE_ALIAS cache and reads back the totals of every
+process, so the limits hold across processes with a shared cache (Redis,
+Memcached) at one cache round trip per key and interval.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+# seconds between sweeps of the counters of idle keys
+SWEEP_INTERVAL = 60
+
+
+class Window:
+    """Counters of a key over its current and previous windows"""
+
+    __slots__ = ("start", "current", "previous", "pending", "synced", "syncing")
+
+    def __init__(self, start):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+        # requests of this process not added to the shared counter yet
+        self.pending = 0
+        self.synced = 0.0
+        self.syncing = False
+
+
+class SlidingWindowLimiter:
+    """In-process sliding window counters, synchronized through a cache"""
+
+    def __init__(self):
+        # (key, period) -> Window
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._swept = time.time()
+
+    def hit(self, key, limit, period):
+        """
+        Count a request of `key` unless it is over the limit
+
+        Args:
+            key (str): throttled client, e.g. route and IP
+            limit (int): requests allowed per sliding window
+            period (int): seconds of the window
+
+        Returns:
+            int: seconds before a request is allowed again, 0 when it is allowed
+        """
+        now = time.time()
+        start = now - now % period
+        with self._lock:
+            self._sweep(now)
+            window = self._windows.get((key, period))
+            if window is None:
+                window = self._windows[key, period] = Window(start)
+            flush = None
+            if window.start < start:
+                if window.pending:
+                    flush = (window.start, window.pending)
+                window.previous = (
+                    window.current if window.start == start - period else 0
+                )
+                window.start, window.current, window.pending = start, 0, 0
+            sync = (
+                not window.syncing
+                and now - window.synced >= settings.THROTTLE_SYNC_INTERVAL
+            )
+            if sync:
+                # the request is counted ahead, so the totals read back are
+                # compared with the other processes' requests included
+                window.syncing = True
+                window.current += 1
+                pending, window.pending = window.pending + 1, 0
+
+        if flush:
+            self._add(key, *flush, period)
+        if sync:
+            self._sync(key, window, start, pending, period, now)
+
+        with self._lock:
+            # share of the previous window still covered by the sliding one
+            weight = 1 - (now - start) / period
+            if window.previous * weight + window.current - int(sync) >= limit:
+                if sync:
+                    # taken back from the shared counter at the next sync
+                    window.current -= 1
+                    window.pending -= 1
+                return _wait(window, limit, period, now)
+            if not sync:
+                window.current += 1
+                window.pending += 1
+            return 0
+
+    def _sync(self, key, window, start, pending, period, now):
+        """Add the new requests to the shared counters and read their totals."""
+        total = self._add(key, start, pending, period)
+        previous = caches[settings.THROTTLE_CACHE_ALIAS].get(
+            _cache_key(key, start - period)
+        )
+        with self._lock:
+            window.syncing = False
+            window.synced = now
+            if window.start == start:
+                window.current = max(window.current, total + window.pending)
+                window.previous = max(window.previous, previous or 0)
+
+    def _add(self, key, start, count, period):
+        """Add requests to the shared counter of a window, returns its total."""
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        cache_key = _cache_key(key, start)
+        # read while the next window is current, then expire
+        timeout = math.ceil(start + 2 * period - time.time())
+        if cache.add(cache_key, count, timeout):
+            return count
+        try:
+            return cache.incr(cache_key, count)
+        except ValueError:
+            # expired in between
+            cache.set(cache_key, count, timeout)
+            return count
+
+    def _sweep(self, now):
+        """Drop the counters of keys idle for two windows, under the lock."""
+        if now - self._swept < SWEEP_INTERVAL:
+            return
+        self._swept = now
+        self._windows = {
+            (key, period): window
+            for (key, period), window in self._windows.items()
+            if window.start + 2 * period > now
+        }
+
+    def clear(self):
+        """Forget the counters of this process."""
+        with self._lock:
+            self._windows.clear()
+
+
+def _cache_key(key, start):
+    return f"throttle:{key}:{int(start)}"
+
+
+def _wait(window, limit, period, now):
+    """Seconds until the sliding window falls below the limit."""
+    if window.current >= limit or not window.previous:
+        # the next window starts with this one as its previous
+        wait = window.start + period * (2 - limit / window.current)
+    else:
+        wait = window.start + period * (1 - (limit - window.current) / window.previous)
+    wait -= now
+    return max(1, math.ceil(wait))
+
+
+limiter = SlidingWindowLimiter()
+
+
+def client_ip(request):
+    """Client IP, from X-Forwarded-For behind REST_FRAMEWORK NUM_PROXIES proxies."""
+    return BaseThrottle().get_ident(request)
+
+
+def token_user(request):
+    """User ID of the valid JWT of a request, without a query, else None."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+def throttle(request, name):
+    """
+    Count a request of a route against its limits
+
+    Args:
+        request (HttpRequest): request, before authentication
+        name (str): URL name of the route
+
+    Returns:
+        int: seconds before the client may retry, 0 when the request is allowed
+    """
+    waits = []
+    if rate := settings.THROTTLE_IP_RATES.get(name):
+        waits.append(limiter.hit(f"{name}:ip:{client_ip(request)}", *rate))
+    if (rate := settings.THROTTLE_USER_RATES.get(name)) and (
+        user_id := token_user(request)
+    ) is not None:
+        waits.append(limiter.hit(f"{name}:user:{user_id}", *rate))
+    return max(waits, default=0)
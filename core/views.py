@@ -0,0 +1,34 @@
+import hmac
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import metrics as metrics_registry
+
+
+def _authorized(request):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        provided = request.headers.get("Authorization", "")
+        return hmac.compare_digest(provided.encode(), expected.encode())
+    return request.user.is_staff
+
+
+@require_GET
+def metrics(request):
+    """Process metrics, for METRICS_TOKEN bearers or staff users"""
+    if not _authorized(request):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4"
+    )
+
+
+@require_GET
+def ready(request):
+    """Readiness probe, failing until manage.py warm_caches wrote WARMUP_READY_FILE"""
+    if settings.WARMUP_READY_FILE and not Path(settings.WARMUP_READY_FILE).exists():
+        return JsonResponse({"detail": "Warming up caches."}, status=503)
+    return JsonResponse({"detail": "Ready."})
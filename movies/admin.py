@@ -1,29 +1,90 @@
 from django.contrib import admin
 from django.contrib.admin import SimpleListFilter
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Exists, OuterRef, Q
+from django.forms.models import BaseInlineFormSet
 
 from .models import Author, AuthorRating, Movie, MovieRating, Spectator
+from .pagination import EstimatedCountPaginator
+from .queries import author_names_subquery, count_subquery
 
 
-class MovieRatingInline(admin.TabularInline):
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset holding one page of the related objects"""
+
+    per_page = 20
+    query_params = None
+
+    @property
+    def page_param(self):
+        return f"{self.prefix}-page"
+
+    @property
+    def page(self):
+        page = (self.query_params or {}).get(self.page_param, "1")
+        return max(int(page), 1) if page.isdigit() else 1
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_objects"):
+            start = (self.page - 1) * self.per_page
+            # one extra row tells whether there is a next page without a COUNT
+            objects = list(super().get_queryset()[start : start + self.per_page + 1])
+            self.has_next = len(objects) > self.per_page
+            self._page_objects = objects[: self.per_page]
+        return self._page_objects
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    def _page_query(self, page):
+        params = self.query_params.copy()
+        params[self.page_param] = page
+        return params.urlencode()
+
+    def previous_page_query(self):
+        return self._page_query(self.page - 1)
+
+    def next_page_query(self):
+        return self._page_query(self.page + 1)
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """Tabular inline rendering `per_page` related objects per page"""
+
+    formset = PaginatedInlineFormSet
+    template = "admin/movies/paginated_tabular.html"
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.query_params = request.GET
+        return formset
+
+
+class MovieRatingInline(PaginatedTabularInline):
     model = MovieRating
     extra = 0
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["spectator", "movie"]
 
 
-class AuthorRatingInline(admin.TabularInline):
+class AuthorRatingInline(PaginatedTabularInline):
     model = AuthorRating
     extra = 0
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["spectator", "author"]
 
 
-class AuthorMoviesInline(admin.TabularInline):
+class AuthorMoviesInline(PaginatedTabularInline):
     """Inline to display movies linked to an author"""
 
     model = Movie.authors.through
     extra = 0
     verbose_name = "Movie"
     verbose_name_plural = "Movies"
+    autocomplete_fields = ["movie"]
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("movie")
@@ -36,11 +97,30 @@ class MovieAuthorsInline(admin.TabularInline):
     extra = 0
     verbose_name = "Author"
     verbose_name_plural = "Authors"
+    autocomplete_fields = ["author"]
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("author")
 
 
+class PrefixAutocompleteMixin:
+    """
+    Autocomplete widgets search `autocomplete_search_fields` by prefix, which
+    the uppercase pattern indexes serve, instead of the `search_fields`.
+    """
+
+    autocomplete_search_fields = []
+
+    def get_search_results(self, request, queryset, search_term):
+        match = request.resolver_match
+        if match and match.url_name == "autocomplete" and search_term:
+            query = Q()
+            for field in self.autocomplete_search_fields:
+                query |= Q(**{f"{field}__istartswith": search_term})
+            return queryset.filter(query), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 class HasMoviesFilter(SimpleListFilter):
     """Filter authors with at least one movie"""
 
@@ -54,15 +134,16 @@ class HasMoviesFilter(SimpleListFilter):
         ]
 
     def queryset(self, request, queryset):
+        has_movies = Exists(Movie.authors.through.objects.filter(author=OuterRef("pk")))
         if self.value() == "yes":
-            return queryset.filter(movies__isnull=False).distinct()
+            return queryset.filter(has_movies)
         if self.value() == "no":
-            return queryset.filter(movies__isnull=True)
+            return queryset.filter(~has_movies)
         return queryset
 
 
 @admin.register(Author)
-class AuthorAdmin(UserAdmin):
+class AuthorAdmin(PrefixAutocompleteMixin, UserAdmin):
     list_display = [
         "username",
         "get_full_name",
@@ -74,7 +155,10 @@ class AuthorAdmin(UserAdmin):
     ]
     list_filter = [HasMoviesFilter]
     search_fields = ["username", "first_name", "last_name", "email", "biography"]
+    autocomplete_search_fields = ["username", "last_name"]
     inlines = [AuthorMoviesInline, AuthorRatingInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = UserAdmin.fieldsets + (
         (
@@ -89,32 +173,48 @@ class AuthorAdmin(UserAdmin):
         ),
     )
 
-    @admin.display(description="Movies")
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                movie_count=count_subquery(
+                    Movie.authors.through.objects.filter(author=OuterRef("pk")),
+                    "author",
+                )
+            )
+        )
+
+    @admin.display(description="Movies", ordering="movie_count")
     def movie_count(self, obj):
-        return obj.movies.count()
+        return obj.movie_count
 
 
-class FavoriteMoviesInline(admin.TabularInline):
+class FavoriteMoviesInline(PaginatedTabularInline):
     """Favorite movies of a spectator"""
 
     model = Spectator.favorite_movies.through
     extra = 0
     verbose_name = "Favorite Movie"
     verbose_name_plural = "Favorite Movies"
+    autocomplete_fields = ["movie"]
 
 
 @admin.register(Spectator)
-class SpectatorAdmin(UserAdmin):
+class SpectatorAdmin(PrefixAutocompleteMixin, UserAdmin):
     list_display = ["username", "email", "date_of_birth", "has_avatar"]
     list_filter = ["date_of_birth", "is_active"]
     search_fields = ["username", "email", "bio"]
+    autocomplete_search_fields = ["username"]
     inlines = [FavoriteMoviesInline, MovieRatingInline, AuthorRatingInline]
+    # avatars are uploaded through /api/auth/avatar/, which makes thumbnails
+    readonly_fields = ["avatar"]
 
     fieldsets = UserAdmin.fieldsets + (
         ("Spectator Profile", {"fields": ["bio", "avatar", "date_of_birth"]}),
     )
     add_fieldsets = UserAdmin.add_fieldsets + (
-        ("Spectator Profile", {"fields": ["bio", "avatar", "date_of_birth"]}),
+        ("Spectator Profile", {"fields": ["bio", "date_of_birth"]}),
     )
 
     @admin.display(boolean=True, description="Avatar")
@@ -123,7 +223,7 @@ class SpectatorAdmin(UserAdmin):
 
 
 @admin.register(Movie)
-class MovieAdmin(admin.ModelAdmin):
+class MovieAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = [
         "title",
         "release_date",
@@ -132,13 +232,16 @@ class MovieAdmin(admin.ModelAdmin):
         "vote_average",
         "popularity",
         "get_authors",
+        "author_count",
         "source",
     ]
     list_filter = ["status", "evaluation"]
     search_fields = ["title", "overview", "tagline"]
-    filter_horizontal = ["authors"]
+    autocomplete_search_fields = ["title"]
     date_hierarchy = "release_date"
     inlines = [MovieAuthorsInline, MovieRatingInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = [
         ("Basic Info", {"fields": ["title", "tagline", "overview"]}),
@@ -150,7 +253,24 @@ class MovieAdmin(admin.ModelAdmin):
 
     readonly_fields = ["created_at", "updated_at"]
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                author_names=author_names_subquery(limit=3),
+                author_count=count_subquery(
+                    Movie.authors.through.objects.filter(movie=OuterRef("pk")),
+                    "movie",
+                ),
+            )
+        )
+
     @admin.display(description="Authors")
     def get_authors(self, obj):
         """overview of authors linked to the movie (max 3)"""
-        return ", ".join([str(author) for author in obj.authors.all()[:3]])
+        return ", ".join(obj.author_names)
+
+    @admin.display(description="Nb authors", ordering="author_count")
+    def author_count(self, obj):
+        return obj.author_count
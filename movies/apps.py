@@ -1,5 +1,34 @@
+import logging
+
 from django.apps import AppConfig
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import post_migrate
+
+logger = logging.getLogger(__name__)
+
+
+def create_rating_partitions(sender, using, **kwargs):
+    """Create the rating partitions ahead, once movies are migrated far enough."""
+    from .partitions import create_partitions
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT to_regproc('movies_create_rating_partitions') IS NOT NULL"
+        )
+        if not cursor.fetchone()[0]:
+            return
+    try:
+        with transaction.atomic(using=using):
+            create_partitions(using=using)
+    except DatabaseError:
+        # the daily job tries again, the migration itself succeeded
+        logger.exception("Could not create the rating partitions")
 
 
 class MoviesConfig(AppConfig):
     name = "movies"
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+
+        post_migrate.connect(create_rating_partitions, sender=self)
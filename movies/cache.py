@@ -0,0 +1,271 @@
+"""
+Cache of serialized movie and author representations.
+
+Each object has a generation token. Entries are stored under the token and the
+representation variant (API version, fields, expand), so replacing the token
+invalidates every variant of an object at once. An object without a token is
+never read from the cache: the token is only created when an entry is written.
+Each model also has a generation token, replaced to invalidate all its objects.
+
+Entries outlive their RESPONSE_CACHE_TIMEOUT by RESPONSE_CACHE_STALE_TIMEOUT
+seconds. When an entry is missing or expired, `get_or_build` lets a single
+request rebuild it (single flight): the first one takes a short lock, in
+process and in the shared cache, and the others serve the expired entry
+meanwhile (stale-while-revalidate), or wait for the rebuilt one when there is
+none, so a popular object going cold is queried once rather than by every
+concurrent request.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+# seconds between two reads of entries rebuilt by another process
+POLL_INTERVAL = 0.02
+
+
+class ResponseCache:
+    """Per-object representation cache on the RESPONSE_CACHE_ALIAS cache"""
+
+    key_prefix = "response"
+
+    def __init__(self):
+        # lock key -> set once the rebuild of this process is over
+        self._rebuilds = {}
+        self._rebuilds_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(settings.RESPONSE_CACHE_ALIAS)
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    def variant(self, *parts):
+        """Short key for the representation variant described by `parts`."""
+        return hashlib.md5(repr(parts).encode()).hexdigest()[:12]
+
+    def _label_generation_key(self, label):
+        return f"{self.key_prefix}:{label}:generation"
+
+    def _generation_key(self, label, pk):
+        return f"{self.key_prefix}:{label}:{pk}:generation"
+
+    def _entry_key(self, label, pk, generation, variant):
+        return f"{self.key_prefix}:{label}:{pk}:{generation}:{variant}"
+
+    def _lock_key(self, label, pk, variant):
+        return f"{self.key_prefix}:{label}:{pk}:{variant}:lock"
+
+    def _generations(self, label, pks):
+        """Generation of each cached object, combined with the model generation."""
+        label_key = self._label_generation_key(label)
+        generation_keys = {self._generation_key(label, pk): pk for pk in pks}
+        generations = self.cache.get_many([label_key, *generation_keys])
+        label_generation = generations.pop(label_key, None)
+        if label_generation is None:
+            return {}
+        return {
+            generation_keys[key]: f"{label_generation}.{generation}"
+            for key, generation in generations.items()
+        }
+
+    def _entries(self, label, pks, variant):
+        """Cached entries of objects: primary key -> (expiry time, data)."""
+        entry_keys = {
+            self._entry_key(label, pk, generation, variant): pk
+            for pk, generation in self._generations(label, pks).items()
+        }
+        entries = self.cache.get_many(list(entry_keys))
+        return {entry_keys[key]: entry for key, entry in entries.items()}
+
+    def get_many(self, label, pks, variant):
+        """
+        Cached representations of objects
+
+        Args:
+            label (str): model label
+            pks (list): object primary keys
+            variant (str): representation variant
+
+        Returns:
+            dict: primary key -> representation, for unexpired entries only
+        """
+        if not self.enabled or not pks:
+            return {}
+
+        now = time.time()
+        return {
+            pk: data
+            for pk, (expires, data) in self._entries(label, pks, variant).items()
+            if expires > now
+        }
+
+    def _write_generations(self, label, pks):
+        """Generations to store entries of objects under, created when missing."""
+        self.cache.add(self._label_generation_key(label), uuid.uuid4().hex, None)
+        for pk in pks:
+            self.cache.add(self._generation_key(label, pk), uuid.uuid4().hex, None)
+        return self._generations(label, pks)
+
+    def set_many(self, label, representations, variant, generations=None):
+        """
+        Store representations (primary key -> data) of objects
+
+        Args:
+            label (str): model label
+            representations (dict): primary key -> data
+            variant (str): representation variant
+            generations (dict): generations of the objects read before their
+                representations were built, so that entries built before an
+                invalidation are stored under the replaced generation and never
+                read; the current ones when None
+        """
+        if not self.enabled or not representations:
+            return
+
+        if generations is None:
+            generations = self._write_generations(label, list(representations))
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        expires = time.time() + timeout
+        self.cache.set_many(
+            {
+                self._entry_key(label, pk, generations[pk], variant): (
+                    expires,
+                    data,
+                )
+                for pk, data in representations.items()
+                if pk in generations
+            },
+            timeout + settings.RESPONSE_CACHE_STALE_TIMEOUT,
+        )
+
+    def get_or_build(self, label, pks, variant, build):
+        """
+        Representations of objects, rebuilding missing and expired ones once
+
+        Args:
+            label (str): model label
+            pks (list): object primary keys
+            variant (str): representation variant
+            build (callable): called with primary keys, returns their
+                representations (primary key -> data), leaving unknown ones out
+
+        Returns:
+            dict: primary key -> representation
+        """
+        if not self.enabled:
+            return build(pks)
+        if not pks:
+            return {}
+
+        now = time.time()
+        representations, stale, missing = {}, {}, []
+        for pk, (expires, data) in self._entries(label, pks, variant).items():
+            if expires > now:
+                representations[pk] = data
+            else:
+                stale[pk] = data
+
+        claimed = []
+        for pk in pks:
+            if pk in representations:
+                continue
+            if self._claim(label, pk, variant):
+                claimed.append(pk)
+            elif pk in stale:
+                # being rebuilt by another request
+                representations[pk] = stale[pk]
+            else:
+                missing.append(pk)
+
+        if claimed:
+            try:
+                generations = self._write_generations(label, claimed)
+                fresh = build(claimed)
+                self.set_many(label, fresh, variant, generations)
+            finally:
+                self._release(label, claimed, variant)
+            representations.update(fresh)
+        if missing:
+            representations.update(self._wait(label, missing, variant, build))
+        return representations
+
+    def _claim(self, label, pk, variant):
+        """Take the rebuild lock of an entry, False when it is taken."""
+        key = self._lock_key(label, pk, variant)
+        with self._rebuilds_lock:
+            if key in self._rebuilds:
+                return False
+            self._rebuilds[key] = threading.Event()
+        if self.cache.add(key, True, settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+            return True
+        self._release_local(key)
+        return False
+
+    def _release(self, label, pks, variant):
+        keys = [self._lock_key(label, pk, variant) for pk in pks]
+        self.cache.delete_many(keys)
+        for key in keys:
+            self._release_local(key)
+
+    def _release_local(self, key):
+        with self._rebuilds_lock:
+            rebuild = self._rebuilds.pop(key, None)
+        if rebuild is not None:
+            rebuild.set()
+
+    def _wait(self, label, pks, variant, build):
+        """
+        Wait for entries rebuilt by other requests
+
+        Entries still missing once their rebuild is over (unknown objects,
+        errors), or after RESPONSE_CACHE_LOCK_WAIT seconds, are built.
+        """
+        representations, unbuilt = {}, []
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+        while pks and time.monotonic() < deadline:
+            keys = {pk: self._lock_key(label, pk, variant) for pk in pks}
+            # rebuilds of this process tell when they are over
+            local = [self._rebuilds.get(key) for key in keys.values()]
+            rebuild = next((event for event in local if event is not None), None)
+            if rebuild is not None:
+                rebuild.wait(POLL_INTERVAL)
+            else:
+                time.sleep(POLL_INTERVAL)
+
+            rebuilt = self._entries(label, pks, variant)
+            representations.update((pk, data) for pk, (_, data) in rebuilt.items())
+            locked = self.cache.get_many(list(keys.values()))
+            waiting = []
+            for pk in pks:
+                if pk in rebuilt:
+                    continue
+                if keys[pk] in locked or keys[pk] in self._rebuilds:
+                    waiting.append(pk)
+                else:
+                    unbuilt.append(pk)
+            pks = waiting
+
+        unbuilt += pks
+        if unbuilt:
+            representations.update(build(unbuilt))
+        return representations
+
+    def invalidate(self, label, pks):
+        """Drop every cached variant of the given objects, or of all with None."""
+        if not self.enabled:
+            return
+
+        if pks is None:
+            self.cache.delete(self._label_generation_key(label))
+        elif pks:
+            self.cache.delete_many([self._generation_key(label, pk) for pk in pks])
+
+
+response_cache = ResponseCache()
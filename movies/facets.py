@@ -0,0 +1,151 @@
+"""
+Facet counts of the movies matching the list filters.
+
+Every facet is counted by a single GROUPING SETS query. Movie rows are
+counted for the movie columns, and (movie, author) rows for the author facet,
+so movies with several authors are not counted twice. Each facet keeps its
+`MOVIE_FACET_LIMIT` most frequent values, and results are cached per filter
+combination for `MOVIE_FACETS_CACHE_TIMEOUT` seconds.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F, IntegerField, Value
+from django.db.models.functions import Cast, ExtractYear, Floor
+
+from .models import Movie
+
+# facet -> expression selected for it
+FACETS = {
+    "status": F("status"),
+    "source": F("source"),
+    "original_language": F("original_language"),
+    "adult": F("adult"),
+    "evaluation": F("evaluation"),
+    "release_year": Cast(ExtractYear("release_date"), IntegerField()),
+    # vote averages by unit: 7 counts averages from 7 to 7.99
+    "vote_average": Cast(Floor("vote_average"), IntegerField()),
+    "author": F("authors"),
+}
+
+FACETS_SQL = """
+    SELECT * FROM (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (
+                PARTITION BY grouping ORDER BY count DESC, {columns}
+            ) AS position
+        FROM (
+            SELECT
+                {columns},
+                GROUPING({columns}) AS grouping,
+                CASE WHEN GROUPING(facet_author) = 0
+                    THEN COUNT(*) FILTER (WHERE is_author_row)
+                    ELSE COUNT(*) FILTER (WHERE NOT is_author_row)
+                END AS count
+            FROM ({rows}) AS rows
+            GROUP BY GROUPING SETS ((), {sets})
+        ) AS groups
+        WHERE count > 0
+    ) AS facets
+    WHERE position <= %s
+    ORDER BY grouping, position
+"""
+
+
+def _output_field(expression):
+    if isinstance(expression, F):
+        return Movie._meta.get_field(expression.name)
+    return expression.output_field
+
+
+def _facet_rows(queryset):
+    """Movie rows, then (movie, author) rows, with the facet columns."""
+    movie_columns = {
+        name: expression for name, expression in FACETS.items() if name != "author"
+    }
+    queryset = queryset.order_by().annotate(
+        **{f"facet_{name}": expression for name, expression in movie_columns.items()}
+    )
+    columns = [f"facet_{name}" for name in movie_columns]
+    movies = queryset.annotate(
+        facet_author=Value(None, output_field=IntegerField()),
+        is_author_row=Value(False),
+    ).values(*columns, "facet_author", "is_author_row")
+    # only the author column matters on author rows
+    authors = (
+        queryset.filter(authors__isnull=False)
+        .annotate(
+            **{
+                f"null_{name}": Value(None, output_field=_output_field(expression))
+                for name, expression in movie_columns.items()
+            },
+            facet_author=FACETS["author"],
+            is_author_row=Value(True),
+        )
+        .values(
+            *(f"null_{name}" for name in movie_columns), "facet_author", "is_author_row"
+        )
+    )
+    return movies.union(authors, all=True)
+
+
+def compute_facets(queryset):
+    """
+    Facet counts of a movie queryset
+
+    Args:
+        queryset (QuerySet): filtered movies
+
+    Returns:
+        dict: total `count`, and `facets` mapping each facet to its most
+            frequent values, as {"value": ..., "count": ...} items
+    """
+    rows = _facet_rows(queryset)
+    rows_sql, params = rows.query.sql_with_params()
+    columns = [f"facet_{name}" for name in FACETS]
+    sql = FACETS_SQL.format(
+        columns=", ".join(columns),
+        rows=rows_sql,
+        sets=", ".join(f"({column})" for column in columns),
+    )
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, (*params, settings.MOVIE_FACET_LIMIT))
+        results = cursor.fetchall()
+
+    # GROUPING() sets the bit of each column aggregated away, the bit of the
+    # first column being the highest
+    all_grouped = (1 << len(columns)) - 1
+    count = 0
+    facets = {name: [] for name in FACETS}
+    for row in results:
+        *values, grouping, item_count, _ = row
+        if grouping == all_grouped:
+            count = item_count
+            continue
+        index = next(
+            index
+            for index in range(len(columns))
+            if not grouping & (1 << (len(columns) - 1 - index))
+        )
+        name = list(FACETS)[index]
+        facets[name].append({"value": values[index], "count": item_count})
+
+    return {"count": count, "facets": facets}
+
+
+def movie_facets(queryset, filters):
+    """Facet counts of the movies matching `filters`, through the cache."""
+    key = (
+        "movie-facets:"
+        + hashlib.md5(repr(sorted(filters.items())).encode()).hexdigest()
+    )
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(queryset)
+        cache.set(key, result, settings.MOVIE_FACETS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,210 @@
+"""
+Movie list filters, shared by `GET /api/movies/` and `GET /api/movies/facets/`.
+"""
+
+import datetime
+
+from django.db.models import Exists, OuterRef
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+
+from .models import Movie, Source
+
+TRUE_VALUES = {"true", "1"}
+FALSE_VALUES = {"false", "0"}
+
+MOVIE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="status",
+        description="Filter by movie status",
+        required=False,
+        enum=Movie.Status.values,
+    ),
+    OpenApiParameter(
+        name="source",
+        description="Filter by source",
+        required=False,
+        enum=Source.values,
+    ),
+    OpenApiParameter(
+        name="release_year_min",
+        type=int,
+        description="Released in or after this year",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="release_year_max",
+        type=int,
+        description="Released in or before this year",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="original_language",
+        description="Comma separated original languages (e.g. en,fr)",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="adult",
+        type=bool,
+        description="Filter by adult flag",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="vote_average_min",
+        type=float,
+        description="Minimum TMDB vote average",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="vote_average_max",
+        type=float,
+        description="Maximum TMDB vote average",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="popularity_min",
+        type=float,
+        description="Minimum TMDB popularity",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="popularity_max",
+        type=float,
+        description="Maximum TMDB popularity",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="author",
+        description="Comma separated author IDs, movies by any of them",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="evaluation",
+        description=(
+            "Comma separated evaluations (" + ", ".join(Movie.Evaluation.values) + ")"
+        ),
+        required=False,
+    ),
+]
+
+FILTER_NAMES = [parameter.name for parameter in MOVIE_FILTER_PARAMETERS]
+
+
+def _parse(params, name, cast, message):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValidationError({name: message}) from None
+
+
+def _parse_list(params, name, cast=str, message=""):
+    values = [value.strip() for value in params.get(name, "").split(",")]
+    try:
+        return [cast(value) for value in values if value]
+    except ValueError:
+        raise ValidationError({name: message}) from None
+
+
+def _parse_year(value):
+    year = int(value)
+    if not datetime.MINYEAR <= year < datetime.MAXYEAR:
+        raise ValueError(value)
+    return year
+
+
+def _parse_bool(value):
+    value = value.lower()
+    if value in TRUE_VALUES | FALSE_VALUES:
+        return value in TRUE_VALUES
+    raise ValueError(value)
+
+
+def _parse_choice(choices):
+    def cast(value):
+        if value not in choices:
+            raise ValueError(value)
+        return value
+
+    return cast
+
+
+def movie_filters(params):
+    """
+    Normalized movie filters of the query parameters
+
+    Args:
+        params (QueryDict): request query parameters
+
+    Returns:
+        dict: filter name -> parsed value, for the filters present
+
+    Raises:
+        ValidationError: on invalid values
+    """
+    filters = {
+        "status": params.get("status") or None,
+        "source": params.get("source") or None,
+        "release_year_min": _parse(
+            params, "release_year_min", _parse_year, "Must be a year."
+        ),
+        "release_year_max": _parse(
+            params, "release_year_max", _parse_year, "Must be a year."
+        ),
+        "original_language": _parse_list(params, "original_language"),
+        "adult": _parse(params, "adult", _parse_bool, "Must be true or false."),
+        "vote_average_min": _parse(
+            params, "vote_average_min", float, "Must be a number."
+        ),
+        "vote_average_max": _parse(
+            params, "vote_average_max", float, "Must be a number."
+        ),
+        "popularity_min": _parse(params, "popularity_min", float, "Must be a number."),
+        "popularity_max": _parse(params, "popularity_max", float, "Must be a number."),
+        "author": _parse_list(params, "author", int, "Must be author IDs."),
+        "evaluation": _parse_list(
+            params,
+            "evaluation",
+            _parse_choice(Movie.Evaluation.values),
+            f"Must be among {', '.join(Movie.Evaluation.values)}.",
+        ),
+    }
+    return {name: value for name, value in filters.items() if value not in (None, [])}
+
+
+def filter_movies(queryset, filters):
+    """Apply filters returned by `movie_filters` to a movie queryset."""
+    lookups = {
+        "status": "status",
+        "source": "source",
+        "original_language": "original_language__in",
+        "adult": "adult",
+        "vote_average_min": "vote_average__gte",
+        "vote_average_max": "vote_average__lte",
+        "popularity_min": "popularity__gte",
+        "popularity_max": "popularity__lte",
+        "evaluation": "evaluation__in",
+    }
+    queryset = queryset.filter(
+        **{lookups[name]: value for name, value in filters.items() if name in lookups}
+    )
+    # date bounds rather than __year, so release_date indexes apply
+    if "release_year_min" in filters:
+        queryset = queryset.filter(
+            release_date__gte=datetime.date(filters["release_year_min"], 1, 1)
+        )
+    if "release_year_max" in filters:
+        queryset = queryset.filter(
+            release_date__lt=datetime.date(filters["release_year_max"] + 1, 1, 1)
+        )
+    if "author" in filters:
+        queryset = queryset.filter(
+            Exists(
+                Movie.authors.through.objects.filter(
+                    movie=OuterRef("pk"), author__in=filters["author"]
+                )
+            )
+        )
+    return queryset
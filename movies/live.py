@@ -0,0 +1,171 @@
+"""
+Live movie scores and favorite counts, as Server-Sent Events.
+
+`GET /api/live/movies/?ids=1,2` is served by the ASGI application (see
+config/asgi.py) without going through Django: it sends the current state of
+each movie, then its new state whenever its ratings or favorites change, until
+the client disconnects. Changes are published once committed, through the
+LIVE_BROKER (see core.broker), and only when a stream may follow the movie.
+States are read from the histograms and favorite counts kept on the movies.
+
+A stream waits at most LIVE_SEND_TIMEOUT seconds for the client to accept an
+event before closing, and only keeps the latest unsent state of each movie,
+so slow clients cannot hold memory or workers.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.broker import get_broker
+
+from .models import SCORES, Movie
+
+
+def topic(pk):
+    return f"movies.movie:{pk}"
+
+
+def movie_states(pks):
+    """
+    Rating aggregates and favorite counts of movies
+
+    Returns:
+        dict: movie ID -> state
+    """
+    states = {}
+    movies = Movie.objects.filter(pk__in=pks).values_list(
+        "pk", "score_histogram", "favorite_count"
+    )
+    for pk, histogram, favorite_count in movies:
+        rating_count = sum(histogram)
+        total = sum(score * count for score, count in zip(SCORES, histogram))
+        states[pk] = {
+            "id": pk,
+            "rating_count": rating_count,
+            "average_score": round(total / rating_count, 2) if rating_count else None,
+            "score_histogram": histogram,
+            "favorite_count": favorite_count,
+        }
+    return states
+
+
+def publish_on_commit(pks):
+    """Publish the state of movies once the transaction commits."""
+    broker = get_broker()
+    pks = [pk for pk in pks if broker.listening(topic(pk))]
+    if not pks:
+        return
+
+    def publish():
+        for pk, state in movie_states(pks).items():
+            broker.publish(topic(pk), state)
+
+    transaction.on_commit(publish)
+
+
+def _initial_states(pks):
+    close_old_connections()
+    try:
+        return movie_states(pks)
+    finally:
+        close_old_connections()
+
+
+def event(state):
+    return f"event: movie\ndata: {json.dumps(state)}\n\n".encode()
+
+
+async def _respond(send, status, detail):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(detail).encode()})
+
+
+async def _disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream(scope, receive, send):
+    """ASGI application of the live movie stream."""
+    if scope["method"] != "GET":
+        return await _respond(send, 405, {"detail": "Method not allowed."})
+    query = parse_qs(scope["query_string"].decode())
+    ids = [pk.strip() for pk in ",".join(query.get("ids", [])).split(",")]
+    ids = [pk for pk in ids if pk]
+    if not ids or not all(pk.isdigit() for pk in ids):
+        return await _respond(send, 400, {"ids": "Movie IDs must be integers."})
+    ids = set(map(int, ids))
+    if len(ids) > settings.LIVE_MAX_MOVIES:
+        return await _respond(
+            send,
+            400,
+            {"ids": f"At most {settings.LIVE_MAX_MOVIES} movies can be followed."},
+        )
+
+    broker = get_broker()
+    # subscribe before reading the states, so no change falls in between
+    subscription = broker.subscribe(topic(pk) for pk in ids)
+    disconnected = asyncio.ensure_future(_disconnected(receive))
+    messages = asyncio.ensure_future(subscription.get())
+    try:
+        try:
+            await asyncio.wait_for(broker.connected(), settings.LIVE_SEND_TIMEOUT)
+        except TimeoutError:
+            return await _respond(
+                send, 503, {"detail": "Live updates are unavailable."}
+            )
+        states = await sync_to_async(_initial_states)(ids)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    # no buffering by nginx
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        body = b"".join(event(state) for state in states.values())
+        while True:
+            try:
+                await asyncio.wait_for(
+                    send(
+                        {"type": "http.response.body", "body": body, "more_body": True}
+                    ),
+                    settings.LIVE_SEND_TIMEOUT,
+                )
+            except (TimeoutError, OSError):
+                # too slow, or gone
+                return
+
+            await asyncio.wait(
+                {disconnected, messages},
+                timeout=settings.LIVE_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected.done():
+                return
+            if messages.done():
+                body = b"".join(event(state) for state in messages.result())
+                messages = asyncio.ensure_future(subscription.get())
+            else:
+                # keeps proxies from closing an idle connection
+                body = b": heartbeat\n\n"
+    finally:
+        subscription.close()
+        disconnected.cancel()
+        messages.cancel()
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from movies.partitions import archive_partition, cold_partitions, create_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive the monthly movie rating partitions older than "
+        "RATING_ARCHIVE_MONTHS to gzipped CSV files, then drop them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.RATING_ARCHIVE_MONTHS,
+            help="Months of ratings kept (default: RATING_ARCHIVE_MONTHS)",
+        )
+        parser.add_argument(
+            "--directory",
+            default=settings.RATING_ARCHIVE_DIR,
+            help="Directory of the archive files (default: RATING_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the partitions that would be archived",
+        )
+
+    def handle(self, *args, **options):
+        created = create_partitions()
+        for name in created:
+            self.stdout.write(f"Created {name}")
+
+        names = cold_partitions(options["months"])
+        for name in names:
+            if options["dry_run"]:
+                self.stdout.write(f"Would archive {name}")
+                continue
+            count = archive_partition(name, options["directory"])
+            self.stdout.write(f"Archived {count} ratings of {name}")
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Archived {len(names)} partitions"))
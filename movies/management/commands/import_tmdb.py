@@ -5,6 +5,7 @@ import httpx
 from decouple import config
 from django.core.management.base import BaseCommand
 
+from core.jobs import enqueue, report_progress
 from movies.models import Author, Movie, Source
 
 
@@ -24,9 +25,19 @@ class Command(BaseCommand):
             default=50,
             help="Number of movies to import (default: 50)",
         )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue a background job instead of running now",
+        )
 
     def handle(self, *args, **options):
         count = options["count"]
+        if options["enqueue"]:
+            job = enqueue("movies.import_tmdb", count=count)
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}"))
+            return
+
         self.stdout.write(f"Importing {count} movies from TMDB...")
 
         movies_imported = 0
@@ -57,6 +68,7 @@ class Command(BaseCommand):
                     # Create movie
                     movie = self._create_movie(movie_data)
                     movies_imported += 1
+                    report_progress(movies_imported, count, movie.title)
                     self.stdout.write(
                         self.style.SUCCESS(f"  -> Imported movie: {movie.title}")
                     )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from movies.scores import RATED, recompute_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the score histograms of movies and authors from their ratings "
+        "and derive the movie evaluations"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue a background job instead of running now",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            job = enqueue("movies.recompute_scores", dedup_key="recompute-scores")
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}"))
+            return
+
+        for model in RATED:
+            start = time.perf_counter()
+            updated = recompute_scores(model)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Updated {updated} {model._meta.verbose_name_plural.lower()} "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from movies.stats import refresh_stats
+
+
+class Command(BaseCommand):
+    help = "Refresh the catalogue statistics served by /api/stats/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--blocking",
+            action="store_true",
+            help="Refresh without CONCURRENTLY: faster, but blocks /api/stats/",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue a background job instead of running now",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            job = enqueue(
+                "movies.refresh_stats",
+                dedup_key="refresh-stats",
+                concurrently=not options["blocking"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}"))
+            return
+
+        start = time.perf_counter()
+        views = refresh_stats(concurrently=not options["blocking"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {len(views)} views in {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,95 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.warmup import (
+    LIST_PATHS,
+    id_lookups,
+    logged_objects,
+    trending_authors,
+    trending_movies,
+    warm,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Preload the caches with the hot movies, authors and lists, "
+        "then report the instance ready on /ready/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000",
+            help="Base URL of the instance to warm up",
+        )
+        parser.add_argument("--movies", type=int, default=200)
+        parser.add_argument("--authors", type=int, default=100)
+        parser.add_argument(
+            "--access-log",
+            type=Path,
+            help="Rank by requests in this access log rather than by recent ratings",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Requests in flight"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=30, help="Seconds per request"
+        )
+        parser.add_argument(
+            "--max-failures",
+            type=float,
+            default=0.1,
+            help="Share of failed requests above which the instance is not ready",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Only report the instance not ready, once per deploy before it starts",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            if settings.WARMUP_READY_FILE:
+                Path(settings.WARMUP_READY_FILE).unlink(missing_ok=True)
+            return
+
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        if options["access_log"]:
+            with options["access_log"].open(errors="replace") as lines:
+                movies, authors = logged_objects(
+                    lines, options["movies"], options["authors"]
+                )
+        else:
+            movies = trending_movies(options["movies"])
+            authors = trending_authors(options["authors"], movies)
+
+        paths = [
+            *LIST_PATHS,
+            *id_lookups("/api/movies/", movies),
+            *id_lookups("/api/authors/", authors),
+            *(f"/api/movies/{pk}/" for pk in movies),
+            *(f"/api/authors/{pk}/" for pk in authors),
+        ]
+        start = time.perf_counter()
+        failures = warm(
+            options["url"], paths, options["concurrency"], options["timeout"]
+        )
+        for path, error in failures:
+            self.stderr.write(f"{path}: {error}")
+        summary = (
+            f"Warmed {len(paths) - len(failures)}/{len(paths)} paths "
+            f"({len(movies)} movies, {len(authors)} authors) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        if len(failures) > options["max_failures"] * len(paths):
+            raise CommandError(f"{summary}, too many failures to report ready.")
+
+        if settings.WARMUP_READY_FILE:
+            Path(settings.WARMUP_READY_FILE).touch()
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial_squashed_0007_remove_author_website'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authorrating',
+            index=models.Index(fields=['author', 'created_at'], name='authrating_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movierating',
+            index=models.Index(fields=['movie', 'created_at'], name='movierating_movie_created_idx'),
+        ),
+    ]
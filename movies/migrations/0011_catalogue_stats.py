@@ -0,0 +1,90 @@
+# Generated by Django 6.0 on 2026-10-19 14:02
+
+from django.db import migrations
+
+# materialized views read by /api/stats/, refreshed by manage.py refresh_stats.
+# Each one has a unique index so it can be refreshed concurrently.
+VIEWS = [
+    (
+        'movies_stats_summary',
+        '''
+        SELECT
+            1 AS id,
+            (SELECT COUNT(*) FROM movies_movie) AS movie_count,
+            (SELECT COUNT(*) FROM movies_author) AS author_count,
+            (SELECT COALESCE(SUM(budget), 0) FROM movies_movie) AS budget_total,
+            (SELECT COALESCE(SUM(revenue), 0) FROM movies_movie) AS revenue_total,
+            (SELECT COUNT(*) FROM movies_movierating) AS movie_rating_count,
+            (SELECT COUNT(*) FROM movies_authorrating) AS author_rating_count,
+            now() AS refreshed_at
+        ''',
+        ['CREATE UNIQUE INDEX movies_stats_summary_id ON movies_stats_summary (id)'],
+    ),
+    (
+        'movies_stats_release',
+        '''
+        SELECT
+            EXTRACT(YEAR FROM release_date)::integer AS release_year,
+            status,
+            COUNT(*) AS movie_count,
+            COALESCE(SUM(budget), 0) AS budget_total,
+            COALESCE(SUM(revenue), 0) AS revenue_total
+        FROM movies_movie
+        GROUP BY 1, 2
+        ''',
+        ['CREATE UNIQUE INDEX movies_stats_release_key ON movies_stats_release (release_year, status) NULLS NOT DISTINCT'],
+    ),
+    (
+        'movies_stats_scores',
+        '''
+        SELECT 'movie' AS target, score, COUNT(*) AS rating_count
+        FROM movies_movierating GROUP BY score
+        UNION ALL
+        SELECT 'author' AS target, score, COUNT(*) AS rating_count
+        FROM movies_authorrating GROUP BY score
+        ''',
+        ['CREATE UNIQUE INDEX movies_stats_scores_key ON movies_stats_scores (target, score)'],
+    ),
+    (
+        'movies_stats_authors',
+        '''
+        SELECT
+            author.baseuser_ptr_id AS author_id,
+            baseuser.first_name,
+            baseuser.last_name,
+            (
+                SELECT COUNT(*) FROM movies_movie_authors AS link
+                WHERE link.author_id = author.baseuser_ptr_id
+            ) AS movie_count,
+            ratings.rating_count,
+            ratings.average_score
+        FROM movies_author AS author
+        JOIN users_baseuser AS baseuser ON baseuser.id = author.baseuser_ptr_id
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS rating_count, AVG(score)::float AS average_score
+            FROM movies_authorrating AS rating
+            WHERE rating.author_id = author.baseuser_ptr_id
+        ) AS ratings
+        ''',
+        [
+            'CREATE UNIQUE INDEX movies_stats_authors_key ON movies_stats_authors (author_id)',
+            'CREATE INDEX movies_stats_authors_movies ON movies_stats_authors (movie_count DESC, author_id)',
+        ],
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_movie_filter_indexes'),
+        ('users', '0004_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[f'CREATE MATERIALIZED VIEW {name} AS {query}', *indexes],
+            reverse_sql=f'DROP MATERIALIZED VIEW IF EXISTS {name}',
+        )
+        for name, query, indexes in VIEWS
+    ]
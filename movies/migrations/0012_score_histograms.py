@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-19 11:47
+
+import django.contrib.postgres.fields
+import movies.models
+from django.db import migrations, models
+
+BUCKETS = ', '.join(f'COUNT(*) FILTER (WHERE score = {score})' for score in range(1, 11))
+
+BACKFILL_SQL = f'''
+    UPDATE movies_{{target}} AS target
+    SET score_histogram = scores.histogram
+    FROM (
+        SELECT {{target}}_id AS id, ARRAY[{BUCKETS}]::integer[] AS histogram
+        FROM movies_{{target}}rating
+        GROUP BY {{target}}_id
+    ) AS scores
+    WHERE target.{{pk}} = scores.id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_catalogue_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='score_histogram',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=movies.models.empty_histogram, editable=False, help_text='Number of ratings of each score, from 1 to 10', size=10),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='score_histogram',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=movies.models.empty_histogram, editable=False, help_text='Number of ratings of each score, from 1 to 10', size=10),
+        ),
+        # histograms of the existing ratings, the evaluation is left as is
+        migrations.RunSQL(
+            sql=[
+                BACKFILL_SQL.format(target='movie', pk='id'),
+                BACKFILL_SQL.format(target='author', pk='baseuser_ptr_id'),
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
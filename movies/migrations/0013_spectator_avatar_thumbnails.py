@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_score_histograms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spectator',
+            name='avatar_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0 on 2026-10-19 12:05
+
+from django.db import migrations
+
+# tables whose changes are appended to core_change, read by /api/changes/:
+# table, model label, primary key column, columns copied to the change data
+TRACKED = [
+    ('movies_movie', 'movies.movie', 'id', []),
+    ('movies_author', 'movies.author', 'baseuser_ptr_id', []),
+    ('movies_movie_authors', 'movies.movie_authors', 'id', ['movie_id', 'author_id']),
+    ('movies_movierating', 'movies.movierating', 'id', ['movie_id', 'spectator_id', 'score']),
+    ('movies_authorrating', 'movies.authorrating', 'id', ['author_id', 'spectator_id', 'score']),
+]
+
+# the names of authors live in users_baseuser
+AUTHOR_USER_SQL = """
+CREATE FUNCTION movies_record_author_user_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF EXISTS (SELECT FROM movies_author WHERE baseuser_ptr_id = NEW.id) THEN
+        INSERT INTO core_change (txid, model, object_id, action, data, created_at)
+        VALUES (
+            pg_current_xact_id()::text::bigint, 'movies.author', NEW.id, 'update', '{}', now()
+        );
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER movies_author_user_change
+AFTER UPDATE OF username, first_name, last_name ON users_baseuser
+FOR EACH ROW
+WHEN ((OLD.username, OLD.first_name, OLD.last_name)
+      IS DISTINCT FROM (NEW.username, NEW.first_name, NEW.last_name))
+EXECUTE FUNCTION movies_record_author_user_change();
+"""
+
+
+def trigger_sql(table, label, pk, columns):
+    arguments = ', '.join(f"'{argument}'" for argument in [label, pk, *columns])
+    return (
+        f'CREATE TRIGGER {table}_change '
+        f'AFTER INSERT OR UPDATE OR DELETE ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION core_record_change({arguments})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_change'),
+        ('movies', '0013_spectator_avatar_thumbnails'),
+        ('users', '0004_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        *[
+            migrations.RunSQL(
+                sql=trigger_sql(table, label, pk, columns),
+                reverse_sql=f'DROP TRIGGER {table}_change ON {table}',
+            )
+            for table, label, pk, columns in TRACKED
+        ],
+        migrations.RunSQL(
+            sql=AUTHOR_USER_SQL,
+            reverse_sql=[
+                'DROP TRIGGER movies_author_user_change ON users_baseuser',
+                'DROP FUNCTION movies_record_author_user_change()',
+            ],
+        ),
+    ]
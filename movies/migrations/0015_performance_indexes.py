@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-19 12:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations, models
+
+import core.db.operations
+
+
+class Migration(migrations.Migration):
+    # movies and ratings are large, build indexes and validate constraints
+    # without locking writes
+    atomic = False
+
+    dependencies = [
+        ('movies', '0014_change_triggers'),
+    ]
+
+    operations = [
+        core.db.operations.CreateExtensionIfAvailable('pg_trgm'),
+        core.db.operations.AddIndexConcurrently(
+            model_name='movie',
+            index=models.Index(fields=['updated_at'], name='movie_updated_at_idx'),
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='movie_title_trgm_idx'),
+            extension='pg_trgm',
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tagline'), name='gin_trgm_ops'), name='movie_tagline_trgm_idx'),
+            extension='pg_trgm',
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('overview'), name='gin_trgm_ops'), name='movie_overview_trgm_idx'),
+            extension='pg_trgm',
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='movierating',
+            index=models.Index(fields=['created_at'], name='movierating_created_idx'),
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='authorrating',
+            index=models.Index(fields=['created_at'], name='authrating_created_idx'),
+        ),
+        django.contrib.postgres.operations.AddConstraintNotValid(
+            model_name='movierating',
+            constraint=models.CheckConstraint(condition=models.Q(('score__gte', 1), ('score__lte', 10)), name='movierating_score_range'),
+        ),
+        django.contrib.postgres.operations.AddConstraintNotValid(
+            model_name='authorrating',
+            constraint=models.CheckConstraint(condition=models.Q(('score__gte', 1), ('score__lte', 10)), name='authrating_score_range'),
+        ),
+        django.contrib.postgres.operations.ValidateConstraint(
+            model_name='movierating',
+            name='movierating_score_range',
+        ),
+        django.contrib.postgres.operations.ValidateConstraint(
+            model_name='authorrating',
+            name='authrating_score_range',
+        ),
+    ]
@@ -0,0 +1,246 @@
+# Generated by Django 6.0 on 2026-10-19 12:37
+
+import importlib
+
+from django.db import migrations, models
+
+# materialized views reading movie ratings, recreated with the table
+VIEWS = [
+    view
+    for view in importlib.import_module('movies.migrations.0011_catalogue_stats').VIEWS
+    if view[0] in ('movies_stats_summary', 'movies_stats_scores')
+]
+
+# Monthly partitions of movie ratings between two times, named after their
+# month (UTC). Returns the names of the created partitions.
+CREATE_PARTITIONS_SQL = """
+CREATE FUNCTION movies_create_rating_partitions(since timestamptz, until timestamptz)
+RETURNS SETOF text LANGUAGE plpgsql AS $$
+DECLARE
+    month timestamp := date_trunc('month', since AT TIME ZONE 'UTC');
+    name text;
+BEGIN
+    WHILE month < until AT TIME ZONE 'UTC' LOOP
+        name := 'movies_movierating_' || to_char(month, 'YYYY_MM');
+        IF to_regclass(name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF movies_movierating FOR VALUES FROM (%L) TO (%L)',
+                name,
+                month AT TIME ZONE 'UTC',
+                (month + interval '1 month') AT TIME ZONE 'UTC'
+            );
+            RETURN NEXT name;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+END
+$$;
+"""
+
+# The rows are copied once into the partitioned table. Its primary key must
+# include created_at, so (spectator, movie) uniqueness moves to
+# movies_movieratingkey.
+PARTITION_SQL = [
+    'DROP MATERIALIZED VIEW movies_stats_summary',
+    'DROP MATERIALIZED VIEW movies_stats_scores',
+    'ALTER TABLE movies_movierating RENAME TO movies_movierating_unpartitioned',
+    """
+    CREATE TABLE movies_movierating (
+        id bigint NOT NULL,
+        score smallint NOT NULL,
+        review text NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL,
+        movie_id bigint NOT NULL,
+        spectator_id bigint NOT NULL
+    ) PARTITION BY RANGE (created_at)
+    """,
+    # rows outside the monthly partitions, e.g. dated back by hand
+    'CREATE TABLE movies_movierating_default PARTITION OF movies_movierating DEFAULT',
+    """
+    SELECT movies_create_rating_partitions(
+        coalesce(min(created_at), now()),
+        greatest(max(created_at), now()) + interval '3 months'
+    )
+    FROM movies_movierating_unpartitioned
+    """,
+    """
+    INSERT INTO movies_movierating
+        (id, score, review, created_at, updated_at, movie_id, spectator_id)
+    SELECT id, score, review, created_at, updated_at, movie_id, spectator_id
+    FROM movies_movierating_unpartitioned
+    """,
+    """
+    INSERT INTO movies_movieratingkey (spectator_id, movie_id, rating_id, created_at)
+    SELECT spectator_id, movie_id, id, created_at FROM movies_movierating_unpartitioned
+    """,
+    'DROP TABLE movies_movierating_unpartitioned',
+    # identity columns are not supported on partitioned tables before Postgres 17
+    'CREATE SEQUENCE movies_movierating_id_seq OWNED BY movies_movierating.id',
+    """
+    SELECT setval('movies_movierating_id_seq', coalesce(max(id), 0) + 1, false)
+    FROM movies_movierating
+    """,
+    "ALTER TABLE movies_movierating ALTER COLUMN id SET DEFAULT nextval('movies_movierating_id_seq')",
+    """
+    ALTER TABLE movies_movierating
+        ADD CONSTRAINT movies_movierating_pkey PRIMARY KEY (id, created_at),
+        ADD CONSTRAINT movies_movierating_score_check CHECK (score >= 0),
+        ADD CONSTRAINT movierating_score_range CHECK (score >= 1 AND score <= 10),
+        ADD CONSTRAINT movies_movierating_movie_id_fa845f47_fk_movies_movie_id
+            FOREIGN KEY (movie_id) REFERENCES movies_movie (id) DEFERRABLE INITIALLY DEFERRED,
+        ADD CONSTRAINT movies_movierating_spectator_id_a24a8f0a_fk_movies_sp
+            FOREIGN KEY (spectator_id) REFERENCES movies_spectator (baseuser_ptr_id)
+            DEFERRABLE INITIALLY DEFERRED
+    """,
+    'CREATE INDEX movies_movierating_movie_id_fa845f47 ON movies_movierating (movie_id)',
+    # replaces the unique constraint for lookups, and the spectator_id index
+    'CREATE INDEX movierating_spectator_movie_idx ON movies_movierating (spectator_id, movie_id)',
+    'CREATE INDEX movierating_movie_created_idx ON movies_movierating (movie_id, created_at)',
+    'CREATE INDEX movierating_created_idx ON movies_movierating (created_at)',
+    """
+    CREATE TRIGGER movies_movierating_change
+    AFTER INSERT OR UPDATE OR DELETE ON movies_movierating
+    FOR EACH ROW EXECUTE FUNCTION
+        core_record_change('movies.movierating', 'id', 'movie_id', 'spectator_id', 'score')
+    """,
+]
+
+UNPARTITION_SQL = [
+    'DROP MATERIALIZED VIEW movies_stats_summary',
+    'DROP MATERIALIZED VIEW movies_stats_scores',
+    'ALTER TABLE movies_movierating RENAME TO movies_movierating_partitioned',
+    """
+    CREATE TABLE movies_movierating (
+        id bigint NOT NULL,
+        score smallint NOT NULL,
+        review text NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL,
+        movie_id bigint NOT NULL,
+        spectator_id bigint NOT NULL
+    )
+    """,
+    """
+    INSERT INTO movies_movierating
+        (id, score, review, created_at, updated_at, movie_id, spectator_id)
+    SELECT id, score, review, created_at, updated_at, movie_id, spectator_id
+    FROM movies_movierating_partitioned
+    """,
+    'DROP TABLE movies_movierating_partitioned',
+    'ALTER TABLE movies_movierating ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY',
+    """
+    SELECT setval(
+        pg_get_serial_sequence('movies_movierating', 'id'), coalesce(max(id), 0) + 1, false
+    )
+    FROM movies_movierating
+    """,
+    """
+    ALTER TABLE movies_movierating
+        ADD CONSTRAINT movies_movierating_pkey PRIMARY KEY (id),
+        ADD CONSTRAINT movies_movierating_spectator_id_movie_id_84819e1c_uniq
+            UNIQUE (spectator_id, movie_id),
+        ADD CONSTRAINT movies_movierating_score_check CHECK (score >= 0),
+        ADD CONSTRAINT movierating_score_range CHECK (score >= 1 AND score <= 10),
+        ADD CONSTRAINT movies_movierating_movie_id_fa845f47_fk_movies_movie_id
+            FOREIGN KEY (movie_id) REFERENCES movies_movie (id) DEFERRABLE INITIALLY DEFERRED,
+        ADD CONSTRAINT movies_movierating_spectator_id_a24a8f0a_fk_movies_sp
+            FOREIGN KEY (spectator_id) REFERENCES movies_spectator (baseuser_ptr_id)
+            DEFERRABLE INITIALLY DEFERRED
+    """,
+    'CREATE INDEX movies_movierating_movie_id_fa845f47 ON movies_movierating (movie_id)',
+    'CREATE INDEX movies_movierating_spectator_id_a24a8f0a ON movies_movierating (spectator_id)',
+    'CREATE INDEX movierating_movie_created_idx ON movies_movierating (movie_id, created_at)',
+    'CREATE INDEX movierating_created_idx ON movies_movierating (created_at)',
+    """
+    CREATE TRIGGER movies_movierating_change
+    AFTER INSERT OR UPDATE OR DELETE ON movies_movierating
+    FOR EACH ROW EXECUTE FUNCTION
+        core_record_change('movies.movierating', 'id', 'movie_id', 'spectator_id', 'score')
+    """,
+]
+
+# Keeps movies_movieratingkey in step with the ratings. A unique violation on
+# insert fails the rating insert, as the unique constraint did. Ratings moving
+# to another partition are deleted and inserted again, without UPDATE triggers.
+RATING_KEY_SQL = """
+CREATE FUNCTION movies_record_rating_key() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM movies_movieratingkey
+        WHERE spectator_id = OLD.spectator_id AND movie_id = OLD.movie_id
+            AND rating_id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO movies_movieratingkey (spectator_id, movie_id, rating_id, created_at)
+        VALUES (NEW.spectator_id, NEW.movie_id, NEW.id, NEW.created_at);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER movies_movierating_key
+AFTER INSERT OR DELETE ON movies_movierating
+FOR EACH ROW EXECUTE FUNCTION movies_record_rating_key();
+
+CREATE TRIGGER movies_movierating_key_update
+AFTER UPDATE OF spectator_id, movie_id, created_at ON movies_movierating
+FOR EACH ROW
+WHEN ((OLD.spectator_id, OLD.movie_id, OLD.created_at)
+      IS DISTINCT FROM (NEW.spectator_id, NEW.movie_id, NEW.created_at))
+EXECUTE FUNCTION movies_record_rating_key();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_performance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieRatingKey',
+            fields=[
+                ('pk', models.CompositePrimaryKey('spectator_id', 'movie_id', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('spectator_id', models.BigIntegerField()),
+                ('movie_id', models.BigIntegerField()),
+                ('rating_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Movie Rating Key',
+                'verbose_name_plural': 'Movie Rating Keys',
+            },
+        ),
+        migrations.RunSQL(
+            CREATE_PARTITIONS_SQL,
+            'DROP FUNCTION movies_create_rating_partitions(timestamptz, timestamptz)',
+        ),
+        migrations.RunSQL(
+            sql=[
+                *PARTITION_SQL,
+                *[
+                    statement
+                    for name, query, indexes in VIEWS
+                    for statement in [f'CREATE MATERIALIZED VIEW {name} AS {query}', *indexes]
+                ],
+            ],
+            reverse_sql=[
+                *UNPARTITION_SQL,
+                *[
+                    statement
+                    for name, query, indexes in VIEWS
+                    for statement in [f'CREATE MATERIALIZED VIEW {name} AS {query}', *indexes]
+                ],
+            ],
+        ),
+        migrations.RunSQL(
+            RATING_KEY_SQL,
+            [
+                'DROP TRIGGER movies_movierating_key_update ON movies_movierating',
+                'DROP TRIGGER movies_movierating_key ON movies_movierating',
+                'DROP FUNCTION movies_record_rating_key()',
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-19 15:10
+
+import importlib
+
+from django.db import migrations
+
+PREVIOUS_SQL = importlib.import_module(
+    'movies.migrations.0016_partition_movierating'
+).CREATE_PARTITIONS_SQL.replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION')
+
+# Ratings of a month without partition land in the default partition, which
+# then rejects the creation of that month's partition. The default partition is
+# detached meanwhile, so the rows move to the new partition without firing the
+# triggers of the ratings table (change feed, rating keys): they did not change.
+CREATE_PARTITIONS_SQL = """
+CREATE OR REPLACE FUNCTION movies_create_rating_partitions(since timestamptz, until timestamptz)
+RETURNS SETOF text LANGUAGE plpgsql AS $$
+DECLARE
+    month timestamp := date_trunc('month', since AT TIME ZONE 'UTC');
+    name text;
+    starts timestamptz;
+    ends timestamptz;
+BEGIN
+    WHILE month < until AT TIME ZONE 'UTC' LOOP
+        name := 'movies_movierating_' || to_char(month, 'YYYY_MM');
+        starts := month AT TIME ZONE 'UTC';
+        ends := (month + interval '1 month') AT TIME ZONE 'UTC';
+        IF to_regclass(name) IS NOT NULL THEN
+            NULL;
+        ELSIF EXISTS (
+            SELECT FROM movies_movierating_default
+            WHERE created_at >= starts AND created_at < ends
+        ) THEN
+            ALTER TABLE movies_movierating DETACH PARTITION movies_movierating_default;
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE movies_movierating INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM movies_movierating_default '
+                'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                starts, ends, name
+            );
+            EXECUTE format(
+                'ALTER TABLE movies_movierating ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                name, starts, ends
+            );
+            ALTER TABLE movies_movierating ATTACH PARTITION movies_movierating_default DEFAULT;
+            RETURN NEXT name;
+        ELSE
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF movies_movierating FOR VALUES FROM (%L) TO (%L)',
+                name, starts, ends
+            );
+            RETURN NEXT name;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0016_partition_movierating'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_PARTITIONS_SQL, PREVIOUS_SQL),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+# keeps movies_movie.favorite_count up to date, whichever way favorites change
+COUNT_FAVORITES_SQL = """
+CREATE FUNCTION movies_count_favorite() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE movies_movie SET favorite_count = favorite_count + 1
+        WHERE id = NEW.movie_id;
+    ELSE
+        UPDATE movies_movie SET favorite_count = favorite_count - 1
+        WHERE id = OLD.movie_id;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER movies_spectator_favorite_movies_count
+AFTER INSERT OR DELETE ON movies_spectator_favorite_movies
+FOR EACH ROW EXECUTE FUNCTION movies_count_favorite();
+
+UPDATE movies_movie SET favorite_count = favorites.count
+FROM (
+    SELECT movie_id, COUNT(*) AS count FROM movies_spectator_favorite_movies
+    GROUP BY movie_id
+) AS favorites
+WHERE movies_movie.id = favorites.movie_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0017_rating_partitions_from_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of spectators with the movie in their favorites'),
+        ),
+        migrations.RunSQL(
+            sql=COUNT_FAVORITES_SQL,
+            reverse_sql=[
+                'DROP TRIGGER movies_spectator_favorite_movies_count '
+                'ON movies_spectator_favorite_movies',
+                'DROP FUNCTION movies_count_favorite()',
+            ],
+        ),
+    ]
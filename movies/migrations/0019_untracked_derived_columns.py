@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 16:04
+
+from django.db import migrations
+
+# derived columns of tracked tables, whose updates are not logged as changes
+# (the score histograms are shifted by every rating)
+DERIVED = [
+    ('movies_movie', 'movies.movie', 'id', ['score_histogram']),
+    ('movies_author', 'movies.author', 'baseuser_ptr_id', ['score_histogram']),
+]
+
+
+def trigger_sql(table, label, pk, derived):
+    arguments = ', '.join(
+        f"'{argument}'" for argument in [label, pk, *(f'-{column}' for column in derived)]
+    )
+    return [
+        f'DROP TRIGGER {table}_change ON {table}',
+        f'CREATE TRIGGER {table}_change '
+        f'AFTER INSERT OR UPDATE OR DELETE ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION core_record_change({arguments})',
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_change_derived_columns'),
+        ('movies', '0018_movie_favorite_count'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=trigger_sql(table, label, pk, derived),
+            reverse_sql=trigger_sql(table, label, pk, []),
+        )
+        for table, label, pk, derived in DERIVED
+    ]
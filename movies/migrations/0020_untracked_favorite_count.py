@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 16:20
+
+import importlib
+
+from django.db import migrations
+
+trigger_sql = importlib.import_module(
+    'movies.migrations.0019_untracked_derived_columns'
+).trigger_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0019_untracked_derived_columns'),
+    ]
+
+    operations = [
+        # counted by the favorites trigger
+        migrations.RunSQL(
+            sql=trigger_sql(
+                'movies_movie', 'movies.movie', 'id', ['score_histogram', 'favorite_count']
+            ),
+            reverse_sql=trigger_sql(
+                'movies_movie', 'movies.movie', 'id', ['score_histogram']
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 13:45
+
+import django.contrib.postgres.fields
+import movies.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0020_untracked_favorite_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='author',
+            name='score_histogram',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), db_default=[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], default=movies.models.empty_histogram, editable=False, help_text='Number of ratings of each score, from 1 to 10', size=10),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='score_histogram',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), db_default=[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], default=movies.models.empty_histogram, editable=False, help_text='Number of ratings of each score, from 1 to 10', size=10),
+        ),
+    ]
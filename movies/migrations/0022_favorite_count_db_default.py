@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0021_score_histogram_db_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movie',
+            name='favorite_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False, help_text='Number of spectators with the movie in their favorites'),
+        ),
+    ]
@@ -1,8 +1,30 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Upper
 
 from users.models import BaseUser
 
+# rating scores go from 1 to 10, histograms count the ratings of each score
+SCORES = range(1, 11)
+
+
+def empty_histogram():
+    return [0] * len(SCORES)
+
+
+def score_histogram_field():
+    return ArrayField(
+        models.PositiveIntegerField(),
+        size=len(SCORES),
+        default=empty_histogram,
+        # for rows inserted by raw SQL
+        db_default=empty_histogram(),
+        editable=False,
+        help_text="Number of ratings of each score, from 1 to 10",
+    )
+
 
 class Source(models.TextChoices):
     """Source of the record"""
@@ -22,6 +44,7 @@ class Author(BaseUser):
         db_index=True,
     )
     tmdb_id = models.IntegerField(null=True, blank=True, unique=True)
+    score_histogram = score_histogram_field()
 
     class Meta:
         verbose_name = "Author"
@@ -33,7 +56,10 @@ class Author(BaseUser):
 
 class Spectator(BaseUser):
     bio = models.TextField(blank=True, default="")
+    # content addressed original, uploaded through /api/auth/avatar/
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    # thumbnail size -> format -> storage name, generated by a background job
+    avatar_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     date_of_birth = models.DateField(blank=True, null=True)
     favorite_movies = models.ManyToManyField(
         "Movie",
@@ -94,6 +120,13 @@ class Movie(models.Model):
         db_index=True,
     )
     tmdb_id = models.IntegerField(null=True, blank=True, unique=True)
+    score_histogram = score_histogram_field()
+    favorite_count = models.PositiveIntegerField(
+        default=0,
+        db_default=0,
+        editable=False,
+        help_text="Number of spectators with the movie in their favorites",
+    )
 
     authors = models.ManyToManyField(Author, related_name="movies", blank=True)
 
@@ -104,13 +137,60 @@ class Movie(models.Model):
         verbose_name = "Movie"
         verbose_name_plural = "Movies"
         ordering = ["-release_date"]
+        indexes = [
+            # serves case insensitive prefix search (title__istartswith)
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                name="movie_title_upper_prefix_idx",
+            ),
+            # list filters combined with the default -release_date ordering
+            models.Index(
+                fields=["status", "-release_date"], name="movie_status_release_idx"
+            ),
+            models.Index(
+                fields=["original_language", "-release_date"],
+                name="movie_language_release_idx",
+            ),
+            # vote_average and popularity range filters
+            models.Index(fields=["vote_average"], name="movie_vote_average_idx"),
+            models.Index(fields=["popularity"], name="movie_popularity_idx"),
+            # recently changed movies, for incremental exports and the admin
+            models.Index(fields=["updated_at"], name="movie_updated_at_idx"),
+            # admin search (icontains), only where pg_trgm is installed
+            *(
+                GinIndex(
+                    OpClass(Upper(field), name="gin_trgm_ops"),
+                    name=f"movie_{field}_trgm_idx",
+                )
+                for field in ("title", "tagline", "overview")
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class MovieRating(models.Model):
-    """Rating movies by spectators"""
+class LoadedScoreMixin:
+    """Remembers the stored score, to move ratings between histogram buckets."""
+
+    loaded_score = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_score = instance.__dict__.get("score")
+        return instance
+
+
+class MovieRating(LoadedScoreMixin, models.Model):
+    """
+    Rating movies by spectators
+
+    The table is range partitioned by month of `created_at` (see
+    movies.partitions), its primary key is (id, created_at). Partitions cannot
+    enforce `unique_together` without the partition key, `MovieRatingKey`
+    enforces it instead.
+    """
 
     spectator = models.ForeignKey(
         Spectator,
@@ -136,12 +216,47 @@ class MovieRating(models.Model):
         verbose_name_plural = "Movie Ratings"
         unique_together = ["spectator", "movie"]
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["movie", "created_at"],
+                name="movierating_movie_created_idx",
+            ),
+            # ratings of the last days across all movies (trending)
+            models.Index(fields=["created_at"], name="movierating_created_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(score__gte=1, score__lte=10),
+                name="movierating_score_range",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.spectator} rated {self.movie}: {self.score}/10"
 
 
-class AuthorRating(models.Model):
+class MovieRatingKey(models.Model):
+    """
+    Unique (spectator, movie) of a movie rating, with the rating ID and
+    created_at locating its partition. Written by a trigger on the ratings
+    table, never by the application.
+    """
+
+    pk = models.CompositePrimaryKey("spectator_id", "movie_id")
+    spectator_id = models.BigIntegerField()
+    movie_id = models.BigIntegerField()
+    rating_id = models.BigIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Movie Rating Key"
+        verbose_name_plural = "Movie Rating Keys"
+
+    def __str__(self):
+        return f"{self.spectator_id} rated {self.movie_id}: #{self.rating_id}"
+
+
+class AuthorRating(LoadedScoreMixin, models.Model):
     """Rating authors by spectators"""
 
     spectator = models.ForeignKey(
@@ -168,6 +283,20 @@ class AuthorRating(models.Model):
         verbose_name_plural = "Author Ratings"
         unique_together = ["spectator", "author"]
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["author", "created_at"],
+                name="authrating_author_created_idx",
+            ),
+            # ratings of the last days across all authors (trending)
+            models.Index(fields=["created_at"], name="authrating_created_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(score__gte=1, score__lte=10),
+                name="authrating_score_range",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.spectator} rated {self.author}: {self.score}/10"
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Cursor pagination over newest first `created_at` ordering"""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+
+def estimated_row_count(model, using="default"):
+    """
+    Planner estimate of the number of rows of a model table
+
+    Args:
+        model (type): model class
+        using (str): database alias
+
+    Returns:
+        int: `pg_class.reltuples`, -1 when the table was never analyzed
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator counting unfiltered changelists from the planner estimate
+    once the table holds more than ADMIN_ESTIMATED_COUNT_THRESHOLD rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        using = getattr(queryset, "db", None)
+        if (
+            using
+            and connections[using].vendor == "postgresql"
+            and not queryset.query.where
+        ):
+            estimate = estimated_row_count(queryset.model, using)
+            if estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,137 @@
+"""
+Monthly partitions of movie ratings, and their archival.
+
+`movies_movierating` is range partitioned on `created_at`, one partition per
+month (UTC) named `movies_movierating_YYYY_MM`, with a default partition for
+rows outside of them. `create_partitions` adds the partitions of the current
+and next RATING_PARTITIONS_AHEAD months; it runs after each migrate and as the
+`movies.create_rating_partitions` job of JOB_SCHEDULE, so new ratings rarely
+land in the default partition. When they do, creating their month's partition
+moves them out of it.
+
+`archive_partition` moves a cold partition out of the table: it is detached,
+its ratings are taken out of the movie histograms and of `MovieRatingKey` (the
+spectators may rate the movies again), then it is written to a gzipped CSV
+file and dropped. Detaching and dropping log nothing to the change feed.
+"""
+
+import gzip
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from .models import Movie
+from .scores import remove_ratings
+from .signals import invalidate_on_commit
+
+PARENT = "movies_movierating"
+
+PARTITION = re.compile(r"^movies_movierating_(\d{4})_(\d{2})$")
+
+# longest wait of archive_partition for the lock of the ratings table
+LOCK_TIMEOUT = "5s"
+
+
+def create_partitions(ahead=None, using=DEFAULT_DB_ALIAS):
+    """
+    Create the missing partitions up to `ahead` months from now
+
+    Args:
+        ahead (int): months, RATING_PARTITIONS_AHEAD by default
+        using (str): database alias
+
+    Returns:
+        list: names of the created partitions
+    """
+    if ahead is None:
+        ahead = settings.RATING_PARTITIONS_AHEAD
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT movies_create_rating_partitions("
+            "now(), now() + make_interval(months => %s))",
+            [ahead],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def partitions():
+    """
+    Monthly partitions, attached or left detached by an interrupted archive
+
+    Returns:
+        dict: name -> (first day of the month, attached)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, relispartition FROM pg_class "
+            "WHERE relkind = 'r' AND relname LIKE %s",
+            [f"{PARENT}\\_%"],
+        )
+        rows = cursor.fetchall()
+    found = {}
+    for name, attached in rows:
+        if match := PARTITION.match(name):
+            found[name] = (date(int(match[1]), int(match[2]), 1), attached)
+    return dict(sorted(found.items()))
+
+
+def cold_partitions(months):
+    """Names of the partitions whose ratings are all older than `months` months."""
+    today = timezone.now().date()
+    index = today.year * 12 + today.month - 1 - months
+    cutoff = date(index // 12, index % 12 + 1, 1)
+    return [name for name, (month, _) in partitions().items() if month < cutoff]
+
+
+def archive_partition(name, directory):
+    """
+    Detach a partition, write it to `directory`/<name>.csv.gz and drop it
+
+    Safe to run again after a failure: a detached partition is archived again
+    and the file replaced.
+
+    Returns:
+        int: number of archived ratings
+    """
+    attached = partitions()[name][1]
+    table = connection.ops.quote_name(name)
+    if attached:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # fail rather than queue every rating behind the detach
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)", [LOCK_TIMEOUT]
+            )
+            cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {table}")
+            cursor.execute(
+                f"DELETE FROM movies_movieratingkey AS key USING {table} AS rating "
+                "WHERE key.spectator_id = rating.spectator_id "
+                "AND key.movie_id = rating.movie_id AND key.rating_id = rating.id"
+            )
+            cursor.execute(
+                f"SELECT movie_id, score, COUNT(*) FROM {table} "
+                "GROUP BY movie_id, score"
+            )
+            changed = remove_ratings(Movie, cursor.fetchall())
+            invalidate_on_commit(Movie, changed)
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.csv.gz"
+    partial = path.with_name(f"{path.name}.partial")
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        count = cursor.fetchone()[0]
+        with (
+            gzip.open(partial, "wb") as archive,
+            cursor.copy(f"COPY {table} TO STDOUT (FORMAT csv, HEADER)") as copy,
+        ):
+            for data in copy:
+                archive.write(data)
+        os.replace(partial, path)
+        cursor.execute(f"DROP TABLE {table}")
+    return count
@@ -0,0 +1,43 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import CharField, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+
+from .models import Movie
+
+
+def count_subquery(queryset, field):
+    """Count rows of `queryset` grouped by `field`, as a correlated subquery."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(count=Count("*")).values("count")
+        ),
+        0,
+    )
+
+
+def author_names_subquery(limit):
+    """
+    Names of the first `limit` authors of each movie, as an array subquery.
+
+    Names follow `Author.__str__`: full name, or username when it is blank.
+    """
+    name = Coalesce(
+        NullIf(
+            Trim(
+                Concat(
+                    "author__first_name",
+                    Value(" "),
+                    "author__last_name",
+                    output_field=CharField(),
+                )
+            ),
+            Value(""),
+        ),
+        "author__username",
+    )
+    return ArraySubquery(
+        Movie.authors.through.objects.filter(movie=OuterRef("pk"))
+        .order_by("pk")
+        .annotate(name=name)
+        .values("name")[:limit]
+    )
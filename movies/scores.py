@@ -0,0 +1,214 @@
+"""
+Rating score histograms of movies and authors, and the derived evaluation.
+
+Histograms are moved incrementally when a rating is created, changed or
+deleted, with one UPDATE adding per bucket deltas, so concurrent ratings never
+overwrite each other; `remove_ratings` takes archived ratings out the same way.
+`recompute_scores` rebuilds every histogram from the ratings with set based
+UPDATEs of SCORES_RECOMPUTE_BATCH_SIZE objects, and derives `Movie.evaluation`
+from the average score using `MOVIE_EVALUATION_THRESHOLDS`. Each batch first
+locks its objects, waiting for the ratings that already shifted them, so the
+rebuilt histograms never drop a rating committed meanwhile.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import SCORES, Author, AuthorRating, Movie, MovieRating, empty_histogram
+
+# rated model -> (rating model, rated foreign key)
+RATED = {
+    Movie: (MovieRating, "movie"),
+    Author: (AuthorRating, "author"),
+}
+
+SHIFT_SQL = """
+    UPDATE {table} AS target
+    SET score_histogram = ARRAY(
+        SELECT GREATEST(bucket.count + bucket.delta, 0)
+        FROM unnest(target.score_histogram, shift.deltas)
+            WITH ORDINALITY AS bucket(count, delta, position)
+        ORDER BY bucket.position
+    )
+    FROM (VALUES {values}) AS shift(id, deltas)
+    WHERE target.{pk} = shift.id
+"""
+
+LOCK_SQL = """
+    SELECT 1 FROM {table}
+    WHERE {pk} BETWEEN %s AND %s
+    ORDER BY {pk}
+    FOR UPDATE
+"""
+
+RECOMPUTE_SQL = """
+    UPDATE {table} AS target
+    SET {assignments}
+    FROM (
+        SELECT
+            object.{pk} AS id,
+            COALESCE(ratings.histogram, %s::integer[]) AS histogram,
+            COALESCE(ratings.count, 0) AS count,
+            ratings.average
+        FROM {table} AS object
+        LEFT JOIN (
+            SELECT
+                {target_id} AS id,
+                ARRAY[{buckets}]::integer[] AS histogram,
+                COUNT(*) AS count,
+                AVG(score) AS average
+            FROM {rating_table}
+            WHERE {target_id} BETWEEN %s AND %s
+            GROUP BY {target_id}
+        ) AS ratings ON ratings.id = object.{pk}
+        WHERE object.{pk} BETWEEN %s AND %s
+    ) AS scores
+    WHERE target.{pk} = scores.id
+        AND ({columns}) IS DISTINCT FROM ({values})
+"""
+
+
+def shift_histograms(model, changes):
+    """
+    Move ratings between the score buckets of rated objects
+
+    Args:
+        model (type): Movie or Author
+        changes (list): (object ID, previous score, new score) tuples, the
+            previous score is None for new ratings and the new one for deleted
+
+    Returns:
+        list: IDs of the objects whose histogram changed
+    """
+    deltas = defaultdict(empty_histogram)
+    for pk, previous, score in changes:
+        if previous == score:
+            continue
+        if previous is not None:
+            deltas[pk][previous - SCORES.start] -= 1
+        if score is not None:
+            deltas[pk][score - SCORES.start] += 1
+    return _shift(model, deltas)
+
+
+def remove_ratings(model, counts):
+    """
+    Take ratings out of the histograms of rated objects
+
+    Args:
+        model (type): Movie or Author
+        counts (iterable): (object ID, score, number of ratings) tuples
+
+    Returns:
+        list: IDs of the objects whose histogram changed
+    """
+    deltas = defaultdict(empty_histogram)
+    for pk, score, count in counts:
+        deltas[pk][score - SCORES.start] -= count
+    return _shift(model, deltas)
+
+
+def _shift(model, deltas):
+    """Add per bucket deltas to histograms, returns the shifted IDs."""
+    if not deltas:
+        return []
+
+    # a stable order keeps concurrent shifts from deadlocking
+    pks = sorted(deltas)
+    sql = SHIFT_SQL.format(
+        table=model._meta.db_table,
+        pk=model._meta.pk.column,
+        values=", ".join(["(%s, %s::integer[])"] * len(pks)),
+    )
+    params = [param for pk in pks for param in (pk, deltas[pk])]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+    return pks
+
+
+def _evaluation_sql():
+    """CASE expression deriving the evaluation, and its parameters."""
+    thresholds = sorted(
+        settings.MOVIE_EVALUATION_THRESHOLDS.items(),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    whens = " ".join(["WHEN scores.average >= %s THEN %s"] * len(thresholds))
+    sql = f"CASE WHEN scores.count < %s THEN target.evaluation {whens} ELSE %s END"
+    params = [settings.MOVIE_EVALUATION_MIN_RATINGS]
+    for evaluation, threshold in thresholds:
+        params += [threshold, evaluation]
+    params.append(Movie.Evaluation.TERRIBLE.value)
+    return sql, params
+
+
+def recompute_scores(model, batch_size=None, progress=None):
+    """
+    Rebuild the histograms of a rated model from its ratings
+
+    Movies rated at least `MOVIE_EVALUATION_MIN_RATINGS` times also get their
+    evaluation derived from their average score. Only changed rows are written,
+    `batch_size` objects per UPDATE, each batch in its own transaction.
+
+    Args:
+        model (type): Movie or Author
+        batch_size (int): objects per UPDATE, SCORES_RECOMPUTE_BATCH_SIZE by default
+        progress (callable): called with the done and total numbers of objects
+            after each batch
+
+    Returns:
+        int: number of updated objects
+    """
+    rating_model, target = RATED[model]
+    # column -> (new value expression, its parameters)
+    values = {"score_histogram": ("scores.histogram", [])}
+    if model is Movie:
+        values["evaluation"] = _evaluation_sql()
+
+    sql = RECOMPUTE_SQL.format(
+        table=model._meta.db_table,
+        pk=model._meta.pk.column,
+        rating_table=rating_model._meta.db_table,
+        target_id=rating_model._meta.get_field(target).column,
+        buckets=", ".join(
+            f"COUNT(*) FILTER (WHERE score = {score})" for score in SCORES
+        ),
+        assignments=", ".join(
+            f"{column} = {value}" for column, (value, _) in values.items()
+        ),
+        columns=", ".join(f"target.{column}" for column in values),
+        values=", ".join(value for value, _ in values.values()),
+    )
+    value_params = [param for _, params in values.values() for param in params]
+    lock_sql = LOCK_SQL.format(table=model._meta.db_table, pk=model._meta.pk.column)
+    batch_size = batch_size or settings.SCORES_RECOMPUTE_BATCH_SIZE
+    total = model.objects.count()
+    pks = model.objects.order_by("pk").values_list("pk", flat=True)
+    done = updated = 0
+    last = None
+    with connection.cursor() as cursor:
+        while True:
+            # walk the primary key, each batch aggregates the ratings of its
+            # objects only
+            batch = list(
+                (pks if last is None else pks.filter(pk__gt=last))[:batch_size]
+            )
+            if not batch:
+                break
+            bounds = [batch[0], batch[-1]]
+            with transaction.atomic():
+                # in the pk order of shifts, the aggregation below then reads
+                # the ratings of every shift done so far, later ones wait
+                cursor.execute(lock_sql, bounds)
+                cursor.execute(
+                    sql,
+                    [*value_params, empty_histogram(), *bounds, *bounds, *value_params],
+                )
+                updated += cursor.rowcount
+            done += len(batch)
+            last = batch[-1]
+            if progress:
+                progress(done, total)
+    return updated
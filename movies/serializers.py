@@ -1,9 +1,85 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, OuterRef, Prefetch
 from rest_framework import serializers
 
-from .models import Author, AuthorRating, Movie, MovieRating
+from core.models import Change
 
+from .models import Author, AuthorRating, Movie, MovieRating, Spectator
 
-class AuthorNestedSerializer(serializers.ModelSerializer):
+
+class ExpandableFieldsMixin:
+    """
+    Sparse fieldsets and expandable relations for model serializers.
+
+    `fields` selects the top level fields and `expand` lists the nested
+    relations to embed, dotted paths reaching into nested serializers
+    (`movies.authors`). Once either is given, nested relations are only
+    rendered when expanded. Without both, the full representation is kept.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            return
+
+        nested_expand = {}
+        for path in expand or []:
+            name, _, rest = path.partition(".")
+            nested_expand.setdefault(name, [])
+            if rest:
+                nested_expand[name].append(rest)
+
+        for name, field in list(self.fields.items()):
+            nested = getattr(field, "child", field)
+            if isinstance(nested, ExpandableFieldsMixin):
+                if name not in nested_expand:
+                    self.fields.pop(name)
+                    continue
+                extra_kwargs = {} if field.source == name else {"source": field.source}
+                self.fields[name] = type(nested)(
+                    many=field is not nested,
+                    read_only=True,
+                    expand=nested_expand[name],
+                    **extra_kwargs,
+                )
+            elif fields is not None and name not in fields:
+                self.fields.pop(name)
+
+    def optimize_queryset(self, queryset, extra_columns=()):
+        """
+        Restrict `queryset` to the columns and prefetches the selected fields
+        need, recursing into expanded relations.
+        """
+        model = self.Meta.model
+        columns = list(extra_columns)
+        prefetches = []
+        for field in self.fields.values():
+            nested = getattr(field, "child", field)
+            if isinstance(nested, ExpandableFieldsMixin):
+                relation = model._meta.get_field(field.source)
+                # reverse foreign keys need their join column on the prefetched rows
+                related_columns = [relation.field.name] if relation.one_to_many else []
+                prefetches.append(
+                    Prefetch(
+                        field.source,
+                        queryset=nested.optimize_queryset(
+                            relation.related_model._default_manager.all(),
+                            related_columns,
+                        ),
+                    )
+                )
+                continue
+            try:
+                model_field = model._meta.get_field(field.source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(model_field.name)
+        return queryset.only(*columns).prefetch_related(*prefetches)
+
+
+class AuthorNestedSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Nested serializer for Author"""
 
     class Meta:
@@ -11,17 +87,38 @@ class AuthorNestedSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "biography", "nationality"]
 
 
-class MovieSerializer(serializers.ModelSerializer):
+class MovieSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Serializer for a Movie."""
 
     authors = AuthorNestedSerializer(many=True, read_only=True)
+    is_favorite = serializers.BooleanField(read_only=True, default=False)
 
     class Meta:
         model = Movie
-        fields = ["id", "title", "release_date", "status", "authors"]
+        fields = ["id", "title", "release_date", "status", "authors", "is_favorite"]
+
+    def optimize_queryset(self, queryset, extra_columns=()):
+        queryset = super().optimize_queryset(queryset, extra_columns)
+        request = self.context.get("request")
+        if "is_favorite" in self.fields and request and request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorite=Exists(
+                    Spectator.favorite_movies.through.objects.filter(
+                        spectator_id=request.user.pk, movie=OuterRef("pk")
+                    )
+                )
+            )
+        return queryset
+
+
+class MovieDetailSerializer(MovieSerializer):
+    """Movie with its rating score histogram (detail endpoint)."""
 
+    class Meta(MovieSerializer.Meta):
+        fields = [*MovieSerializer.Meta.fields, "score_histogram"]
 
-class AuthorRatingSerializer(serializers.ModelSerializer):
+
+class AuthorRatingSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Rating authors serializer"""
 
     class Meta:
@@ -30,7 +127,7 @@ class AuthorRatingSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Serializer for Author."""
 
     movies = MovieSerializer(many=True, read_only=True)
@@ -50,6 +147,40 @@ class AuthorSerializer(serializers.ModelSerializer):
         ]
 
 
+class AuthorSummarySerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    """Author with relation counts instead of embedded relations (API v2)."""
+
+    movie_count = serializers.IntegerField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Author
+        fields = [
+            "id",
+            "first_name",
+            "last_name",
+            "biography",
+            "birthdate",
+            "nationality",
+            "movie_count",
+            "rating_count",
+        ]
+
+
+class AuthorDetailSerializer(AuthorSerializer):
+    """Author with their rating score histogram (detail endpoint)."""
+
+    class Meta(AuthorSerializer.Meta):
+        fields = [*AuthorSerializer.Meta.fields, "score_histogram"]
+
+
+class AuthorSummaryDetailSerializer(AuthorSummarySerializer):
+    """Author summary with their rating score histogram (API v2 detail)."""
+
+    class Meta(AuthorSummarySerializer.Meta):
+        fields = [*AuthorSummarySerializer.Meta.fields, "score_histogram"]
+
+
 class MovieRatingSerializer(serializers.ModelSerializer):
     """Serializer for rating movies."""
 
@@ -65,3 +196,162 @@ class MovieNestedSerializer(serializers.ModelSerializer):
     class Meta:
         model = Movie
         fields = ["id", "title", "release_date", "status"]
+
+
+class RatingBatchItemSerializer(serializers.Serializer):
+    """One movie or author rating of a batch"""
+
+    movie = serializers.IntegerField(required=False, min_value=1)
+    author = serializers.IntegerField(required=False, min_value=1)
+    score = serializers.IntegerField(min_value=1, max_value=10)
+    review = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate(self, attrs):
+        if ("movie" in attrs) == ("author" in attrs):
+            raise serializers.ValidationError(
+                "Exactly one of movie or author is required."
+            )
+        return attrs
+
+
+class RatingBatchSerializer(serializers.Serializer):
+    """Batch of movie and author ratings"""
+
+    ratings = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.RATING_BATCH_MAX_SIZE,
+    )
+
+
+RATING_BATCH_STATUSES = ["created", "updated", "invalid", "not_found"]
+
+
+class RatingBatchResultSerializer(serializers.Serializer):
+    """Outcome of one rating of a batch"""
+
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=RATING_BATCH_STATUSES)
+    id = serializers.IntegerField(required=False)
+    errors = serializers.JSONField(required=False)
+
+
+class FavoritesSyncSerializer(serializers.Serializer):
+    """Set of favorite movies to replace or merge into the spectator favorites"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.FAVORITES_SYNC_MAX_SIZE,
+    )
+    mode = serializers.ChoiceField(choices=["replace", "merge"], default="replace")
+
+    def validate_ids(self, value):
+        ids = set(value)
+        known = set(Movie.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        if unknown := ids - known:
+            raise serializers.ValidationError(
+                f"Unknown movie IDs: {', '.join(map(str, sorted(unknown)))}."
+            )
+        return ids
+
+
+class FavoritesSyncResultSerializer(serializers.Serializer):
+    """Favorite movies added and removed by a sync"""
+
+    added = serializers.ListField(child=serializers.IntegerField())
+    removed = serializers.ListField(child=serializers.IntegerField())
+
+
+class MovieFacetValueSerializer(serializers.Serializer):
+    """Number of matching movies with a facet value"""
+
+    value = serializers.JSONField(allow_null=True)
+    count = serializers.IntegerField()
+
+
+class MovieFacetsSerializer(serializers.Serializer):
+    """Most frequent values of each facet"""
+
+    status = MovieFacetValueSerializer(many=True)
+    source = MovieFacetValueSerializer(many=True)
+    original_language = MovieFacetValueSerializer(many=True)
+    adult = MovieFacetValueSerializer(many=True)
+    evaluation = MovieFacetValueSerializer(many=True)
+    release_year = MovieFacetValueSerializer(many=True)
+    vote_average = MovieFacetValueSerializer(
+        many=True, help_text="Vote averages by unit (7 for 7 to 7.99)"
+    )
+    author = MovieFacetValueSerializer(many=True, help_text="Author IDs")
+
+
+class MovieFacetsResultSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text="Number of matching movies")
+    facets = MovieFacetsSerializer()
+
+
+class StatsTotalsSerializer(serializers.Serializer):
+    """Catalogue totals"""
+
+    movie_count = serializers.IntegerField()
+    author_count = serializers.IntegerField()
+    budget_total = serializers.IntegerField()
+    revenue_total = serializers.IntegerField()
+    movie_rating_count = serializers.IntegerField()
+    author_rating_count = serializers.IntegerField()
+
+
+class StatsReleaseSerializer(serializers.Serializer):
+    """Movies released in a year with a status"""
+
+    release_year = serializers.IntegerField(allow_null=True)
+    status = serializers.ChoiceField(choices=Movie.Status.choices)
+    movie_count = serializers.IntegerField()
+    budget_total = serializers.IntegerField()
+    revenue_total = serializers.IntegerField()
+
+
+class StatsScoreSerializer(serializers.Serializer):
+    """Number of ratings with a score"""
+
+    score = serializers.IntegerField()
+    count = serializers.IntegerField()
+
+
+class StatsAuthorSerializer(serializers.Serializer):
+    """Author with their movie and rating counts"""
+
+    author_id = serializers.IntegerField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    movie_count = serializers.IntegerField()
+    rating_count = serializers.IntegerField()
+    average_score = serializers.FloatField(allow_null=True)
+
+
+class StatsSerializer(serializers.Serializer):
+    """Precomputed catalogue statistics"""
+
+    refreshed_at = serializers.DateTimeField()
+    totals = StatsTotalsSerializer()
+    releases = StatsReleaseSerializer(many=True)
+    movie_scores = StatsScoreSerializer(many=True)
+    author_scores = StatsScoreSerializer(many=True)
+    top_authors = StatsAuthorSerializer(many=True)
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    """Created, updated or deleted row of a tracked model"""
+
+    class Meta:
+        model = Change
+        fields = ["id", "model", "object_id", "action", "data", "created_at"]
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    """Page of the change feed"""
+
+    changes = ChangeSerializer(many=True)
+    next = serializers.CharField(help_text="Cursor of the next page (`since`)")
+    has_more = serializers.BooleanField(
+        help_text="More changes are ready, fetch the next page right away"
+    )
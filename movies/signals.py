@@ -0,0 +1,100 @@
+from functools import partial
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.invalidation import invalidation_bus
+
+from .cache import response_cache
+from .live import publish_on_commit
+from .models import Author, AuthorRating, Movie, MovieRating, Spectator
+from .scores import shift_histograms
+
+# representations cached by any process are dropped on change
+for model in (Movie, Author):
+    invalidation_bus.register(
+        model._meta.label_lower,
+        partial(response_cache.invalidate, model._meta.label_lower),
+    )
+
+
+def invalidate_on_commit(model, pks):
+    """Drop cached representations of objects, in every process, once committed."""
+    if response_cache.enabled:
+        invalidation_bus.invalidate(model._meta.label_lower, pks)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(pre_delete, sender=Movie)
+def movie_changed(sender, instance, **kwargs):
+    # author representations embed their movies
+    invalidate_on_commit(Movie, [instance.pk])
+    invalidate_on_commit(Author, instance.authors.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Author)
+@receiver(pre_delete, sender=Author)
+def author_changed(sender, instance, **kwargs):
+    # movie representations embed their authors
+    invalidate_on_commit(Author, [instance.pk])
+    invalidate_on_commit(Movie, instance.movies.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Movie.authors.through)
+def movie_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    instance_model, related_model = (Author, Movie) if reverse else (Movie, Author)
+    if action == "pre_clear":
+        related = instance.movies if reverse else instance.authors
+        pk_set = related.values_list("pk", flat=True)
+    invalidate_on_commit(instance_model, [instance.pk])
+    invalidate_on_commit(related_model, pk_set)
+
+
+@receiver(m2m_changed, sender=Spectator.favorite_movies.through)
+def favorites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        movies = [instance.pk]
+    elif action == "pre_clear":
+        movies = instance.favorite_movies.values_list("pk", flat=True)
+    else:
+        movies = pk_set
+    publish_on_commit(movies)
+
+
+@receiver(post_save, sender=AuthorRating)
+@receiver(post_delete, sender=AuthorRating)
+def author_rating_changed(sender, instance, **kwargs):
+    invalidate_on_commit(Author, [instance.author_id])
+
+
+def _shift_rating(rating, previous, score):
+    model, target = (
+        (Movie, "movie") if isinstance(rating, MovieRating) else (Author, "author")
+    )
+    changed = shift_histograms(
+        model, [(getattr(rating, f"{target}_id"), previous, score)]
+    )
+    # detail representations include the histogram
+    invalidate_on_commit(model, changed)
+    if model is Movie:
+        publish_on_commit(changed)
+
+
+@receiver(post_save, sender=MovieRating)
+@receiver(post_save, sender=AuthorRating)
+def rating_saved(sender, instance, created, **kwargs):
+    _shift_rating(instance, None if created else instance.loaded_score, instance.score)
+    instance.loaded_score = instance.score
+
+
+@receiver(post_delete, sender=MovieRating)
+@receiver(post_delete, sender=AuthorRating)
+def rating_deleted(sender, instance, **kwargs):
+    previous = instance.loaded_score
+    _shift_rating(instance, instance.score if previous is None else previous, None)
@@ -0,0 +1,96 @@
+"""
+Catalogue statistics served by /api/stats/.
+
+The aggregates live in materialized views (see migration 0011), so requests
+only read a few precomputed rows. The views are refreshed concurrently by
+`manage.py refresh_stats`, which is meant to run on a schedule: reads are never
+blocked, and the statistics are as old as the last refresh.
+"""
+
+from django.conf import settings
+from django.db import connection, connections, router
+
+from .models import Movie
+
+STATS_VIEWS = [
+    "movies_stats_summary",
+    "movies_stats_release",
+    "movies_stats_scores",
+    "movies_stats_authors",
+]
+
+SUMMARY_SQL = """
+    SELECT movie_count, author_count, budget_total, revenue_total,
+        movie_rating_count, author_rating_count, refreshed_at
+    FROM movies_stats_summary
+"""
+RELEASE_SQL = """
+    SELECT release_year, status, movie_count, budget_total, revenue_total
+    FROM movies_stats_release
+    ORDER BY release_year DESC NULLS LAST, status
+"""
+SCORES_SQL = """
+    SELECT target, score, rating_count
+    FROM movies_stats_scores
+    ORDER BY target, score
+"""
+AUTHORS_SQL = """
+    SELECT author_id, first_name, last_name, movie_count, rating_count,
+        average_score
+    FROM movies_stats_authors
+    ORDER BY movie_count DESC, author_id
+    LIMIT %s
+"""
+
+
+def _rows(cursor, sql, params=()):
+    cursor.execute(sql, params)
+    columns = [column.name for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def catalogue_stats():
+    """
+    Read the catalogue statistics from the materialized views
+
+    Returns:
+        dict: totals, movies per release year and status, rating score
+        distributions and the `STATS_TOP_AUTHORS` authors with most movies
+    """
+    alias = router.db_for_read(Movie)
+    with connections[alias].cursor() as cursor:
+        summary = _rows(cursor, SUMMARY_SQL)[0]
+        releases = _rows(cursor, RELEASE_SQL)
+        scores = _rows(cursor, SCORES_SQL)
+        authors = _rows(cursor, AUTHORS_SQL, [settings.STATS_TOP_AUTHORS])
+
+    distributions = {"movie": [], "author": []}
+    for row in scores:
+        distributions[row["target"]].append(
+            {"score": row["score"], "count": row["rating_count"]}
+        )
+    return {
+        "refreshed_at": summary.pop("refreshed_at"),
+        "totals": summary,
+        "releases": releases,
+        "movie_scores": distributions["movie"],
+        "author_scores": distributions["author"],
+        "top_authors": authors,
+    }
+
+
+def refresh_stats(concurrently=True):
+    """
+    Recompute the materialized views
+
+    Args:
+        concurrently (bool): refresh without blocking reads (slower)
+
+    Returns:
+        list: refreshed view names
+    """
+    option = " CONCURRENTLY" if concurrently else ""
+    with connection.cursor() as cursor:
+        for view in STATS_VIEWS:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW{option} {view}")
+    return STATS_VIEWS
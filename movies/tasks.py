@@ -0,0 +1,36 @@
+from django.core.management import call_command
+
+from core.jobs import report_progress, task
+
+from . import partitions, scores, stats
+
+
+@task
+def import_tmdb(count=50):
+    call_command("import_tmdb", count=count)
+
+
+@task
+def refresh_stats(concurrently=True):
+    return stats.refresh_stats(concurrently=concurrently)
+
+
+@task
+def recompute_scores():
+    updated = {}
+    for index, model in enumerate(scores.RATED):
+        message = f"Recomputing {model._meta.label}"
+
+        def progress(done, total, index=index, message=message):
+            # each model is an equal share of the job, the heartbeat is
+            # refreshed after every batch
+            share = done / total if total else 1
+            report_progress(index + share, len(scores.RATED), message)
+
+        updated[model._meta.label] = scores.recompute_scores(model, progress=progress)
+    return updated
+
+
+@task
+def create_rating_partitions():
+    return partitions.create_partitions()
@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import caches
 from rest_framework.test import APIClient
 
 from movies.models import Author, Movie, Spectator
@@ -22,6 +23,15 @@ def api_client_jwt(api_client, spectator):
     return api_client
 
 
+@pytest.fixture
+def response_cache(settings):
+    """Enable the response cache on a clean default cache."""
+    settings.RESPONSE_CACHE_ALIAS = "default"
+    caches["default"].clear()
+    yield
+    caches["default"].clear()
+
+
 @pytest.fixture
 def author(db):
     """Test author without movies."""
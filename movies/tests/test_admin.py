@@ -0,0 +1,152 @@
+from django.db import connection
+from django.urls import reverse
+
+from movies.models import Author, Movie, MovieRating, Spectator
+from movies.pagination import EstimatedCountPaginator
+
+
+class TestAuthorAdmin:
+    """Tests for the author changelist"""
+
+    def test_changelist_counts_movies(self, admin_client, author, author_with_movie):
+        url = reverse("admin:movies_author_changelist")
+        response = admin_client.get(url, {"o": "-6"})
+
+        assert response.status_code == 200
+        results = list(response.context["cl"].result_list)
+        assert [result.movie_count for result in results] == [1, 0]
+
+    def test_changelist_query_count_does_not_grow(
+        self, admin_client, author_with_movie, django_assert_max_num_queries
+    ):
+        for index in range(10):
+            author = Author.objects.create(username=f"author_{index}")
+            Movie.objects.create(title=f"Movie {index}").authors.add(author)
+
+        url = reverse("admin:movies_author_changelist")
+        with django_assert_max_num_queries(8):
+            admin_client.get(url)
+
+    def test_has_movies_filter(self, admin_client, author, author_with_movie):
+        url = reverse("admin:movies_author_changelist")
+
+        response = admin_client.get(url, {"has_movies": "yes"})
+        assert list(response.context["cl"].result_list) == [author_with_movie]
+
+        response = admin_client.get(url, {"has_movies": "no"})
+        assert list(response.context["cl"].result_list) == [author]
+
+
+class TestMovieAdmin:
+    """Tests for the movie changelist"""
+
+    def test_changelist_lists_author_names(
+        self, admin_client, movie_with_author, author_tmdb
+    ):
+        author_tmdb.first_name = "Jane"
+        author_tmdb.last_name = "Doe"
+        author_tmdb.save()
+        movie_with_author.authors.add(author_tmdb)
+
+        url = reverse("admin:movies_movie_changelist")
+        response = admin_client.get(url)
+
+        movie = response.context["cl"].result_list[0]
+        assert movie.author_names == ["test_author", "Jane Doe"]
+        assert movie.author_count == 2
+
+
+class TestAdminAutocomplete:
+    """Tests for the prefix based autocomplete"""
+
+    def test_movie_autocomplete_matches_title_prefix(
+        self, admin_client, movie, movie_with_author
+    ):
+        url = reverse("admin:autocomplete")
+        response = admin_client.get(
+            url,
+            {
+                "term": "movie w",
+                "app_label": "movies",
+                "model_name": "movierating",
+                "field_name": "movie",
+            },
+        )
+
+        assert response.status_code == 200
+        assert [result["id"] for result in response.json()["results"]] == [
+            str(movie_with_author.pk)
+        ]
+
+    def test_author_autocomplete_matches_last_name_prefix(
+        self, admin_client, author, author_tmdb
+    ):
+        author_tmdb.last_name = "Kurosawa"
+        author_tmdb.save()
+
+        url = reverse("admin:autocomplete")
+        response = admin_client.get(
+            url,
+            {
+                "term": "kuro",
+                "app_label": "movies",
+                "model_name": "movie_authors",
+                "field_name": "author",
+            },
+        )
+
+        assert [result["id"] for result in response.json()["results"]] == [
+            str(author_tmdb.pk)
+        ]
+
+
+class TestPaginatedInlines:
+    """Tests for the paginated rating inlines"""
+
+    def test_movie_ratings_inline_is_paginated(self, admin_client, movie):
+        spectators = [
+            Spectator.objects.create(username=f"spectator_{index}")
+            for index in range(25)
+        ]
+        MovieRating.objects.bulk_create(
+            [
+                MovieRating(spectator=spectator, movie=movie, score=5)
+                for spectator in spectators
+            ]
+        )
+        url = reverse("admin:movies_movie_change", args=[movie.pk])
+
+        response = admin_client.get(url)
+        formset = response.context["inline_admin_formsets"][1].formset
+        assert len(formset.forms) == 20
+        assert formset.has_next
+        assert "ratings-page=2" in response.content.decode()
+
+        response = admin_client.get(url, {"ratings-page": 2})
+        formset = response.context["inline_admin_formsets"][1].formset
+        assert len(formset.forms) == 5
+        assert not formset.has_next
+        assert formset.has_previous
+
+
+class TestEstimatedCountPaginator:
+    """Tests for the planner estimate based admin paginator"""
+
+    def test_unfiltered_count_uses_estimate(self, settings, movie, movie_tmdb):
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 0
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE movies_movie")
+
+        paginator = EstimatedCountPaginator(Movie.objects.all(), 10)
+        assert paginator.count == 2
+
+    def test_filtered_count_is_exact(self, settings, movie, movie_tmdb):
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 0
+        paginator = EstimatedCountPaginator(Movie.objects.filter(source="tmdb"), 10)
+
+        assert paginator.count == 1
+
+    def test_small_table_count_is_exact(self, movie):
+        paginator = EstimatedCountPaginator(Movie.objects.all(), 10)
+
+        assert paginator.count == 1
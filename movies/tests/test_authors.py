@@ -1,7 +1,7 @@
 from django.urls import reverse
 from rest_framework import status
 
-from movies.models import Author, AuthorRating
+from movies.models import Author, AuthorRating, Movie
 
 
 class TestAuthorList:
@@ -33,6 +33,80 @@ class TestAuthorList:
         assert response.data[0]["id"] == author_tmdb.pk
 
 
+class TestAuthorSparseFieldsets:
+    """Tests for ?fields= and ?expand= on authors"""
+
+    def test_list_authors_with_selected_fields(self, api_client, author_with_movie):
+        url = reverse("author-list")
+        response = api_client.get(url, {"fields": "id,first_name"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data[0]) == {"id", "first_name"}
+
+    def test_list_authors_expand_movies(self, api_client, author_with_movie):
+        url = reverse("author-list")
+        response = api_client.get(url, {"fields": "id", "expand": "movies"})
+
+        assert response.status_code == status.HTTP_200_OK
+        author_data = response.data[0]
+        assert set(author_data) == {"id", "movies"}
+        assert author_data["movies"][0]["title"] == "Test Movie"
+        assert "authors" not in author_data["movies"][0]
+
+    def test_list_authors_expand_nested_relation(self, api_client, author_with_movie):
+        url = reverse("author-list")
+        response = api_client.get(url, {"expand": "movies.authors,ratings"})
+
+        assert response.status_code == status.HTTP_200_OK
+        author_data = response.data[0]
+        assert author_data["ratings"] == []
+        movie_authors = author_data["movies"][0]["authors"]
+        assert movie_authors[0]["id"] == author_with_movie.pk
+
+    def test_unrequested_relations_are_not_fetched(
+        self, api_client, author_with_movie, django_assert_num_queries
+    ):
+        url = reverse("author-list")
+        with django_assert_num_queries(1):
+            response = api_client.get(url, {"fields": "id,last_name"})
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestAuthorMultiGet:
+    """Tests for fetching authors by ID list"""
+
+    def test_multi_get_authors(self, api_client, author, author_tmdb):
+        url = reverse("author-list")
+        response = api_client.get(url, {"ids": f"{author_tmdb.pk},{author.pk}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [data["id"] for data in response.data] == [author_tmdb.pk, author.pk]
+
+    def test_multi_get_applies_filters_to_cached_authors(
+        self, api_client, author, author_tmdb, response_cache
+    ):
+        url = reverse("author-list")
+        ids = f"{author_tmdb.pk},{author.pk}"
+        api_client.get(url, {"ids": ids})
+
+        response = api_client.get(url, {"ids": ids, "source": "tmdb"})
+
+        assert [data["id"] for data in response.data] == [author_tmdb.pk]
+
+    def test_cached_author_invalidated_on_movie_link(
+        self, api_client, author, response_cache, django_capture_on_commit_callbacks
+    ):
+        url = reverse("author-detail", kwargs={"pk": author.pk})
+        assert api_client.get(url).data["movies"] == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Movie.objects.create(title="New Movie").authors.add(author)
+
+        response = api_client.get(url)
+        assert response.data["movies"][0]["title"] == "New Movie"
+
+
 class TestAuthorRetrieve:
     """Tests for retrieving author"""
 
@@ -130,3 +204,61 @@ class TestAuthorRating:
         assert (
             AuthorRating.objects.filter(spectator=spectator, author=author).count() == 1
         )
+
+
+class TestAuthorSubResources:
+    """Tests for paginated author movies and ratings"""
+
+    def test_list_author_movies(self, api_client, author_with_movie):
+        Movie.objects.create(title="Second Movie").authors.add(author_with_movie)
+        url = reverse("author-movies", kwargs={"pk": author_with_movie.pk})
+        response = api_client.get(url, {"page_size": 1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["title"] == "Second Movie"
+        assert response.data["next"] is not None
+
+        response = api_client.get(response.data["next"])
+        assert response.data["results"][0]["title"] == "Test Movie"
+        assert response.data["next"] is None
+
+    def test_list_author_ratings(self, api_client, author, spectator):
+        AuthorRating.objects.create(spectator=spectator, author=author, score=6)
+        url = reverse("author-ratings", kwargs={"pk": author.pk})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 1
+        assert response.data["results"][0]["score"] == 6
+
+    def test_list_ratings_of_nonexistent_author(self, api_client, db):
+        url = reverse("author-ratings", kwargs={"pk": 99999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestAuthorSummaryVersion:
+    """Tests for relation counts returned by API v2"""
+
+    def test_retrieve_author_v2_returns_counts(
+        self, api_client, author_with_movie, spectator
+    ):
+        AuthorRating.objects.create(
+            spectator=spectator, author=author_with_movie, score=9
+        )
+        url = reverse("author-detail", kwargs={"pk": author_with_movie.pk})
+        response = api_client.get(url, HTTP_ACCEPT="application/json; version=2")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["movie_count"] == 1
+        assert response.data["rating_count"] == 1
+        assert "movies" not in response.data
+        assert "ratings" not in response.data
+
+    def test_retrieve_author_v1_embeds_relations(self, api_client, author_with_movie):
+        url = reverse("author-detail", kwargs={"pk": author_with_movie.pk})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["movies"]) == 1
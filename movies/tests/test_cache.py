@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from movies.cache import ResponseCache
+
+
+class TestSingleFlight:
+    """Tests for rebuilding missing and expired cache entries once"""
+
+    def test_concurrent_misses_build_once(self, response_cache):
+        cache = ResponseCache()
+        builds = []
+
+        def build(pks):
+            builds.append(pks)
+            time.sleep(0.1)
+            return {pk: {"id": pk} for pk in pks}
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(
+                    lambda _: cache.get_or_build("movies.movie", [1], "v", build),
+                    range(8),
+                )
+            )
+
+        assert builds == [[1]]
+        assert results == [{1: {"id": 1}}] * 8
+
+    def test_expired_entry_served_while_rebuilt(self, response_cache, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        cache = ResponseCache()
+        cache.set_many("movies.movie", {1: {"title": "Stale"}}, "v")
+        # another process is rebuilding it
+        cache.cache.add(cache._lock_key("movies.movie", 1, "v"), True)
+
+        result = cache.get_or_build("movies.movie", [1], "v", lambda pks: {})
+
+        assert result == {1: {"title": "Stale"}}
+
+    def test_waiters_build_unknown_objects_themselves(self, response_cache):
+        cache = ResponseCache()
+        started = threading.Event()
+
+        def slow_build(pks):
+            started.set()
+            time.sleep(0.1)
+            return {}
+
+        with ThreadPoolExecutor(1) as executor:
+            executor.submit(cache.get_or_build, "movies.movie", [1], "v", slow_build)
+            started.wait()
+            start = time.monotonic()
+            result = cache.get_or_build("movies.movie", [1], "v", lambda pks: {})
+
+        assert result == {}
+        assert time.monotonic() - start < 1
+
+
+class TestInvalidation:
+    """Tests for invalidations racing with the rebuild of entries"""
+
+    def test_invalidation_during_build_is_not_overwritten(self, response_cache):
+        cache = ResponseCache()
+
+        def build(pks):
+            # the object changes after it was read
+            cache.invalidate("movies.movie", pks)
+            return {pk: {"title": "Old"} for pk in pks}
+
+        assert cache.get_or_build("movies.movie", [1], "v", build) == {
+            1: {"title": "Old"}
+        }
+        assert cache.get_many("movies.movie", [1], "v") == {}
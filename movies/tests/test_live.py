@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import reverse
+
+from config.asgi import application
+from core.broker import LocalBroker, get_broker
+from movies.live import topic
+from movies.models import MovieRating
+
+
+class Client:
+    """Drives the live stream ASGI application"""
+
+    def __init__(self, query):
+        self.query = query
+        self.sent = asyncio.Queue()
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        await self.sent.put(message)
+
+    async def open(self):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/live/movies/",
+            "query_string": self.query.encode(),
+        }
+        self.task = asyncio.ensure_future(application(scope, self.receive, self.send))
+        return await self.next()
+
+    async def next(self):
+        return await asyncio.wait_for(self.sent.get(), 5)
+
+    async def events(self):
+        body = (await self.next())["body"].decode()
+        return [
+            json.loads(line.removeprefix("data: "))
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+
+    async def close(self):
+        self.gone.set()
+        await self.task
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLiveStream:
+    """Tests for the live movie stream"""
+
+    def test_stream_sends_states_then_changes(self, movie, spectator, api_client):
+        api_client.force_authenticate(spectator)
+
+        async def scenario():
+            client = Client(f"ids={movie.pk}")
+            start = await client.open()
+            assert start["status"] == 200
+            assert (b"content-type", b"text/event-stream") in start["headers"]
+            [state] = await client.events()
+            assert state["rating_count"] == 0
+            assert state["average_score"] is None
+
+            await sync_to_async(MovieRating.objects.create)(
+                spectator=spectator, movie=movie, score=7
+            )
+            [state] = await client.events()
+            assert state["rating_count"] == 1
+            assert state["average_score"] == 7
+
+            await sync_to_async(api_client.post)(
+                reverse("movie-favorite", args=[movie.pk])
+            )
+            [state] = await client.events()
+            assert state["favorite_count"] == 1
+
+            await client.close()
+            assert not get_broker().listening(topic(movie.pk))
+
+        async_to_sync(scenario)()
+
+    def test_favorites_changed_through_the_orm_are_published(self, movie, spectator):
+        async def scenario():
+            client = Client(f"ids={movie.pk}")
+            await client.open()
+            await client.events()
+
+            await sync_to_async(movie.favorited_by.add)(spectator)
+            [state] = await client.events()
+            assert state["favorite_count"] == 1
+
+            await sync_to_async(spectator.favorite_movies.clear)()
+            [state] = await client.events()
+            assert state["favorite_count"] == 0
+
+            await client.close()
+
+        async_to_sync(scenario)()
+
+    def test_heartbeat(self, movie, settings):
+        settings.LIVE_HEARTBEAT = 0.01
+
+        async def scenario():
+            client = Client(f"ids={movie.pk}")
+            await client.open()
+            await client.next()
+            assert (await client.next())["body"] == b": heartbeat\n\n"
+            await client.close()
+
+        async_to_sync(scenario)()
+
+    def test_followed_movies_are_limited(self, settings):
+        settings.LIVE_MAX_MOVIES = 2
+
+        async def scenario():
+            client = Client("ids=1,2,3")
+            assert (await client.open())["status"] == 400
+            client = Client("ids=a")
+            assert (await client.open())["status"] == 400
+
+        async_to_sync(scenario)()
+
+    def test_postgres_broker(self, settings):
+        settings.LIVE_BROKER = "core.broker.PostgresBroker"
+        broker = get_broker()
+
+        async def scenario():
+            subscription = broker.subscribe(["test"])
+            await asyncio.wait_for(broker.connected(), 5)
+            await sync_to_async(broker.publish)("test", {"value": 1})
+            assert await asyncio.wait_for(subscription.get(), 5) == [{"value": 1}]
+            subscription.close()
+
+        async_to_sync(scenario)()
+
+
+class TestSubscription:
+    """Tests for broker subscriptions"""
+
+    def test_slow_subscriber_only_gets_latest_states(self):
+        broker = LocalBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(["a", "b"])
+            for value in range(3):
+                broker.publish("a", value)
+            broker.publish("b", "b")
+            broker.publish("c", "c")
+            await asyncio.sleep(0)
+            assert await subscription.get() == [2, "b"]
+            subscription.close()
+            assert not broker.listening("a")
+
+        async_to_sync(scenario)()
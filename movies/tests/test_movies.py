@@ -1,7 +1,13 @@
+import datetime
+import json
+
+import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 
-from movies.models import MovieRating
+from core.invalidation import invalidation_bus
+from movies.models import Author, Movie, MovieRating
 
 
 class TestMovieList:
@@ -46,6 +52,241 @@ class TestMovieList:
         assert len(response.data) == 1
         assert response.data[0]["title"] == "TMDB Movie"
 
+    def test_list_movies_prefetches_authors(
+        self, api_client, movie, movie_with_author, django_assert_num_queries
+    ):
+        url = reverse("movie-list")
+        with django_assert_num_queries(2):
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.fixture
+def catalogue(db, author):
+    """Movies spread over the filtered fields."""
+    other_author = Author.objects.create_user(username="other_author", password="x")
+    movies = [
+        Movie.objects.create(
+            title="Old English",
+            release_date=datetime.date(1990, 5, 1),
+            original_language="en",
+            vote_average=6.5,
+            popularity=10,
+            evaluation="good",
+        ),
+        Movie.objects.create(
+            title="Recent French",
+            release_date=datetime.date(2020, 1, 1),
+            original_language="fr",
+            vote_average=8.2,
+            popularity=50,
+            evaluation="masterpiece",
+        ),
+        Movie.objects.create(
+            title="Recent Adult",
+            release_date=datetime.date(2021, 12, 31),
+            original_language="en",
+            adult=True,
+            vote_average=4.0,
+            popularity=5,
+            status="planned",
+        ),
+    ]
+    movies[0].authors.add(author, other_author)
+    movies[1].authors.add(author)
+    return movies
+
+
+class TestMovieFilters:
+    """Tests for the movie list filters"""
+
+    def titles(self, api_client, params):
+        response = api_client.get(reverse("movie-list"), params)
+        assert response.status_code == status.HTTP_200_OK
+        return {movie["title"] for movie in response.data}
+
+    def test_filter_by_release_year_range(self, api_client, catalogue):
+        params = {"release_year_min": 2020, "release_year_max": 2021}
+        assert self.titles(api_client, params) == {"Recent French", "Recent Adult"}
+
+    def test_filter_by_languages_and_adult(self, api_client, catalogue):
+        params = {"original_language": "en,fr", "adult": "false"}
+        assert self.titles(api_client, params) == {"Old English", "Recent French"}
+
+    def test_filter_by_vote_average_and_popularity(self, api_client, catalogue):
+        params = {"vote_average_min": 6, "popularity_max": 20}
+        assert self.titles(api_client, params) == {"Old English"}
+
+    def test_filter_by_author_and_evaluation(self, api_client, catalogue, author):
+        params = {"author": author.pk, "evaluation": "masterpiece"}
+        assert self.titles(api_client, params) == {"Recent French"}
+
+    def test_invalid_filter(self, api_client, db):
+        response = api_client.get(reverse("movie-list"), {"release_year_min": "x"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "release_year_min" in response.data
+
+
+class TestMovieFacets:
+    """Tests for /api/movies/facets/"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def test_facet_counts(self, api_client, catalogue, author):
+        response = api_client.get(reverse("movie-facets"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+        facets = response.data["facets"]
+        assert facets["original_language"] == [
+            {"value": "en", "count": 2},
+            {"value": "fr", "count": 1},
+        ]
+        assert {"value": True, "count": 1} in facets["adult"]
+        assert {"value": 2020, "count": 1} in facets["release_year"]
+        assert {"value": 8, "count": 1} in facets["vote_average"]
+        # movies with two authors count once for each
+        assert facets["author"][0] == {"value": author.pk, "count": 2}
+        assert len(facets["author"]) == 2
+
+    def test_facets_of_filtered_movies(self, api_client, catalogue):
+        response = api_client.get(reverse("movie-facets"), {"original_language": "en"})
+
+        assert response.data["count"] == 2
+        assert response.data["facets"]["status"] == [
+            {"value": "planned", "count": 1},
+            {"value": "released", "count": 1},
+        ]
+
+    def test_facets_in_one_cached_query(
+        self, api_client, catalogue, django_assert_num_queries
+    ):
+        with django_assert_num_queries(1):
+            api_client.get(reverse("movie-facets"))
+        with django_assert_num_queries(0):
+            api_client.get(reverse("movie-facets"))
+
+
+class TestMovieSparseFieldsets:
+    """Tests for ?fields= and ?expand= on movies"""
+
+    def test_list_movies_with_selected_fields(self, api_client, movie_with_author):
+        url = reverse("movie-list")
+        response = api_client.get(url, {"fields": "id,title"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data[0]) == {"id", "title"}
+
+    def test_retrieve_movie_expand_authors(self, api_client, movie_with_author):
+        url = reverse("movie-detail", kwargs={"pk": movie_with_author.pk})
+        response = api_client.get(url, {"fields": "title", "expand": "authors"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {"title", "authors"}
+        assert len(response.data["authors"]) == 1
+
+
+class TestMovieMultiGet:
+    """Tests for fetching movies by ID list"""
+
+    def test_multi_get_keeps_input_order(self, api_client, movie, movie_with_author):
+        url = reverse("movie-list")
+        response = api_client.get(
+            url, {"ids": f"{movie_with_author.pk},99999,{movie.pk}"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [data["id"] for data in response.data] == [
+            movie_with_author.pk,
+            movie.pk,
+        ]
+
+    def test_multi_get_rejects_too_many_ids(self, api_client, settings, db):
+        settings.MULTI_GET_MAX_IDS = 2
+        url = reverse("movie-list")
+        response = api_client.get(url, {"ids": "1,2,3"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_multi_get_rejects_invalid_ids(self, api_client, db):
+        url = reverse("movie-list")
+        response = api_client.get(url, {"ids": "1,abc"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_multi_get_reads_through_cache(
+        self,
+        api_client,
+        movie,
+        movie_with_author,
+        response_cache,
+        django_assert_num_queries,
+    ):
+        url = reverse("movie-list")
+        ids = f"{movie.pk},{movie_with_author.pk}"
+        api_client.get(url, {"ids": ids, "fields": "id,title"})
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, {"ids": ids, "fields": "id,title"})
+
+        assert [data["title"] for data in response.data] == [
+            "Test Movie",
+            "Movie With Author",
+        ]
+
+    def test_cached_movie_is_favorite_per_user(
+        self, api_client, movie, spectator, response_cache
+    ):
+        url = reverse("movie-detail", kwargs={"pk": movie.pk})
+        assert api_client.get(url).data["is_favorite"] is False
+
+        spectator.favorite_movies.add(movie)
+        api_client.force_authenticate(user=spectator)
+        assert api_client.get(url).data["is_favorite"] is True
+
+    def test_cached_movie_invalidated_on_update(
+        self,
+        api_client,
+        movie,
+        spectator,
+        response_cache,
+        django_capture_on_commit_callbacks,
+    ):
+        url = reverse("movie-detail", kwargs={"pk": movie.pk})
+        api_client.get(url)
+
+        api_client.force_authenticate(user=spectator)
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.patch(url, {"title": "Updated Title"}, format="json")
+
+        response = api_client.get(url)
+        assert response.data["title"] == "Updated Title"
+
+    def test_cached_movies_invalidated_by_other_process(
+        self, api_client, movie, response_cache
+    ):
+        url = reverse("movie-detail", kwargs={"pk": movie.pk})
+        api_client.get(url)
+        Movie.objects.filter(pk=movie.pk).update(title="Updated Elsewhere")
+
+        # the whole model, as after a bulk import
+        invalidation_bus.receive(
+            json.dumps({"sender": "other", "label": "movies.movie"})
+        )
+
+        response = api_client.get(url)
+        assert response.data["title"] == "Updated Elsewhere"
+
+    def test_cached_retrieve_nonexistent_movie(self, api_client, response_cache, db):
+        url = reverse("movie-detail", kwargs={"pk": 99999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 
 class TestMovieRetrieve:
     """Tests for retrieving movie"""
@@ -134,6 +375,19 @@ class TestMovieRating:
         assert MovieRating.objects.filter(spectator=spectator, movie=movie).count() == 1
 
 
+class TestMovieRatingsList:
+    """Tests for paginated movie ratings"""
+
+    def test_list_movie_ratings(self, api_client, movie, spectator):
+        MovieRating.objects.create(spectator=spectator, movie=movie, score=4)
+        url = reverse("movie-ratings", kwargs={"pk": movie.pk})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["score"] == 4
+        assert response.data["next"] is None
+
+
 class TestMovieFavorite:
     """Tests favorite movies"""
 
@@ -165,3 +419,96 @@ class TestMovieFavorite:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data) == 1
         assert response.data[0]["id"] == movie.pk
+
+    def test_remove_movie_not_in_favorites(self, api_client, movie, spectator):
+        api_client.force_authenticate(user=spectator)
+        url = reverse("movie-favorite", kwargs={"pk": movie.pk})
+        response = api_client.delete(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_check_favorites_membership(
+        self, api_client, movie, movie_with_author, spectator
+    ):
+        api_client.force_authenticate(user=spectator)
+        spectator.favorite_movies.add(movie)
+
+        url = reverse("movie-my-favorites")
+        response = api_client.get(
+            url, {"ids": f"{movie_with_author.pk},{movie.pk},99999"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [movie.pk]
+
+    def test_check_favorites_rejects_too_many_ids(
+        self, api_client, spectator, settings
+    ):
+        settings.MULTI_GET_MAX_IDS = 2
+        api_client.force_authenticate(user=spectator)
+
+        response = api_client.get(reverse("movie-my-favorites"), {"ids": "1,2,3"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_sync_favorites_replace(
+        self, api_client, movie, movie_with_author, spectator
+    ):
+        api_client.force_authenticate(user=spectator)
+        spectator.favorite_movies.add(movie)
+
+        url = reverse("movie-my-favorites")
+        response = api_client.put(url, {"ids": [movie_with_author.pk]}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"added": [movie_with_author.pk], "removed": [movie.pk]}
+        assert list(spectator.favorite_movies.values_list("pk", flat=True)) == [
+            movie_with_author.pk
+        ]
+
+    def test_sync_favorites_merge(
+        self, api_client, movie, movie_with_author, spectator
+    ):
+        api_client.force_authenticate(user=spectator)
+        spectator.favorite_movies.add(movie)
+
+        url = reverse("movie-my-favorites")
+        response = api_client.put(
+            url,
+            {"ids": [movie.pk, movie_with_author.pk], "mode": "merge"},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"added": [movie_with_author.pk], "removed": []}
+        assert spectator.favorite_movies.count() == 2
+
+    def test_sync_favorites_unknown_movie(self, api_client, movie, spectator):
+        api_client.force_authenticate(user=spectator)
+
+        url = reverse("movie-my-favorites")
+        response = api_client.put(url, {"ids": [movie.pk, 99999]}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert spectator.favorite_movies.count() == 0
+
+    def test_list_movies_is_favorite(
+        self, api_client, movie, movie_with_author, spectator, django_assert_num_queries
+    ):
+        Movie.objects.create(title="Another Movie")
+        api_client.force_authenticate(user=spectator)
+        spectator.favorite_movies.add(movie)
+
+        url = reverse("movie-list")
+        with django_assert_num_queries(2):
+            response = api_client.get(url)
+
+        favorites = {data["id"]: data["is_favorite"] for data in response.data}
+        assert favorites[movie.pk] is True
+        assert favorites[movie_with_author.pk] is False
+
+    def test_list_movies_is_favorite_anonymous(self, api_client, movie):
+        url = reverse("movie-list")
+        response = api_client.get(url)
+
+        assert response.data[0]["is_favorite"] is False
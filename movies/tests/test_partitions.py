@@ -0,0 +1,81 @@
+import csv
+import gzip
+from datetime import UTC, datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+
+from core.models import Change
+from movies.models import Movie, MovieRating, MovieRatingKey
+from movies.partitions import create_partitions, partitions
+
+
+class TestRatingPartitions:
+    """Tests for the partitioned movie ratings and their archival"""
+
+    def test_rating_key_keeps_ratings_unique(self, movie, spectator):
+        rating = MovieRating.objects.create(spectator=spectator, movie=movie, score=4)
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            MovieRating.objects.create(spectator=spectator, movie=movie, score=8)
+
+        key = MovieRatingKey.objects.get()
+        assert (key.spectator_id, key.movie_id) == (spectator.pk, movie.pk)
+        assert (key.rating_id, key.created_at) == (rating.pk, rating.created_at)
+
+    def test_partitions_created_ahead(self, db):
+        names = create_partitions(ahead=6)
+
+        assert len(names) == 3
+        assert all(attached for _, attached in partitions().values())
+        assert create_partitions(ahead=6) == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rows_moved_out_of_default_partition(self, movie, spectator):
+        rating = MovieRating.objects.create(spectator=spectator, movie=movie, score=7)
+        MovieRating.objects.filter(pk=rating.pk).update(
+            created_at=datetime(2019, 3, 15, tzinfo=UTC)
+        )
+        changes = Change.objects.count()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT movies_create_rating_partitions(%s, %s)",
+                ["2019-03-01T00:00:00Z", "2019-03-31T00:00:00Z"],
+            )
+            assert cursor.fetchall() == [("movies_movierating_2019_03",)]
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM movies_movierating WHERE id = %s",
+                [rating.pk],
+            )
+            assert cursor.fetchone() == ("movies_movierating_2019_03",)
+
+        assert partitions()["movies_movierating_2019_03"][1]
+        assert MovieRatingKey.objects.get().rating_id == rating.pk
+        assert Change.objects.count() == changes
+
+    @pytest.mark.django_db(transaction=True)
+    def test_command_archives_cold_partitions(self, movie, spectator, tmp_path):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT movies_create_rating_partitions(%s, %s)",
+                ["2020-01-01T00:00:00Z", "2020-01-31T00:00:00Z"],
+            )
+        created_at = datetime(2020, 1, 15, tzinfo=UTC)
+        rating = MovieRating.objects.create(spectator=spectator, movie=movie, score=7)
+        MovieRating.objects.filter(pk=rating.pk).update(created_at=created_at)
+
+        call_command("archive_ratings", "--directory", tmp_path)
+
+        assert "movies_movierating_2020_01" not in partitions()
+        with gzip.open(tmp_path / "movies_movierating_2020_01.csv.gz", "rt") as file:
+            rows = list(csv.DictReader(file))
+        assert [(int(row["id"]), row["score"]) for row in rows] == [(rating.pk, "7")]
+        assert not MovieRating.objects.exists()
+        assert not MovieRatingKey.objects.exists()
+        movie = Movie.objects.get(pk=movie.pk)
+        assert movie.score_histogram == [0] * 10
+
+        # the spectator may rate the movie again
+        MovieRating.objects.create(spectator=spectator, movie=movie, score=9)
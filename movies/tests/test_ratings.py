@@ -0,0 +1,222 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework import status
+
+from movies.models import AuthorRating, Movie, MovieRating, Spectator
+from movies.scores import recompute_scores
+
+
+class TestRatingBatch:
+    """Tests for batch rating ingestion"""
+
+    def test_batch_rates_movies_and_authors(self, api_client, movie, author, spectator):
+        MovieRating.objects.create(spectator=spectator, movie=movie, score=3)
+        api_client.force_authenticate(user=spectator)
+        url = reverse("rating-batch")
+        response = api_client.post(
+            url,
+            {
+                "ratings": [
+                    {"movie": movie.pk, "score": 9, "review": "Better on rewatch"},
+                    {"author": author.pk, "score": 7},
+                    {"movie": 99999, "score": 5},
+                    {"movie": movie.pk, "author": author.pk, "score": 5},
+                    {"movie": movie.pk, "score": 11},
+                ]
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [result["status"] for result in response.data] == [
+            "updated",
+            "created",
+            "not_found",
+            "invalid",
+            "invalid",
+        ]
+        movie_rating = MovieRating.objects.get(spectator=spectator, movie=movie)
+        assert movie_rating.score == 9
+        assert movie_rating.review == "Better on rewatch"
+        assert response.data[0]["id"] == movie_rating.pk
+        assert AuthorRating.objects.get(spectator=spectator, author=author).score == 7
+
+    def test_batch_rejects_duplicates(self, api_client, movie, spectator):
+        api_client.force_authenticate(user=spectator)
+        url = reverse("rating-batch")
+        response = api_client.post(
+            url,
+            {
+                "ratings": [
+                    {"movie": movie.pk, "score": 4},
+                    {"movie": movie.pk, "score": 8},
+                ]
+            },
+            format="json",
+        )
+
+        assert [result["status"] for result in response.data] == ["created", "invalid"]
+        assert MovieRating.objects.get(spectator=spectator, movie=movie).score == 4
+
+    def test_batch_query_count_is_constant(
+        self, api_client, spectator, django_assert_max_num_queries
+    ):
+        movies = Movie.objects.bulk_create(
+            [Movie(title=f"Movie {index}") for index in range(20)]
+        )
+        api_client.force_authenticate(user=spectator)
+        url = reverse("rating-batch")
+        with django_assert_max_num_queries(6):
+            response = api_client.post(
+                url,
+                {"ratings": [{"movie": movie.pk, "score": 6} for movie in movies]},
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert MovieRating.objects.filter(spectator=spectator).count() == 20
+
+    def test_batch_requires_spectator(self, api_client, movie, author):
+        api_client.force_authenticate(user=author)
+        url = reverse("rating-batch")
+        response = api_client.post(
+            url, {"ratings": [{"movie": movie.pk, "score": 4}]}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def histogram(**counts):
+    """Histogram with the given counts, e.g. histogram(s8=1)."""
+    buckets = [0] * 10
+    for name, count in counts.items():
+        buckets[int(name[1:]) - 1] = count
+    return buckets
+
+
+class TestScoreHistograms:
+    """Tests for the movie and author score histograms"""
+
+    def test_rate_moves_ratings_between_buckets(self, api_client, movie, spectator):
+        api_client.force_authenticate(user=spectator)
+        url = reverse("movie-rate", kwargs={"pk": movie.pk})
+
+        api_client.post(url, {"score": 8}, format="json")
+        movie.refresh_from_db()
+        assert movie.score_histogram == histogram(s8=1)
+
+        api_client.post(url, {"score": 3}, format="json")
+        movie.refresh_from_db()
+        assert movie.score_histogram == histogram(s3=1)
+
+        MovieRating.objects.get(movie=movie).delete()
+        movie.refresh_from_db()
+        assert movie.score_histogram == histogram()
+
+    def test_batch_updates_histograms(self, api_client, movie, author, spectator):
+        MovieRating.objects.create(spectator=spectator, movie=movie, score=2)
+        api_client.force_authenticate(user=spectator)
+        api_client.post(
+            reverse("rating-batch"),
+            {
+                "ratings": [
+                    {"movie": movie.pk, "score": 9},
+                    {"author": author.pk, "score": 5},
+                ]
+            },
+            format="json",
+        )
+
+        movie.refresh_from_db()
+        author.refresh_from_db()
+        assert movie.score_histogram == histogram(s9=1)
+        assert author.score_histogram == histogram(s5=1)
+
+    def test_histogram_on_detail_only(self, api_client, movie, author, spectator):
+        AuthorRating.objects.create(spectator=spectator, author=author, score=7)
+
+        response = api_client.get(reverse("author-detail", kwargs={"pk": author.pk}))
+        assert response.data["score_histogram"] == histogram(s7=1)
+        response = api_client.get(reverse("movie-detail", kwargs={"pk": movie.pk}))
+        assert response.data["score_histogram"] == histogram()
+        response = api_client.get(reverse("movie-list"))
+        assert "score_histogram" not in response.data[0]
+
+    def test_recompute_rebuilds_histograms_and_evaluation(
+        self, movie, movie_with_author, settings
+    ):
+        settings.MOVIE_EVALUATION_MIN_RATINGS = 2
+        # one movie per batch
+        settings.SCORES_RECOMPUTE_BATCH_SIZE = 1
+        spectators = [
+            Spectator.objects.create_user(username=f"spectator_{index}")
+            for index in range(3)
+        ]
+        for spectator, score in zip(spectators, [9, 8, 9]):
+            MovieRating.objects.create(spectator=spectator, movie=movie, score=score)
+        MovieRating.objects.create(
+            spectator=spectators[0], movie=movie_with_author, score=2
+        )
+        Movie.objects.filter(pk=movie.pk).update(score_histogram=histogram(s1=5))
+
+        call_command("recompute_scores")
+
+        movie.refresh_from_db()
+        movie_with_author.refresh_from_db()
+        assert movie.score_histogram == histogram(s8=1, s9=2)
+        assert movie.evaluation == Movie.Evaluation.MASTERPIECE
+        # below MOVIE_EVALUATION_MIN_RATINGS, the evaluation is kept
+        assert movie_with_author.score_histogram == histogram(s2=1)
+        assert movie_with_author.evaluation == ""
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recompute_keeps_rating_committed_meanwhile(self, movie, spectator):
+        # a drifted histogram, rewritten by the recompute
+        Movie.objects.filter(pk=movie.pk).update(score_histogram=histogram(s1=5))
+        shifted = threading.Event()
+        release = threading.Event()
+
+        def rate():
+            try:
+                with transaction.atomic():
+                    MovieRating.objects.create(
+                        spectator=spectator, movie=movie, score=8
+                    )
+                    shifted.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def recompute():
+            try:
+                return recompute_scores(Movie)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(2) as executor:
+            rating = executor.submit(rate)
+            shifted.wait(5)
+            recomputed = executor.submit(recompute)
+            # the recompute waits for the lock held by the rating transaction
+            with connection.cursor() as cursor:
+                for _ in range(50):
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() "
+                        "AND wait_event_type = 'Lock'"
+                    )
+                    if cursor.fetchone()[0]:
+                        break
+                    time.sleep(0.1)
+            release.set()
+            rating.result()
+            recomputed.result()
+
+        movie.refresh_from_db()
+        assert movie.score_histogram == histogram(s8=1)
@@ -0,0 +1,61 @@
+import datetime
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from movies.models import AuthorRating, Movie, MovieRating
+
+
+class TestStats:
+    """Tests for the precomputed catalogue statistics"""
+
+    def test_stats_are_read_from_the_last_refresh(
+        self, api_client, movie_with_author, spectator, django_assert_num_queries
+    ):
+        call_command("refresh_stats")
+        Movie.objects.create(title="Unseen", budget=100)
+
+        with django_assert_num_queries(4):
+            response = api_client.get(reverse("stats"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["totals"]["movie_count"] == 1
+
+    def test_refresh_aggregates_the_catalogue(
+        self, api_client, movie_with_author, author, spectator
+    ):
+        Movie.objects.create(
+            title="Old", release_date=datetime.date(1999, 5, 1), budget=10, revenue=30
+        )
+        Movie.objects.create(
+            title="Older", release_date=datetime.date(1999, 1, 1), budget=5
+        )
+        MovieRating.objects.create(
+            spectator=spectator, movie=movie_with_author, score=8
+        )
+        AuthorRating.objects.create(spectator=spectator, author=author, score=6)
+
+        call_command("refresh_stats", blocking=True)
+        response = api_client.get(reverse("stats"))
+
+        assert response.data["totals"] == {
+            "movie_count": 3,
+            "author_count": 1,
+            "budget_total": 15,
+            "revenue_total": 30,
+            "movie_rating_count": 1,
+            "author_rating_count": 1,
+        }
+        assert response.data["releases"][0] == {
+            "release_year": 1999,
+            "status": "released",
+            "movie_count": 2,
+            "budget_total": 15,
+            "revenue_total": 30,
+        }
+        assert response.data["movie_scores"] == [{"score": 8, "count": 1}]
+        assert response.data["author_scores"] == [{"score": 6, "count": 1}]
+        assert response.data["top_authors"][0]["author_id"] == author.pk
+        assert response.data["top_authors"][0]["movie_count"] == 1
+        assert response.data["top_authors"][0]["average_score"] == 6.0
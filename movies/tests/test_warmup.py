@@ -0,0 +1,122 @@
+from datetime import timedelta
+from functools import partial
+
+import httpx
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from movies import warmup
+from movies.models import Author, AuthorRating, Movie, MovieRating
+
+
+@pytest.fixture
+def requested(monkeypatch):
+    """Paths requested by warm_caches, answered with 404 for unknown movies."""
+    paths = []
+
+    def handle(request):
+        paths.append(request.url.path)
+        code = 404 if request.url.path == "/api/movies/404/" else 200
+        return httpx.Response(code)
+
+    monkeypatch.setattr(
+        warmup.httpx,
+        "Client",
+        partial(httpx.Client, transport=httpx.MockTransport(handle)),
+    )
+    return paths
+
+
+@pytest.mark.django_db
+class TestWarmCaches:
+    """Tests for the cache warm-up command and the readiness probe"""
+
+    def test_hot_set_ranked_by_recent_ratings_then_popularity(self, spectator):
+        old, rated, popular, unknown = (
+            Movie.objects.create(title=title, popularity=popularity)
+            for title, popularity in [
+                ("Old", 1),
+                ("Rated", 2),
+                ("Popular", 9),
+                ("?", None),
+            ]
+        )
+        author = Author.objects.create_user(username="director", password="x")
+        rated.authors.add(author)
+        MovieRating.objects.create(spectator=spectator, movie=old, score=5)
+        MovieRating.objects.filter(movie=old).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        MovieRating.objects.create(spectator=spectator, movie=rated, score=5)
+
+        assert warmup.trending_movies(3) == [rated.pk, popular.pk, old.pk]
+        assert warmup.trending_authors(5, [rated.pk]) == [author.pk]
+
+        other = Author.objects.create_user(username="rated", password="x")
+        AuthorRating.objects.create(spectator=spectator, author=other, score=5)
+        assert warmup.trending_authors(1, [rated.pk]) == [other.pk]
+
+    def test_hot_set_ranked_by_access_log(self):
+        log = [
+            '1.2.3.4 - - [19/Oct/2026] "GET /api/movies/2/ HTTP/1.1" 200 10',
+            '1.2.3.4 - - [19/Oct/2026] "GET /api/movies/1/?fields=id HTTP/1.1" 200 1',
+            '1.2.3.4 - - [19/Oct/2026] "GET /api/movies/1/ HTTP/1.1" 200 10',
+            '1.2.3.4 - - [19/Oct/2026] "GET /api/authors/7/ HTTP/1.1" 200 10',
+            '1.2.3.4 - - [19/Oct/2026] "GET /api/movies/1/ratings/ HTTP/1.1" 200 2',
+        ]
+
+        assert warmup.logged_objects(log, 10, 10) == ([1, 2], [7])
+
+    def test_command_warms_hot_set_then_reports_ready(
+        self, api_client, movie, requested, settings, tmp_path, capsys
+    ):
+        settings.WARMUP_READY_FILE = str(tmp_path / "ready")
+        response = api_client.get(reverse("ready"))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        log = tmp_path / "access.log"
+        log.write_text(
+            f'"GET /api/movies/{movie.pk}/ HTTP/1.1"\n"GET /api/movies/404/ HTTP/1.1"\n'
+        )
+        call_command(
+            "warm_caches",
+            "--access-log",
+            log,
+            "--concurrency",
+            "2",
+            "--max-failures",
+            "0.5",
+        )
+
+        assert sorted(requested) == sorted(
+            [
+                *warmup.LIST_PATHS,
+                "/api/movies/",
+                f"/api/movies/{movie.pk}/",
+                "/api/movies/404/",
+            ]
+        )
+        assert "/api/movies/404/" in capsys.readouterr().err
+        response = api_client.get(reverse("ready"))
+        assert response.status_code == status.HTTP_200_OK
+
+        # a new deploy is not ready until warmed up again
+        call_command("warm_caches", "--reset")
+        response = api_client.get(reverse("ready"))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_command_not_ready_after_too_many_failures(
+        self, api_client, requested, settings, tmp_path
+    ):
+        settings.WARMUP_READY_FILE = str(tmp_path / "ready")
+        log = tmp_path / "access.log"
+        log.write_text('"GET /api/movies/404/ HTTP/1.1"\n')
+
+        with pytest.raises(CommandError, match="too many failures"):
+            call_command("warm_caches", "--access-log", log)
+
+        response = api_client.get(reverse("ready"))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -1,12 +1,21 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import AuthorViewSet, MovieViewSet
+from .views import (
+    AuthorViewSet,
+    ChangeFeedView,
+    MovieViewSet,
+    RatingBatchView,
+    StatsView,
+)
 
 router = DefaultRouter()
 router.register(r"authors", AuthorViewSet, basename="author")
 router.register(r"movies", MovieViewSet, basename="movie")
 
 urlpatterns = [
+    path("ratings/batch/", RatingBatchView.as_view(), name="rating-batch"),
+    path("stats/", StatsView.as_view(), name="stats"),
+    path("changes/", ChangeFeedView.as_view(), name="changes"),
     path("", include(router.urls)),
 ]
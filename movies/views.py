@@ -1,21 +1,257 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, OuterRef, Subquery, Value
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.changes import (
+    START,
+    changes_since,
+    format_cursor,
+    horizon,
+    parse_cursor,
+)
+from core.replicas import use_replica
 
-from .models import Author, AuthorRating, Movie, MovieRating, Spectator
+from .cache import response_cache
+from .facets import movie_facets
+from .filters import MOVIE_FILTER_PARAMETERS, filter_movies, movie_filters
+from .live import publish_on_commit
+from .models import (
+    Author,
+    AuthorRating,
+    Movie,
+    MovieRating,
+    MovieRatingKey,
+    Spectator,
+)
+from .pagination import CreatedAtCursorPagination
+from .queries import count_subquery
+from .scores import shift_histograms
 from .serializers import (
+    AuthorDetailSerializer,
     AuthorRatingSerializer,
     AuthorSerializer,
+    AuthorSummaryDetailSerializer,
+    AuthorSummarySerializer,
+    ChangeFeedSerializer,
+    FavoritesSyncResultSerializer,
+    FavoritesSyncSerializer,
+    MovieDetailSerializer,
+    MovieFacetsResultSerializer,
     MovieNestedSerializer,
     MovieRatingSerializer,
     MovieSerializer,
+    RatingBatchItemSerializer,
+    RatingBatchResultSerializer,
+    RatingBatchSerializer,
+    StatsSerializer,
+)
+from .signals import invalidate_on_commit
+from .stats import catalogue_stats
+
+FIELDS_PARAMETER = OpenApiParameter(
+    name="fields",
+    description="Comma separated list of top level fields to return",
+    required=False,
+)
+EXPAND_PARAMETER = OpenApiParameter(
+    name="expand",
+    description="Comma separated nested relations to embed (e.g. movies.authors)",
+    required=False,
 )
+IDS_PARAMETER = OpenApiParameter(
+    name="ids",
+    description=(
+        "Comma separated IDs to fetch, returned in the given order "
+        "(at most MULTI_GET_MAX_IDS)"
+    ),
+    required=False,
+)
+
+# query parameters of `?ids=` lookups that do not filter the objects
+MULTI_GET_PARAMS = {"ids", "fields", "expand", "format"}
+
+
+def split_query_param(value):
+    """Split a comma separated query parameter, None when it is absent."""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def favorite_flags(data):
+    """Yield the representations nested in `data` carrying an `is_favorite` flag."""
+    if isinstance(data, list):
+        for item in data:
+            yield from favorite_flags(item)
+    elif isinstance(data, dict):
+        if "is_favorite" in data:
+            yield data
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from favorite_flags(value)
+
+
+class MultiGetMixin:
+    """
+    Fetches objects by ID (`?ids=` on list, and retrieve) through the response
+    cache. Cached representations are shared by every user, so their
+    `is_favorite` flags are reset before caching and set again from a single
+    favorites query per request.
+    """
+
+    def list(self, request, *args, **kwargs):
+        ids = split_query_param(request.query_params.get("ids"))
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+
+        if not all(pk.isdigit() for pk in ids):
+            raise ValidationError({"ids": "IDs must be integers."})
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+        if len(ids) > settings.MULTI_GET_MAX_IDS:
+            raise ValidationError(
+                {"ids": f"At most {settings.MULTI_GET_MAX_IDS} IDs can be requested."}
+            )
+
+        if set(request.query_params) - MULTI_GET_PARAMS:
+            # cached representations are not filtered, keep the matching IDs
+            matching = set(
+                self.get_queryset().filter(pk__in=ids).values_list("pk", flat=True)
+            )
+            ids = [pk for pk in ids if pk in matching]
+
+        representations = self.get_representations(ids)
+        return Response([representations[pk] for pk in ids if pk in representations])
 
+    def retrieve(self, request, *args, **kwargs):
+        if not response_cache.enabled:
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = str(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        representations = self.get_representations([int(pk)] if pk.isdigit() else [])
+        if not representations:
+            raise NotFound()
+        return Response(representations[int(pk)])
+
+    def get_representations(self, ids):
+        """Serialized objects by primary key, read through the response cache."""
+        model = self.get_serializer_class().Meta.model
+        label = model._meta.label_lower
+        params = self.request.query_params
+        variant = response_cache.variant(
+            self.request.version,
+            self.get_serializer_class().__name__,
+            sorted(split_query_param(params.get("fields")) or []),
+            sorted(split_query_param(params.get("expand")) or []),
+            params.get("fields") is None and params.get("expand") is None,
+        )
+
+        def build(missing):
+            objects = list(self.get_queryset().filter(pk__in=missing))
+            serializer = self.get_serializer(objects, many=True)
+            fresh = {obj.pk: data for obj, data in zip(objects, serializer.data)}
+            for item in favorite_flags(list(fresh.values())):
+                item["is_favorite"] = False
+            return fresh
+
+        representations = response_cache.get_or_build(label, ids, variant, build)
+        self.personalize(model, representations)
+        return representations
+
+    def personalize(self, model, representations):
+        """Set the `is_favorite` flags of the current user."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return
+
+        flagged = []
+        for pk, data in representations.items():
+            for item in favorite_flags(data):
+                # top level movies may be rendered without their id
+                movie_id = pk if item is data and model is Movie else item.get("id")
+                flagged.append((movie_id, item))
+        if not flagged:
+            return
+
+        favorites = set(
+            Spectator.favorite_movies.through.objects.filter(
+                spectator_id=user.pk,
+                movie_id__in={movie_id for movie_id, _ in flagged},
+            ).values_list("movie_id", flat=True)
+        )
+        for movie_id, item in flagged:
+            item["is_favorite"] = movie_id in favorites
+
+
+class SubResourceMixin:
+    """Cursor paginated listing of a relation of the current object."""
+
+    def list_subresource(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class AuthorViewSet(viewsets.ModelViewSet):
+
+class SparseFieldsetMixin:
+    """
+    Applies `?fields=` and `?expand=` to read actions and trims the queryset
+    to what the selected fields need.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            params = self.request.query_params
+            kwargs.setdefault("fields", split_query_param(params.get("fields")))
+            kwargs.setdefault("expand", split_query_param(params.get("expand")))
+        return super().get_serializer(*args, **kwargs)
+
+    def optimize_queryset(self, queryset):
+        if self.action not in self.sparse_actions:
+            return queryset
+        return self.get_serializer().optimize_queryset(queryset)
+
+
+class ReplicaReadMixin:
+    """
+    Serves the catalogue reads from a replica, unless the user wrote recently.
+    """
+
+    replica_actions = ("list", "retrieve", "movies", "ratings", "facets")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == "GET" and self.action in self.replica_actions:
+            self._replica = use_replica(request.user)
+            self._replica.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if replica := getattr(self, "_replica", None):
+            self._replica = None
+            replica.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class AuthorViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    MultiGetMixin,
+    SubResourceMixin,
+    viewsets.ModelViewSet,
+):
     """
     API to manage authors.
     """
@@ -26,11 +262,30 @@ class AuthorViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        queryset = Author.objects.prefetch_related("movies").all()
+        queryset = Author.objects.all()
         source = self.request.query_params.get("source")
         if source:
             queryset = queryset.filter(source=source)
-        return queryset
+        if issubclass(self.get_serializer_class(), AuthorSummarySerializer):
+            queryset = queryset.annotate(
+                movie_count=count_subquery(
+                    Movie.authors.through.objects.filter(author=OuterRef("pk")),
+                    "author",
+                ),
+                rating_count=count_subquery(
+                    AuthorRating.objects.filter(author=OuterRef("pk")), "author"
+                ),
+            )
+        return self.optimize_queryset(queryset)
+
+    def get_serializer_class(self):
+        # API v2 returns relation counts, relations are paginated sub-resources
+        summary = self.request.version == "2" and self.action in self.sparse_actions
+        if self.action == "retrieve":
+            return AuthorSummaryDetailSerializer if summary else AuthorDetailSerializer
+        if summary:
+            return AuthorSummarySerializer
+        return super().get_serializer_class()
     
     @extend_schema(
         summary="List all authors",
@@ -42,6 +297,9 @@ class AuthorViewSet(viewsets.ModelViewSet):
                 required=False,
                 enum=["admin", "tmdb"],
             ),
+            IDS_PARAMETER,
+            FIELDS_PARAMETER,
+            EXPAND_PARAMETER,
         ],
         responses={200: AuthorSerializer(many=True)},
     )
@@ -51,7 +309,8 @@ class AuthorViewSet(viewsets.ModelViewSet):
     @extend_schema(
         summary="Retrieve an author",
         description="Returns a specific author.",
-        responses={200: AuthorSerializer},
+        parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER],
+        responses={200: AuthorDetailSerializer},
     )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
@@ -103,10 +362,14 @@ class AuthorViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         serializer_class=AuthorRatingSerializer,
     )
+    @transaction.atomic
     def rate(self, request, pk=None):
         author = self.get_object()
         try:
-            spectator = Spectator.objects.get(pk=request.user.pk)
+            # one at a time with the rating batches of the spectator
+            spectator = Spectator.objects.select_for_update(of=("self",)).get(
+                pk=request.user.pk
+            )
         except Spectator.DoesNotExist:
             return Response(
                 {"detail": "Only spectators can rate authors."},
@@ -131,8 +394,47 @@ class AuthorViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
 
+    @extend_schema(
+        summary="List author movies",
+        description="Cursor paginated filmography of an author, newest first.",
+        responses={200: MovieSerializer(many=True)},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=MovieSerializer,
+        pagination_class=CreatedAtCursorPagination,
+    )
+    def movies(self, request, pk=None):
+        author = self.get_object()
+        queryset = self.get_serializer().optimize_queryset(
+            Movie.objects.filter(authors=author)
+        )
+        return self.list_subresource(queryset)
 
-class MovieViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        summary="List author ratings",
+        description="Cursor paginated ratings of an author, newest first.",
+        responses={200: AuthorRatingSerializer(many=True)},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=AuthorRatingSerializer,
+        pagination_class=CreatedAtCursorPagination,
+    )
+    def ratings(self, request, pk=None):
+        author = self.get_object()
+        return self.list_subresource(author.ratings.all())
+
+
+class MovieViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    MultiGetMixin,
+    SubResourceMixin,
+    viewsets.ModelViewSet,
+):
     """
     API to manage movies.
     """
@@ -143,13 +445,14 @@ class MovieViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Movie.objects.all()
-        movie_status = self.request.query_params.get("status")
-        source = self.request.query_params.get("source")
-        if movie_status:
-            queryset = queryset.filter(status=movie_status)
-        if source:
-            queryset = queryset.filter(source=source)
-        return queryset
+        if self.action in ("list", "facets"):
+            queryset = filter_movies(queryset, movie_filters(self.request.query_params))
+        return self.optimize_queryset(queryset)
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return MovieDetailSerializer
+        return super().get_serializer_class()
 
     @extend_schema(exclude=True)
     def destroy(self, request, *args, **kwargs):
@@ -169,18 +472,10 @@ class MovieViewSet(viewsets.ModelViewSet):
         summary="List all movies",
         description="Returns a list of all movies.",
         parameters=[
-            OpenApiParameter(
-                name="status",
-                description="Filter by movie status",
-                required=False,
-                enum=["rumored", "planned", "in_production", "post_production", "released", "canceled"],
-            ),
-            OpenApiParameter(
-                name="source",
-                description="Filter by source",
-                required=False,
-                enum=["admin", "tmdb"],
-            ),
+            *MOVIE_FILTER_PARAMETERS,
+            IDS_PARAMETER,
+            FIELDS_PARAMETER,
+            EXPAND_PARAMETER,
         ],
         responses={200: MovieSerializer(many=True)},
     )
@@ -190,7 +485,8 @@ class MovieViewSet(viewsets.ModelViewSet):
     @extend_schema(
         summary="Retrieve a movie",
         description="Returns a specific movie.",
-        responses={200: MovieSerializer},
+        parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER],
+        responses={200: MovieDetailSerializer},
     )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
@@ -227,11 +523,15 @@ class MovieViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         serializer_class=MovieRatingSerializer,
     )
+    @transaction.atomic
     def rate(self, request, pk=None):
         movie = self.get_object()
 
         try:
-            spectator = Spectator.objects.get(pk=request.user.pk)
+            # one at a time with the rating batches of the spectator
+            spectator = Spectator.objects.select_for_update(of=("self",)).get(
+                pk=request.user.pk
+            )
         except Spectator.DoesNotExist:
             return Response(
                 {"detail": "Only spectators can rate movies."},
@@ -256,6 +556,35 @@ class MovieViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
 
+    @extend_schema(
+        summary="Movie facet counts",
+        description=(
+            "Number of movies matching the list filters, and the most frequent "
+            "values of each facet among them."
+        ),
+        parameters=MOVIE_FILTER_PARAMETERS,
+        responses={200: MovieFacetsResultSerializer},
+    )
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        filters = movie_filters(request.query_params)
+        return Response(movie_facets(self.get_queryset(), filters))
+
+    @extend_schema(
+        summary="List movie ratings",
+        description="Cursor paginated ratings of a movie, newest first.",
+        responses={200: MovieRatingSerializer(many=True)},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=MovieRatingSerializer,
+        pagination_class=CreatedAtCursorPagination,
+    )
+    def ratings(self, request, pk=None):
+        movie = self.get_object()
+        return self.list_subresource(movie.ratings.all())
+
     @extend_schema(
         summary="Add/remove movie from favorites",
         description="Allow a spectator to add or remove a movie from list of spectator favorites movies.",
@@ -290,25 +619,55 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_201_CREATED,
             )
         elif request.method == "DELETE":
-            if not spectator.favorite_movies.filter(pk=movie.pk).exists():
+            # a single DELETE tells whether the movie was a favorite
+            deleted, _ = Spectator.favorite_movies.through.objects.filter(
+                spectator=spectator, movie=movie
+            ).delete()
+            if not deleted:
                 return Response(
                     {"detail": "Movie not in favorites."},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            spectator.favorite_movies.remove(movie)
+            publish_on_commit([movie.pk])
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
+        methods=["GET"],
         summary="List of spectator favorites movies",
-        description="Get list of spectator favorites movies.",
+        description=(
+            "Get list of spectator favorites movies. With `ids`, returns which of "
+            "the given movie IDs are favorites instead."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                description=(
+                    "Comma separated movie IDs to check (at most MULTI_GET_MAX_IDS)"
+                ),
+                required=False,
+            ),
+        ],
         responses={
-            200: MovieSerializer(many=True),
+            200: MovieNestedSerializer(many=True),
             403: OpenApiResponse(description="Only spectators can get favorites movies."),
         },
     )
+    @extend_schema(
+        methods=["PUT"],
+        summary="Sync spectator favorites movies",
+        description=(
+            "Replace the spectator favorites with the given movie IDs, or merge "
+            "them into the current favorites."
+        ),
+        request=FavoritesSyncSerializer,
+        responses={
+            200: FavoritesSyncResultSerializer,
+            403: OpenApiResponse(description="Only spectators can manage favorites."),
+        },
+    )
     @action(
         detail=False,
-        methods=["get"],
+        methods=["get", "put"],
         permission_classes=[IsAuthenticated],
         url_path="favorites",
     )
@@ -321,6 +680,329 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        if request.method == "PUT":
+            return self._sync_favorites(spectator, request.data)
+
+        ids = split_query_param(request.query_params.get("ids"))
+        if ids is not None:
+            return self._check_favorites(spectator, ids)
+
         movies = spectator.favorite_movies.all()
         serializer = MovieNestedSerializer(movies, many=True)
         return Response(serializer.data)
+
+    def _check_favorites(self, spectator, ids):
+        """Favorite movie IDs among `ids`, in the order they were given."""
+        if not all(movie_id.isdigit() for movie_id in ids):
+            raise ValidationError({"ids": "Movie IDs must be integers."})
+        ids = [int(movie_id) for movie_id in ids]
+        if len(ids) > settings.MULTI_GET_MAX_IDS:
+            raise ValidationError(
+                {"ids": f"At most {settings.MULTI_GET_MAX_IDS} IDs can be requested."}
+            )
+        favorites = set(
+            Spectator.favorite_movies.through.objects.filter(
+                spectator=spectator, movie_id__in=ids
+            ).values_list("movie_id", flat=True)
+        )
+        return Response([movie_id for movie_id in ids if movie_id in favorites])
+
+    def _sync_favorites(self, spectator, data):
+        """Diff the requested favorites against the through table and bulk write."""
+        serializer = FavoritesSyncSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data["ids"]
+
+        through = Spectator.favorite_movies.through
+        current = set(
+            through.objects.filter(spectator=spectator).values_list(
+                "movie_id", flat=True
+            )
+        )
+        added = requested - current
+        removed = set()
+        if serializer.validated_data["mode"] == "replace":
+            removed = current - requested
+
+        with transaction.atomic():
+            through.objects.bulk_create(
+                [through(spectator=spectator, movie_id=movie_id) for movie_id in added],
+                ignore_conflicts=True,
+            )
+            if removed:
+                through.objects.filter(
+                    spectator=spectator, movie_id__in=removed
+                ).delete()
+            publish_on_commit(added | removed)
+
+        return Response({"added": sorted(added), "removed": sorted(removed)})
+
+
+class RatingBatchView(APIView):
+    """
+    API to rate movies and authors in bulk.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = RatingBatchSerializer
+
+    @extend_schema(
+        summary="Rate movies and authors in bulk",
+        description=(
+            "Create or update up to RATING_BATCH_MAX_SIZE movie and author ratings "
+            "of the spectator at once. Each item rates either a movie or an author "
+            "and gets its own result, in the order of the request."
+        ),
+        request=RatingBatchSerializer,
+        responses={
+            200: RatingBatchResultSerializer(many=True),
+            403: OpenApiResponse(description="Only spectators can rate."),
+        },
+    )
+    @transaction.atomic
+    def post(self, request):
+        try:
+            # batches of a spectator run one at a time
+            spectator = Spectator.objects.select_for_update(of=("self",)).get(
+                pk=request.user.pk
+            )
+        except Spectator.DoesNotExist:
+            return Response(
+                {"detail": "Only spectators can rate."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = RatingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = {}
+        pending = {"movie": {}, "author": {}}
+        for index, item in enumerate(serializer.validated_data["ratings"]):
+            item_serializer = RatingBatchItemSerializer(data=item)
+            if not item_serializer.is_valid():
+                results[index] = {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": item_serializer.errors,
+                }
+                continue
+
+            data = item_serializer.validated_data
+            target = "movie" if "movie" in data else "author"
+            if data[target] in pending[target]:
+                results[index] = {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": {target: ["Duplicate rating in batch."]},
+                }
+                continue
+            pending[target][data[target]] = (index, data)
+
+        results.update(
+            self._upsert(spectator, MovieRating, Movie, "movie", pending["movie"])
+        )
+        results.update(
+            self._upsert(spectator, AuthorRating, Author, "author", pending["author"])
+        )
+        # author representations embed their ratings
+        invalidate_on_commit(Author, pending["author"])
+
+        return Response([results[index] for index in sorted(results)])
+
+    def _upsert(self, spectator, rating_model, target_model, target, items):
+        """
+        Upsert the ratings of a spectator on one kind of target
+
+        Args:
+            spectator (Spectator): rating spectator
+            rating_model (type): MovieRating or AuthorRating
+            target_model (type): Movie or Author
+            target (str): name of the rated foreign key on `rating_model`
+            items (dict): target ID -> (batch index, validated rating data)
+
+        Returns:
+            dict: batch index -> rating result
+        """
+        if not items:
+            return {}
+
+        # resolve every target and its current rating (if rated) in one query
+        if rating_model is MovieRating:
+            # the rating keys locate each rating and its partition
+            ratings = MovieRatingKey.objects.filter(
+                spectator_id=spectator.pk, movie_id=OuterRef("pk")
+            )
+            rated = {
+                "rating_id": Subquery(ratings.values("rating_id")),
+                "rating_created_at": Subquery(ratings.values("created_at")),
+            }
+        else:
+            ratings = rating_model.objects.filter(
+                spectator=spectator, **{target: OuterRef("pk")}
+            )
+            rated = {
+                "rating_id": Subquery(ratings.values("pk")),
+                "rating_created_at": Value(None, DateTimeField()),
+            }
+        found = {
+            pk: (rating_id, created_at)
+            for pk, rating_id, created_at in target_model.objects.filter(pk__in=items)
+            .annotate(**rated)
+            .values_list("pk", "rating_id", "rating_created_at")
+        }
+        existing = {}
+        rating_ids = [rating_id for rating_id, _ in found.values() if rating_id]
+        if rating_ids:
+            queryset = rating_model.objects.filter(pk__in=rating_ids)
+            if rating_model is MovieRating:
+                # only scan the partitions holding the ratings
+                queryset = queryset.filter(
+                    created_at__in={created_at for _, created_at in found.values()}
+                )
+            existing = {getattr(rating, f"{target}_id"): rating for rating in queryset}
+
+        results = {}
+        created = []
+        updated = []
+        previous_scores = {}
+        now = timezone.now()
+        for target_id, (index, data) in items.items():
+            if target_id not in found:
+                results[index] = {"index": index, "status": "not_found"}
+                continue
+            rating = existing.get(target_id)
+            if rating is None:
+                rating = rating_model(
+                    spectator=spectator, **{f"{target}_id": target_id}
+                )
+                created.append(rating)
+            else:
+                previous_scores[target_id] = rating.score
+                rating.updated_at = now
+                updated.append(rating)
+            rating.score = data["score"]
+            rating.review = data["review"]
+
+        # partitioned movie ratings have no unique constraint to upsert on, the
+        # spectator lock taken by post() keeps batches from racing instead
+        rating_model.objects.bulk_create(created)
+        if updated:
+            queryset = rating_model.objects.all()
+            if rating_model is MovieRating:
+                queryset = queryset.filter(
+                    created_at__in={rating.created_at for rating in updated}
+                )
+            queryset.bulk_update(updated, ["score", "review", "updated_at"])
+
+        # bulk upserts skip the rating signals, recompute_scores repairs any drift
+        # from ratings made concurrently through the rate actions
+        changes = []
+        for rating in [*created, *updated]:
+            target_id = getattr(rating, f"{target}_id")
+            index = items[target_id][0]
+            previous_score = previous_scores.get(target_id)
+            results[index] = {
+                "index": index,
+                "status": "created" if previous_score is None else "updated",
+                "id": rating.pk,
+            }
+            changes.append((target_id, previous_score, rating.score))
+        changed = shift_histograms(target_model, changes)
+        invalidate_on_commit(target_model, changed)
+        if target_model is Movie:
+            publish_on_commit(changed)
+        return results
+
+
+class StatsView(APIView):
+    """
+    API for precomputed catalogue statistics.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Catalogue statistics",
+        description=(
+            "Totals, movies per release year and status, rating score "
+            "distributions and the authors with most movies. Statistics are "
+            "precomputed by manage.py refresh_stats, as of `refreshed_at`."
+        ),
+        responses={200: StatsSerializer},
+    )
+    def get(self, request):
+        # the statistics only change on refresh, any replica is fine
+        with use_replica():
+            stats = catalogue_stats()
+        return Response(StatsSerializer(stats).data)
+
+
+class ChangeFeedView(APIView):
+    """
+    API for the ordered changes of the catalogue, for incremental sync.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Catalogue change feed",
+        description=(
+            "Created, updated and deleted movies, authors, movie authors "
+            "(`movies.movie_authors`) and ratings after the `since` cursor, "
+            "ordered by writing transaction ID then change, each transaction "
+            "listed once every older one is over. Start without `since`, then "
+            "pass the `next` cursor of each page. Changes only carry keys (and "
+            "scores for ratings), changed objects are fetched with `?ids=`. "
+            "Changes older than CHANGE_FEED_RETENTION_DAYS are compacted: a "
+            "`since` cursor behind them gets a 410, the consumer must sync "
+            "again from scratch."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Cursor returned as `next` by the previous page",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description=(
+                    "Maximum number of changes (CHANGE_FEED_LIMIT by default, at "
+                    "most CHANGE_FEED_MAX_LIMIT)"
+                ),
+                required=False,
+            ),
+        ],
+        responses={
+            200: ChangeFeedSerializer,
+            410: OpenApiResponse(description="Changes after `since` were compacted."),
+        },
+    )
+    def get(self, request):
+        try:
+            cursor = parse_cursor(request.query_params.get("since"))
+        except ValueError:
+            raise ValidationError({"since": "Invalid cursor."})
+        limit = request.query_params.get("limit", str(settings.CHANGE_FEED_LIMIT))
+        max_limit = settings.CHANGE_FEED_MAX_LIMIT
+        if not limit.isdigit() or not 0 < int(limit) <= max_limit:
+            raise ValidationError({"limit": f"Limit must be from 1 to {max_limit}."})
+
+        # read from the primary, replicas may lag behind the cursor
+        since = cursor
+        changes, cursor, has_more = changes_since(cursor, int(limit))
+        # checked after reading, in case a compaction ran in between
+        if since != START and since < horizon():
+            return Response(
+                {"detail": "Changes after this cursor were compacted, sync again."},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(
+            ChangeFeedSerializer(
+                {
+                    "changes": changes,
+                    "next": format_cursor(cursor),
+                    "has_more": has_more,
+                }
+            ).data
+        )
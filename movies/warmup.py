@@ -0,0 +1,112 @@
+"""
+Cache warm-up of the hot catalogue, after a deploy or a cold start.
+
+The hot set is the movies and authors with most ratings over the last
+WARMUP_TRENDING_DAYS days (completed by popularity), or the most requested
+ones of an access log. `warm` requests their details and `?ids=` lookups from
+the running API with bounded concurrency, which fills whichever caches serve
+them (response cache, facets, database buffers) exactly as client requests
+would.
+"""
+
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import httpx
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Author, AuthorRating, Movie, MovieRating
+
+# aggregates requested by every client (the plain lists are not cached)
+LIST_PATHS = ["/api/movies/facets/", "/api/stats/"]
+
+# request line of a detail page in common and combined log formats
+DETAIL_REQUEST = re.compile(r'"GET /api/(movies|authors)/(\d+)/[ ?]')
+
+
+def _top_rated(rating_model, target, limit):
+    since = timezone.now() - timedelta(days=settings.WARMUP_TRENDING_DAYS)
+    return list(
+        rating_model.objects.filter(created_at__gte=since)
+        .values_list(target, flat=True)
+        .annotate(count=Count("pk"))
+        .order_by("-count", target)[:limit]
+    )
+
+
+def trending_movies(limit):
+    """IDs of the most rated movies lately, then of the most popular ones."""
+    ids = _top_rated(MovieRating, "movie", limit)
+    if len(ids) < limit:
+        popular = (
+            Movie.objects.exclude(pk__in=ids)
+            .filter(popularity__isnull=False)
+            .order_by("-popularity")
+            .values_list("pk", flat=True)
+        )
+        ids += popular[: limit - len(ids)]
+    return ids
+
+
+def trending_authors(limit, movie_ids=()):
+    """IDs of the most rated authors lately, then of the authors of `movie_ids`."""
+    ids = _top_rated(AuthorRating, "author", limit)
+    if len(ids) < limit and movie_ids:
+        authors = (
+            Author.objects.exclude(pk__in=ids)
+            .filter(movies__in=movie_ids)
+            .distinct()
+            .values_list("pk", flat=True)
+        )
+        ids += authors[: limit - len(ids)]
+    return ids
+
+
+def id_lookups(path, ids):
+    """`?ids=` lookups of `path` for `ids`, MULTI_GET_MAX_IDS at a time."""
+    size = settings.MULTI_GET_MAX_IDS
+    return [
+        f"{path}?ids={','.join(map(str, ids[start : start + size]))}"
+        for start in range(0, len(ids), size)
+    ]
+
+
+def logged_objects(lines, movies, authors):
+    """
+    Most requested movie and author details of an access log
+
+    Returns:
+        tuple: movie IDs, author IDs
+    """
+    requests = {"movies": Counter(), "authors": Counter()}
+    for line in lines:
+        if match := DETAIL_REQUEST.search(line):
+            requests[match[1]][int(match[2])] += 1
+    return (
+        [pk for pk, _ in requests["movies"].most_common(movies)],
+        [pk for pk, _ in requests["authors"].most_common(authors)],
+    )
+
+
+def warm(base_url, paths, concurrency, timeout):
+    """
+    Request API paths, `concurrency` at a time
+
+    Returns:
+        list: (path, error) of the failed requests
+    """
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+
+        def get(path):
+            try:
+                client.get(path).raise_for_status()
+            except httpx.HTTPError as error:
+                return path, str(error)
+            return None
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return [failure for failure in executor.map(get, paths) if failure]
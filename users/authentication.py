@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+
+# Claim carrying the password change timestamp of the user (BaseUser.password_stamp)
+PASSWORD_STAMP_CLAIM = "pwd"
+
+
+def user_cache_key(user_id, stamp):
+    return f"jwt-user:{user_id}:{stamp}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication resolving users from a short lived cache
+
+    Users are cached by ID and password change timestamp, so a password change
+    rejects tokens issued before it. Tokens without the timestamp claim are
+    resolved from the database.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.JWT_USER_CACHE_ALIAS]
+
+    def get_user(self, validated_token):
+        stamp = validated_token.get(PASSWORD_STAMP_CLAIM)
+        if stamp is None or not settings.JWT_USER_CACHE_TIMEOUT:
+            return self.check_password_stamp(super().get_user(validated_token), stamp)
+
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM), stamp)
+        user = self.cache.get(key)
+        if user is None:
+            user = self.check_password_stamp(super().get_user(validated_token), stamp)
+            self.cache.set(key, user, settings.JWT_USER_CACHE_TIMEOUT)
+        return user
+
+    def check_password_stamp(self, user, stamp):
+        if stamp is not None and stamp != user.password_stamp:
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
+
+
+class FilteredRefreshToken(RefreshToken):
+    """Refresh token skipping the blacklist query for JTIs absent from the filter"""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.might_contain(jti):
+            super().check_blacklist()
@@ -0,0 +1,147 @@
+"""
+Content addressed spectator avatars.
+
+Uploads are streamed to a temporary file while being hashed, and stored once
+per content under `avatars/<sha256[:2]>/<sha256>.<ext>`, so identical uploads
+share their file and thumbnails, and every URL can be cached forever. Requests
+only read the image header; decoding and resizing happen in the
+`users.process_avatar` background job, which writes WebP and JPEG thumbnails
+of each `AVATAR_SIZES` next to the original.
+"""
+
+import hashlib
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+CHUNK_SIZE = 64 * 1024
+
+# Pillow format -> file extension of the stored original
+FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+# thumbnail format -> (file extension, Pillow save options)
+THUMBNAIL_FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 85, "progressive": True}),
+}
+
+
+class AvatarError(Exception):
+    """Rejected avatar upload"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_upload(stream, content_length=None):
+    """
+    Copy an upload to a temporary file, hashing it on the way
+
+    Args:
+        stream (file): request body
+        content_length (int): announced size, checked before reading
+
+    Returns:
+        tuple: temporary file, hex SHA-256 digest
+
+    Raises:
+        AvatarError: empty upload, or larger than AVATAR_MAX_UPLOAD_SIZE
+    """
+    limit = settings.AVATAR_MAX_UPLOAD_SIZE
+    too_large = AvatarError(f"Avatars are limited to {limit} bytes.", status=413)
+    if content_length and content_length > limit:
+        raise too_large
+
+    upload = tempfile.TemporaryFile()
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := stream.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > limit:
+            upload.close()
+            raise too_large
+        digest.update(chunk)
+        upload.write(chunk)
+    if not size:
+        upload.close()
+        raise AvatarError("The avatar is empty.")
+    upload.seek(0)
+    return upload, digest.hexdigest()
+
+
+def image_format(upload):
+    """
+    Check the header of an uploaded image, without decoding it
+
+    Returns:
+        str: Pillow format name
+
+    Raises:
+        AvatarError: not a supported image, or more than AVATAR_MAX_PIXELS
+    """
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError) as error:
+        raise AvatarError("The avatar is not a supported image.") from error
+    finally:
+        upload.seek(0)
+    if image_format not in FORMATS:
+        raise AvatarError("The avatar is not a supported image.")
+    if width * height > settings.AVATAR_MAX_PIXELS:
+        raise AvatarError("The avatar has too many pixels.")
+    return image_format
+
+
+def original_name(digest, image_format):
+    return f"avatars/{digest[:2]}/{digest}.{FORMATS[image_format]}"
+
+
+def store(upload, digest, image_format):
+    """Store an upload under its content address, once."""
+    name = original_name(digest, image_format)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, File(upload))
+    return name
+
+
+def thumbnail_name(name, size, extension):
+    return f"{name.rsplit('.', 1)[0]}/{size}.{extension}"
+
+
+def generate_thumbnails(name):
+    """
+    Write the square thumbnails of a stored avatar (CPU bound, run by a job)
+
+    Args:
+        name (str): storage name of the original
+
+    Returns:
+        dict: size -> format -> storage name
+    """
+    with default_storage.open(name) as original, Image.open(original) as image:
+        largest = max(settings.AVATAR_SIZES)
+        # JPEG decoders can downscale while decoding
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+        thumbnails = {}
+        for size in sorted(settings.AVATAR_SIZES, reverse=True):
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            thumbnails[str(size)] = {}
+            for key, (extension, options) in THUMBNAIL_FORMATS.items():
+                thumbnail = thumbnail_name(name, size, extension)
+                if not default_storage.exists(thumbnail):
+                    buffer = io.BytesIO()
+                    image.save(buffer, **options)
+                    thumbnail = default_storage.save(
+                        thumbnail, ContentFile(buffer.getvalue())
+                    )
+                thumbnails[str(size)][key] = thumbnail
+    return thumbnails
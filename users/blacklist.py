@@ -0,0 +1,126 @@
+"""
+Probabilistic set of blacklisted refresh token JTIs.
+
+Refreshing or blacklisting a token checks the `BlacklistedToken` table. A Bloom
+filter of the blacklisted JTIs lets most checks skip that query: a JTI absent
+from the filter is certainly not blacklisted, a JTI present in it is confirmed
+against the table.
+
+The filter is rebuilt from the table and shared through the cache under a
+generation token. Each process keeps it in memory and reloads it once the
+generation changes, which happens whenever a token gets blacklisted: the new
+generation is sent through the invalidation bus, so processes with a cache of
+their own reload it too.
+"""
+
+import hashlib
+import math
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over strings"""
+
+    def __init__(self, size, hash_count, bits=None):
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bytearray(bits or (size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate):
+        """Filter sized for `capacity` items at the given false positive rate."""
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hash_count = max(round(size / capacity * math.log(2)), 1)
+        return cls(size, hash_count)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class BlacklistFilter:
+    """Per-process copy of the shared blacklist Bloom filter"""
+
+    filter_key = "jwt-blacklist:filter"
+    generation_key = "jwt-blacklist:generation"
+
+    def __init__(self):
+        self._filter = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.JWT_BLACKLIST_FILTER_CACHE_ALIAS]
+
+    def might_contain(self, jti):
+        """False when the JTI is certainly not blacklisted."""
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            self.cache.add(self.generation_key, uuid.uuid4().hex, None)
+            generation = self.cache.get(self.generation_key)
+        with self._lock:
+            if self._filter is None or generation != self._generation:
+                self._filter = self._load(generation)
+                self._generation = generation
+            return jti in self._filter
+
+    def _load(self, generation):
+        shared = self.cache.get(self.filter_key)
+        if shared and shared[0] == generation:
+            _, size, hash_count, bits = shared
+            return BloomFilter(size, hash_count, bits)
+
+        bloom_filter = self.build()
+        self.cache.set(
+            self.filter_key,
+            (generation, bloom_filter.size, bloom_filter.hash_count, bloom_filter.bits),
+            None,
+        )
+        return bloom_filter
+
+    def build(self):
+        """Bloom filter of every blacklisted JTI, read from the database."""
+        jtis = BlacklistedToken.objects.values_list("token__jti", flat=True)
+        bloom_filter = BloomFilter.for_capacity(
+            # leave room so the false positive rate holds as tokens get blacklisted
+            max(jtis.count() * 2, 1024),
+            settings.JWT_BLACKLIST_FILTER_ERROR_RATE,
+        )
+        for jti in jtis.iterator():
+            bloom_filter.add(jti)
+        return bloom_filter
+
+    def invalidate(self, generations=None):
+        """
+        Make the processes sharing the cache rebuild the filter, once a token
+        got blacklisted
+
+        Args:
+            generations (list): new generations sent through the invalidation
+                bus, the same in every cache; a random one when None
+        """
+        generation = max(generations) if generations else uuid.uuid4().hex
+        self.cache.set(self.generation_key, generation, None)
+
+
+blacklist_filter = BlacklistFilter()
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from users.blacklist import blacklist_filter
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tokens deleted per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches (default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+        deleted = blacklisted = 0
+
+        while True:
+            with transaction.atomic():
+                # served by the outstandingtoken expires_at index
+                pks = list(
+                    OutstandingToken.objects.filter(expires_at__lt=now)
+                    .order_by("expires_at")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                blacklisted += BlacklistedToken.objects.filter(
+                    token_id__in=pks
+                ).delete()[0]
+                deleted += OutstandingToken.objects.filter(pk__in=pks).delete()[0]
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        if blacklisted:
+            blacklist_filter.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired tokens ({blacklisted} blacklisted)"
+            )
+        )
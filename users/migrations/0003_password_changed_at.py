@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_username_last_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baseuser',
+            name='password_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-19 11:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # the token table is large, build the index without locking writes
+    atomic = False
+
+    dependencies = [
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+        ('users', '0003_password_changed_at'),
+    ]
+
+    operations = [
+        # serves compact_tokens, the table belongs to token_blacklist
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS outstandingtoken_expires_at_idx '
+                'ON token_blacklist_outstandingtoken (expires_at)'
+            ),
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS outstandingtoken_expires_at_idx',
+        ),
+    ]
@@ -1,9 +1,38 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import OpClass
+from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 
 class BaseUser(AbstractUser):
     """Custom user model"""
 
+    password_changed_at = models.DateTimeField(blank=True, null=True, editable=False)
+
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            # serve case insensitive prefix search (__istartswith)
+            models.Index(
+                OpClass(Upper("username"), name="text_pattern_ops"),
+                name="baseuser_username_prefix_idx",
+            ),
+            models.Index(
+                OpClass(Upper("last_name"), name="text_pattern_ops"),
+                name="baseuser_last_name_prefix_idx",
+            ),
+        ]
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self._previous_password_stamp = self.password_stamp
+        self.password_changed_at = timezone.now()
+
+    @property
+    def password_stamp(self):
+        """Password change timestamp carried by the JWT issued to the user."""
+        if self.password_changed_at is None:
+            return 0
+        return int(self.password_changed_at.timestamp())
@@ -1,8 +1,12 @@
 from django.contrib.auth.password_validation import validate_password
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 
 from movies.models import Spectator
 
+from .authentication import PASSWORD_STAMP_CLAIM, FilteredRefreshToken
+
 
 class SpectatorRegistrationSerializer(serializers.ModelSerializer):
     """Spectator registration serializer"""
@@ -33,3 +37,59 @@ class SpectatorRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop("password_confirm")
         return Spectator.objects.create_user(**validated_data)
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Token pair serializer stamping tokens with the password change timestamp"""
+
+    token_class = FilteredRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[PASSWORD_STAMP_CLAIM] = user.password_stamp
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    token_class = FilteredRefreshToken
+
+
+class AvatarThumbnailSerializer(serializers.Serializer):
+    """Square avatar thumbnail in each format"""
+
+    size = serializers.IntegerField()
+    webp = serializers.URLField()
+    jpeg = serializers.URLField()
+
+
+class AvatarSerializer(serializers.Serializer):
+    """Avatar of the spectator, thumbnails are listed once generated"""
+
+    status = serializers.ChoiceField(choices=["none", "processing", "ready"])
+    original = serializers.URLField(allow_null=True)
+    thumbnails = AvatarThumbnailSerializer(many=True)
+
+    def to_representation(self, spectator):
+        request = self.context["request"]
+
+        def url(name):
+            return request.build_absolute_uri(default_storage.url(name))
+
+        if not spectator.avatar:
+            return {"status": "none", "original": None, "thumbnails": []}
+        thumbnails = [
+            {"size": int(size), **{key: url(name) for key, name in formats.items()}}
+            for size, formats in sorted(
+                spectator.avatar_thumbnails.items(), key=lambda item: int(item[0])
+            )
+        ]
+        return {
+            "status": "ready" if thumbnails else "processing",
+            "original": url(spectator.avatar.name),
+            "thumbnails": thumbnails,
+        }
@@ -0,0 +1,47 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from core.invalidation import invalidation_bus
+
+from .authentication import user_cache_key
+from .blacklist import blacklist_filter
+from .models import BaseUser
+
+USER_LABEL = BaseUser._meta.label_lower
+BLACKLIST_LABEL = BlacklistedToken._meta.label_lower
+
+
+def drop_cached_users(keys):
+    # every key: cached users expire after JWT_USER_CACHE_TIMEOUT
+    if keys is not None:
+        caches[settings.JWT_USER_CACHE_ALIAS].delete_many(keys)
+
+
+# caches local to a process are invalidated by every process
+invalidation_bus.register(USER_LABEL, drop_cached_users)
+invalidation_bus.register(BLACKLIST_LABEL, blacklist_filter.invalidate)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def user_changed(sender, instance, **kwargs):
+    # spectators and authors are saved under their own sender
+    if not isinstance(instance, BaseUser):
+        return
+    stamps = {instance.password_stamp}
+    if hasattr(instance, "_previous_password_stamp"):
+        stamps.add(instance._previous_password_stamp)
+    invalidation_bus.invalidate(
+        USER_LABEL, [user_cache_key(instance.pk, stamp) for stamp in stamps]
+    )
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        invalidation_bus.invalidate(BLACKLIST_LABEL, [uuid.uuid4().hex])
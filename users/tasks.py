@@ -0,0 +1,19 @@
+from django.core.management import call_command
+
+from core.jobs import task
+from movies.models import Spectator
+
+from .avatars import generate_thumbnails
+
+
+@task
+def compact_tokens(batch_size=1000):
+    call_command("compact_tokens", batch_size=batch_size)
+
+
+@task
+def process_avatar(name):
+    thumbnails = generate_thumbnails(name)
+    # spectators who uploaded the same image share its thumbnails
+    Spectator.objects.filter(avatar=name).update(avatar_thumbnails=thumbnails)
+    return thumbnails
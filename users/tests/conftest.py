@@ -1,7 +1,18 @@
 import pytest
 from rest_framework.test import APIClient
 
+from movies.models import Spectator
+
 
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture
+def spectator(db):
+    return Spectator.objects.create_user(
+        username="spectator",
+        email="spectator@test.com",
+        password="TestPass123!",
+    )
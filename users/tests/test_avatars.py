@@ -0,0 +1,148 @@
+import asyncio
+import io
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+
+from config.asgi import application
+from core.jobs import claim, run
+from core.models import Job
+from movies.models import Spectator
+
+
+def image_bytes(size=(600, 400), image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.AVATAR_SIZES = [64, 128]
+
+
+@pytest.fixture
+def client(api_client, spectator):
+    api_client.force_authenticate(user=spectator)
+    return api_client
+
+
+def upload(client, content, content_type="image/png"):
+    return client.generic("PUT", reverse("avatar"), content, content_type=content_type)
+
+
+def chunked_upload(token, chunks, content_type="image/png"):
+    """PUT the chunks as one body without a Content-Length."""
+    scope = {
+        "type": "http",
+        "method": "PUT",
+        "path": reverse("avatar"),
+        "query_string": b"",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", content_type.encode()),
+            (b"transfer-encoding", b"chunked"),
+        ],
+    }
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks
+    ] + [{"type": "http.request", "body": b"", "more_body": False}]
+    sent = []
+
+    async def receive():
+        if not messages:
+            # the client stays connected until the response is sent
+            await asyncio.Event().wait()
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async_to_sync(application)(scope, receive, send)
+    return sent[0]["status"]
+
+
+class TestAvatarUpload:
+    """Tests for avatar uploads and thumbnails"""
+
+    def test_upload_is_processed_in_background(self, client, spectator):
+        response = upload(client, image_bytes())
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["status"] == "processing"
+        assert "/media/avatars/" in response.data["original"]
+        job = Job.objects.get(name="users.process_avatar")
+
+        run(claim())
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        response = client.get(reverse("avatar"))
+        assert response.data["status"] == "ready"
+        assert [thumb["size"] for thumb in response.data["thumbnails"]] == [64, 128]
+        thumbnail = response.data["thumbnails"][0]["webp"]
+        file_response = client.get(thumbnail)
+        assert file_response["Cache-Control"].endswith("immutable")
+        with Image.open(io.BytesIO(b"".join(file_response.streaming_content))) as image:
+            assert image.format == "WEBP"
+            assert image.size == (64, 64)
+
+    def test_identical_upload_reuses_thumbnails(self, client, spectator):
+        content = image_bytes(image_format="JPEG")
+        other = Spectator.objects.create_user(username="other", password="x")
+        client.force_authenticate(user=other)
+        upload(client, content, "image/jpeg")
+        run(claim())
+
+        client.force_authenticate(user=spectator)
+        response = upload(client, content, "image/jpeg")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "ready"
+        spectator.refresh_from_db()
+        other.refresh_from_db()
+        assert spectator.avatar.name == other.avatar.name
+        assert Job.objects.count() == 1
+
+    def test_rejects_invalid_and_large_uploads(self, client, settings):
+        response = upload(client, b"not an image")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        settings.AVATAR_MAX_UPLOAD_SIZE = 100
+        response = upload(client, image_bytes())
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def test_rejects_empty_upload(self, client):
+        response = upload(client, b"")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["detail"] == "The avatar is empty."
+
+    @pytest.mark.django_db(transaction=True)
+    def test_chunked_upload(self, api_client, spectator):
+        content = image_bytes()
+        response = api_client.post(
+            reverse("token-obtain"),
+            {"username": "spectator", "password": "TestPass123!"},
+            format="json",
+        )
+
+        assert (
+            chunked_upload(response.data["access"], [content[:100], content[100:]])
+            == status.HTTP_202_ACCEPTED
+        )
+        spectator.refresh_from_db()
+        assert spectator.avatar.name.startswith("avatars/")
+
+    def test_delete_avatar(self, client, spectator):
+        upload(client, image_bytes())
+
+        response = client.delete(reverse("avatar"))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert client.get(reverse("avatar")).data["status"] == "none"
@@ -0,0 +1,155 @@
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from core.invalidation import invalidation_bus
+from users.authentication import user_cache_key
+from users.blacklist import BloomFilter, blacklist_filter
+
+
+def receive(label, pks):
+    """Apply an invalidation sent by another process."""
+    invalidation_bus.receive(
+        json.dumps({"sender": "other", "label": label, "pks": pks})
+    )
+
+
+def obtain_tokens(api_client, username="spectator", password="TestPass123!"):
+    response = api_client.post(
+        reverse("token-obtain"),
+        {"username": username, "password": password},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+class TestCachedUser:
+    """Tests for the cached JWT user resolution"""
+
+    def test_cached_user_skips_query(
+        self, api_client, spectator, django_assert_num_queries
+    ):
+        cache.clear()
+        tokens = obtain_tokens(api_client)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        url = reverse("movie-my-favorites")
+        api_client.get(url)
+
+        # favorites list and its count, without the user lookup
+        with django_assert_num_queries(2):
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_password_change_rejects_previous_tokens(
+        self, api_client, spectator, django_capture_on_commit_callbacks
+    ):
+        tokens = obtain_tokens(api_client)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        url = reverse("movie-my-favorites")
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            spectator.set_password("NewPass123!")
+            spectator.save()
+
+        assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+        tokens = obtain_tokens(api_client, password="NewPass123!")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    def test_deactivation_invalidates_cached_user(
+        self, api_client, spectator, django_capture_on_commit_callbacks
+    ):
+        tokens = obtain_tokens(api_client)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        url = reverse("movie-my-favorites")
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            spectator.is_active = False
+            spectator.save()
+
+        assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_cached_user_dropped_by_other_processes(self, spectator):
+        key = user_cache_key(spectator.pk, spectator.password_stamp)
+        cache.set(key, spectator)
+
+        receive("users.baseuser", [key])
+
+        assert cache.get(key) is None
+
+
+class TestBlacklistFilter:
+    """Tests for the blacklisted token filter"""
+
+    def test_bloom_filter_membership(self):
+        bloom_filter = BloomFilter.for_capacity(100, 0.001)
+        for index in range(100):
+            bloom_filter.add(f"jti-{index}")
+
+        assert all(f"jti-{index}" in bloom_filter for index in range(100))
+        assert sum(f"other-{index}" in bloom_filter for index in range(1000)) < 10
+
+    def test_refresh_skips_blacklist_query(
+        self, api_client, spectator, django_assert_num_queries
+    ):
+        tokens = obtain_tokens(api_client)
+        blacklist_filter.invalidate()
+        blacklist_filter.might_contain("warm-up")
+
+        # the active user check only, no blacklist lookup
+        with django_assert_num_queries(1):
+            response = api_client.post(
+                reverse("token-refresh"), {"refresh": tokens["refresh"]}, format="json"
+            )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_blacklisted_token_rejected(
+        self, api_client, spectator, django_capture_on_commit_callbacks
+    ):
+        tokens = obtain_tokens(api_client)
+        blacklist_filter.might_contain("warm-up")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                reverse("logout"), {"refresh": tokens["refresh"]}, format="json"
+            )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.post(
+            reverse("token-refresh"), {"refresh": tokens["refresh"]}, format="json"
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_other_processes_take_the_new_generation(self, db):
+        receive("token_blacklist.blacklistedtoken", ["b", "a"])
+
+        assert cache.get(blacklist_filter.generation_key) == "b"
+
+
+class TestCompactTokens:
+    """Tests for the compact_tokens command"""
+
+    def test_deletes_expired_tokens(self, api_client, spectator):
+        expired = obtain_tokens(api_client)
+        api_client.post(reverse("logout"), {"refresh": expired["refresh"]})
+        obtain_tokens(api_client)
+        OutstandingToken.objects.filter(blacklistedtoken__isnull=False).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        call_command("compact_tokens", batch_size=1)
+
+        assert OutstandingToken.objects.count() == 1
+        assert not BlacklistedToken.objects.exists()
@@ -5,11 +5,12 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from .views import SpectatorRegistrationView
+from .views import AvatarView, SpectatorRegistrationView
 
 urlpatterns = [
     path("register/", SpectatorRegistrationView.as_view(), name="spectator-register"),
     path("token/", TokenObtainPairView.as_view(), name="token-obtain"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
     path("logout/", TokenBlacklistView.as_view(), name="logout"),
+    path("avatar/", AvatarView.as_view(), name="avatar"),
 ]
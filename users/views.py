@@ -1,9 +1,18 @@
-from drf_spectacular.utils import extend_schema
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import generics, status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .serializers import SpectatorRegistrationSerializer
+from core.jobs import enqueue
+from movies.models import Spectator
+
+from .avatars import AvatarError, image_format, read_upload, store
+from .serializers import AvatarSerializer, SpectatorRegistrationSerializer
 
 
 class SpectatorRegistrationView(generics.CreateAPIView):
@@ -38,3 +47,120 @@ class SpectatorRegistrationView(generics.CreateAPIView):
             },
             status=status.HTTP_201_CREATED,
         )
+
+
+class AvatarView(APIView):
+    """
+    Endpoint for the avatar of the current spectator
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_spectator(self):
+        try:
+            return Spectator.objects.get(pk=self.request.user.pk)
+        except Spectator.DoesNotExist:
+            return None
+
+    def respond(self, spectator, status=status.HTTP_200_OK):
+        serializer = AvatarSerializer(spectator, context={"request": self.request})
+        return Response(serializer.data, status=status)
+
+    @extend_schema(
+        summary="Get the avatar",
+        responses={
+            200: AvatarSerializer,
+            403: OpenApiResponse(description="Only spectators have avatars."),
+        },
+        tags=["avatar"],
+    )
+    def get(self, request):
+        spectator = self.get_spectator()
+        if spectator is None:
+            return Response(
+                {"detail": "Only spectators have avatars."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return self.respond(spectator)
+
+    @extend_schema(
+        summary="Upload the avatar",
+        description=(
+            "Stream a JPEG, PNG, WebP or GIF image as the request body (at most "
+            "AVATAR_MAX_UPLOAD_SIZE bytes). Thumbnails are generated in the "
+            "background: the avatar is `processing` until they are listed, "
+            "unless the same image was uploaded before."
+        ),
+        request={"image/*": OpenApiTypes.BINARY},
+        responses={
+            200: AvatarSerializer,
+            202: AvatarSerializer,
+            400: OpenApiResponse(description="Not a supported image."),
+            403: OpenApiResponse(description="Only spectators have avatars."),
+            413: OpenApiResponse(description="Avatar too large."),
+        },
+        tags=["avatar"],
+    )
+    def put(self, request):
+        spectator = self.get_spectator()
+        if spectator is None:
+            return Response(
+                {"detail": "Only spectators have avatars."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        content_length = request.META.get("CONTENT_LENGTH")
+        try:
+            # request.stream is None without a Content-Length, the Django
+            # request also reads chunked bodies
+            upload, digest = read_upload(
+                request._request,
+                int(content_length) if content_length else None,
+            )
+        except AvatarError as error:
+            return Response({"detail": str(error)}, status=error.status)
+
+        with upload:
+            try:
+                name = store(upload, digest, image_format(upload))
+            except AvatarError as error:
+                return Response({"detail": str(error)}, status=error.status)
+
+        spectator.avatar = name
+        spectator.avatar_thumbnails = (
+            Spectator.objects.filter(avatar=name)
+            .exclude(avatar_thumbnails={})
+            .values_list("avatar_thumbnails", flat=True)
+            .first()
+        ) or {}
+        spectator.save(update_fields=["avatar", "avatar_thumbnails"])
+        if not spectator.avatar_thumbnails:
+            enqueue("users.process_avatar", dedup_key=f"avatar:{digest}", name=name)
+            return self.respond(spectator, status.HTTP_202_ACCEPTED)
+        return self.respond(spectator)
+
+    @extend_schema(
+        summary="Remove the avatar",
+        responses={204: None},
+        tags=["avatar"],
+    )
+    def delete(self, request):
+        spectator = self.get_spectator()
+        if spectator is not None:
+            # the files may be shared with other spectators
+            spectator.avatar = None
+            spectator.avatar_thumbnails = {}
+            spectator.save(update_fields=["avatar", "avatar_thumbnails"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def avatar_file(request, path):
+    """Serve an avatar file, content addressed so cached for good."""
+    name = f"avatars/{path}"
+    if not default_storage.exists(name):
+        raise Http404
+    response = FileResponse(default_storage.open(name))
+    response["Cache-Control"] = (
+        f"public, max-age={settings.AVATAR_CACHE_MAX_AGE}, immutable"
+    )
+    return response